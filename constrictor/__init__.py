@@ -6,6 +6,9 @@ A microframework based on Flask for creating modular applications.
 
 from .blueprint_loader import load
 from .db import db, migrate
+from .backfills import backfill
+from .cache import cached
+from .serialization import SerializerMixin
 from .auth_models import User, Role, ModelAccess
 from .auth import (
     login_manager,
@@ -22,6 +25,9 @@ __all__ = [
     "load",
     "db",
     "migrate",
+    "backfill",
+    "cached",
+    "SerializerMixin",
     "User",
     "Role",
     "ModelAccess",
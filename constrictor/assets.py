@@ -0,0 +1,158 @@
+"""
+Fingerprinted, precompressed static assets for modules.
+
+`constrictor assets build` copies every file under modules/<name>/static/
+to static/assets/<name>/, with a content hash in the filename
+(app.css -> app.3f2a9c1b0d.css), writes a gzip sibling for compressible
+files (app.3f2a9c1b0d.css.gz) and records the mapping in
+static/assets/manifest.json.
+
+With CONSTRICTOR_ASSETS = True, load() serves /assets/<path>: fingerprinted
+files with a one-year immutable Cache-Control, and the .gz sibling to
+clients that accept gzip, so the compression is paid once at build time
+instead of on every request. Paths that aren't in the manifest fall back to
+the module's static/ directory without caching, so templates work the same
+before the first build:
+
+    <link rel="stylesheet" href="{{ asset_url('blog/app.css') }}">
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+
+from .compression import accepts_gzip
+
+ASSETS_DIR = Path("static") / "assets"
+MANIFEST_FILE = "manifest.json"
+
+# One year: fingerprinted files never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+PRECOMPRESS_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".html", ".htm", ".txt", ".xml", ".ico", ".ttf", ".otf",
+}
+
+_HASH_LENGTH = 10
+
+
+class BuiltAsset(NamedTuple):
+    source: str          # <module>/<path under static/>
+    fingerprinted: str   # <module>/<path with content hash>
+    gzipped: bool
+
+
+def fingerprint_name(path: str, digest: str) -> str:
+    """'css/app.css' -> 'css/app.<digest>.css'"""
+    parent, _, name = path.rpartition("/")
+    stem, dot, extension = name.partition(".")
+    name = f"{stem}.{digest}{dot}{extension}" if dot else f"{stem}.{digest}"
+    return f"{parent}/{name}" if parent else name
+
+
+def build_assets(project_dir: Path, clean: bool = False) -> List[BuiltAsset]:
+    """
+    Fingerprint and precompress every module's static files.
+
+    Files from earlier builds are kept unless clean=True, so pages rendered
+    before a deploy can still load the assets they reference.
+
+    Args:
+        project_dir: The project root (containing modules/)
+        clean: Remove previous build output first
+
+    Returns:
+        The assets built, in path order
+    """
+    project_dir = Path(project_dir)
+    output = project_dir / ASSETS_DIR
+    if clean and output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    built = []
+    modules_dir = project_dir / "modules"
+    sources = sorted(modules_dir.glob("*/static/**/*")) if modules_dir.is_dir() else []
+    for source in sources:
+        if not source.is_file():
+            continue
+        module = source.relative_to(modules_dir).parts[0]
+        relative = source.relative_to(modules_dir / module / "static").as_posix()
+        data = source.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:_HASH_LENGTH]
+        fingerprinted = f"{module}/{fingerprint_name(relative, digest)}"
+
+        target = output / fingerprinted
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            target.write_bytes(data)
+
+        gzipped = False
+        if source.suffix.lower() in PRECOMPRESS_EXTENSIONS:
+            compressed = gzip.compress(data, 9, mtime=0)
+            if len(compressed) < len(data):
+                Path(f"{target}.gz").write_bytes(compressed)
+                gzipped = True
+        built.append(BuiltAsset(f"{module}/{relative}", fingerprinted, gzipped))
+
+    manifest = {asset.source: asset.fingerprinted for asset in built}
+    tmp = output / (MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(output / MANIFEST_FILE)
+    return built
+
+
+def read_manifest(root_path) -> Dict[str, str]:
+    """The asset manifest of a project, or {} before the first build."""
+    path = Path(root_path) / ASSETS_DIR / MANIFEST_FILE
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+blueprint = Blueprint("constrictor_assets", __name__)
+
+
+def asset_url(path: str) -> str:
+    """URL of a module static file, '<module>/<path under static/>',
+    fingerprinted when it has been built."""
+    manifest = current_app.extensions["constrictor_assets"]["manifest"]
+    return url_for("constrictor_assets.asset", filename=manifest.get(path, path))
+
+
+@blueprint.route("/assets/<path:filename>")
+def asset(filename):
+    if filename in current_app.extensions["constrictor_assets"]["built"]:
+        directory = Path(current_app.root_path) / ASSETS_DIR
+        if accepts_gzip(request.environ) and (directory / f"{filename}.gz").is_file():
+            response = send_from_directory(directory, f"{filename}.gz", max_age=IMMUTABLE_MAX_AGE,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = send_from_directory(directory, filename, max_age=IMMUTABLE_MAX_AGE)
+        response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    # Not built: serve straight from the module, revalidating every time
+    module, _, path = filename.partition("/")
+    if not module or not path:
+        abort(404)
+    response = send_from_directory(Path(current_app.root_path) / "modules" / module / "static", path, max_age=0)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def init_assets(app) -> None:
+    """Serve /assets/ and add asset_url() to the app's templates."""
+    manifest = read_manifest(app.root_path)
+    app.extensions["constrictor_assets"] = {"manifest": manifest, "built": set(manifest.values())}
+    app.register_blueprint(blueprint)
+    app.add_template_global(asset_url)
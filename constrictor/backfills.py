@@ -0,0 +1,259 @@
+"""
+Batched data backfills for migration hooks.
+
+A single `UPDATE ... SET` over a large table holds its locks (and grows its
+transaction) for as long as it runs. `backfill()` walks the table in
+primary-key order instead, hands each chunk's key range to a callback and
+commits after every chunk, so locks are short-lived and an interrupted run
+picks up where it stopped:
+
+    # modules/article/postmigrate.py
+    from constrictor import backfill, db
+    from modules.article.models import ArticleModel
+
+    def run(app):
+        def fill_slugs(low, high):
+            return db.session.execute(
+                db.update(ArticleModel)
+                .where(ArticleModel.id.between(low, high), ArticleModel.slug.is_(None))
+                .values(slug=db.func.lower(ArticleModel.name))
+            ).rowcount
+
+        with app.app_context():
+            backfill("article_slugs", ArticleModel, fill_slugs, batch_size=5000)
+"""
+
+import datetime
+import decimal
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import click
+from flask import current_app
+from sqlalchemy import func, select
+
+from .db import db
+from .serialization import json_value
+
+logger = logging.getLogger(__name__)
+
+# Per-project backfill checkpoints, relative to the app's root path.
+CHECKPOINT_DIR = Path(".constrictor") / "backfills"
+
+# Primary key types whose values survive a trip through the JSON checkpoint,
+# and how to read them back
+_PK_DECODERS = {
+    int: int,
+    str: str,
+    float: float,
+    datetime.datetime: datetime.datetime.fromisoformat,
+    datetime.date: datetime.date.fromisoformat,
+    datetime.time: datetime.time.fromisoformat,
+    decimal.Decimal: decimal.Decimal,
+    uuid.UUID: uuid.UUID,
+}
+
+
+class BackfillProgress:
+    """Running totals for one backfill: passed to progress callbacks and
+    returned by backfill() when it finishes."""
+
+    def __init__(self, name: str, total: Optional[int] = None, processed: int = 0,
+                 last_pk: Any = None):
+        self.name = name
+        self.total = total
+        self.processed = processed
+        self.changed = 0
+        self.last_pk = last_pk
+        self.batches = 0
+        self.completed = False
+        self._start_processed = processed
+        self._started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since this run (not the whole backfill) started."""
+        return time.monotonic() - self._started
+
+    @property
+    def rate(self) -> float:
+        """Rows per second processed by this run."""
+        elapsed = self.elapsed
+        return (self.processed - self._start_processed) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        done = f"{self.processed:,}" if self.total is None else f"{self.processed:,}/{self.total:,}"
+        state = "done" if self.completed else f"up to key {self.last_pk}"
+        return (f"Backfill '{self.name}': {done} rows, {self.changed:,} changed "
+                f"({state}, {self.rate:,.0f} rows/s)")
+
+    def __repr__(self):
+        return f"<BackfillProgress {self.summary()}>"
+
+
+def _checkpoint_path(name: str) -> Path:
+    return Path(current_app.root_path) / CHECKPOINT_DIR / f"{name}.json"
+
+
+def _database_id() -> str:
+    return db.engine.url.render_as_string(hide_password=True)
+
+
+def _pk_decoder(pk) -> Callable[[Any], Any]:
+    """How to read the primary key back from a checkpoint.
+
+    Raises:
+        ValueError: If the key's type can't be checkpointed
+    """
+    try:
+        python_type = pk.type.python_type
+    except NotImplementedError:
+        python_type = None
+    for checkpointed, decode in _PK_DECODERS.items():
+        if python_type is not None and issubclass(python_type, checkpointed):
+            return decode
+    raise ValueError(f"backfill() can't checkpoint primary key '{pk.name}' of type {pk.type}")
+
+
+def _load_checkpoint(path: Path) -> Optional[dict]:
+    """The saved checkpoint for this backfill, if it was for this database."""
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return state if state.get("database") == _database_id() else None
+
+
+def _save_checkpoint(path: Path, progress: BackfillProgress) -> None:
+    content = json.dumps({
+        "database": _database_id(),
+        "last_pk": json_value(progress.last_pk),
+        "processed": progress.processed,
+        "changed": progress.changed,
+        "completed": progress.completed,
+    })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _echo_progress(progress: BackfillProgress) -> None:
+    click.echo(progress.summary())
+
+
+def backfill(name: str, model, fn: Callable[[Any, Any], Optional[int]],
+             batch_size: int = 1000, where=None, sleep: float = 0.0,
+             lag: Optional[Callable[[], float]] = None, max_lag: float = 1.0,
+             progress: Optional[Callable[[BackfillProgress], None]] = _echo_progress,
+             report_every: float = 5.0, restart: bool = False) -> BackfillProgress:
+    """
+    Run fn over a table in primary-key-ordered chunks, committing after each.
+
+    Must be called inside an app context. Progress is checkpointed under
+    .constrictor/backfills/<name>.json after every chunk, so a backfill
+    that is interrupted (or fails) resumes after the last committed chunk
+    when it runs again, and one that finished is skipped. Checkpoints are
+    tied to the database URL, so a different database starts from scratch.
+
+    Args:
+        name: Unique name of this backfill (used for its checkpoint)
+        model: Model class or Table with a single-column primary key
+        fn: Called with the (inclusive) lowest and highest primary key of
+            each chunk; does the work for rows in that range on db.session
+            (re-applying `where` if one is given) and may return the number
+            of rows it changed
+        batch_size: Rows per chunk
+        where: Optional filter on which rows are scanned
+        sleep: Seconds to pause between chunks
+        lag: Optional callable returning the current replication lag in
+            seconds; chunks are held back while it exceeds max_lag
+        max_lag: Replication lag (seconds) allowed before throttling
+        progress: Called with the running totals at most every
+            report_every seconds and once at the end (None to disable)
+        report_every: Minimum seconds between progress reports
+        restart: Ignore any saved checkpoint and start from the beginning
+
+    Returns:
+        Final totals for the backfill
+
+    Raises:
+        ValueError: If the table doesn't have a single-column primary key,
+            or its type (e.g. a binary key) can't be checkpointed
+    """
+    table = getattr(model, "__table__", model)
+    pk_columns = list(table.primary_key.columns)
+    if len(pk_columns) != 1:
+        raise ValueError(f"backfill() needs a single-column primary key; '{table.name}' has {len(pk_columns)}")
+    pk = pk_columns[0]
+    decode_pk = _pk_decoder(pk)
+
+    checkpoint = _checkpoint_path(name)
+    state = None if restart else _load_checkpoint(checkpoint)
+    if state and state["last_pk"] is not None:
+        state["last_pk"] = decode_pk(state["last_pk"])
+    if state and state["completed"]:
+        result = BackfillProgress(name, state["processed"], state["processed"], state["last_pk"])
+        result.changed = state.get("changed", 0)
+        result.completed = True
+        logger.info(f"Backfill '{name}' already completed, skipping")
+        return result
+
+    last_pk = state["last_pk"] if state else None
+    remaining = select(func.count()).select_from(table)
+    if where is not None:
+        remaining = remaining.where(where)
+    if last_pk is not None:
+        remaining = remaining.where(pk > last_pk)
+    processed = state["processed"] if state else 0
+    result = BackfillProgress(name, processed + db.session.execute(remaining).scalar(), processed, last_pk)
+    result.changed = state.get("changed", 0) if state else 0
+    if state:
+        logger.info(f"Resuming backfill '{name}' after key {last_pk}")
+
+    last_report = time.monotonic()
+    while True:
+        chunk = select(pk).order_by(pk).limit(batch_size)
+        if where is not None:
+            chunk = chunk.where(where)
+        if result.last_pk is not None:
+            chunk = chunk.where(pk > result.last_pk)
+        keys = db.session.execute(chunk).scalars().all()
+        if not keys:
+            break
+
+        try:
+            changed = fn(keys[0], keys[-1])
+            db.session.commit()
+        except BaseException:
+            db.session.rollback()
+            raise
+
+        result.processed += len(keys)
+        result.changed += changed if isinstance(changed, int) else len(keys)
+        result.last_pk = keys[-1]
+        result.batches += 1
+        _save_checkpoint(checkpoint, result)
+
+        if progress and time.monotonic() - last_report >= report_every:
+            progress(result)
+            last_report = time.monotonic()
+
+        if lag is not None:
+            current_lag = lag()
+            while current_lag > max_lag:
+                logger.info(f"Backfill '{name}' waiting for replication lag ({current_lag:.1f}s)")
+                time.sleep(min(current_lag, 5.0))
+                current_lag = lag()
+        if sleep:
+            time.sleep(sleep)
+
+    result.completed = True
+    _save_checkpoint(checkpoint, result)
+    if progress:
+        progress(result)
+    return result
@@ -11,21 +11,48 @@ import logging
 from importlib import import_module
 from typing import Optional
 
+from .assets import init_assets
+from .compression import DEFAULT_MIN_SIZE, GzipMiddleware
+from .metrics import init_metrics
+from .querystats import init_query_stats
+from .serialization import init_json
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-def load(app) -> None:
+def load(app, compress: Optional[bool] = None) -> None:
     """
     Load all blueprints from the modules directory and register them with the app.
+
+    When enabled, also installs the fast JSON provider (see
+    constrictor.serialization), serves module static files under /assets/
+    (see constrictor.assets), counts each request's SQL statements (see
+    constrictor.querystats), serves Prometheus metrics (see
+    constrictor.metrics) and gzips responses (see constrictor.compression).
     
     Args:
         app: Flask application instance
+        compress: Gzip compressible responses; defaults to the
+            CONSTRICTOR_COMPRESS config value (off)
         
     Raises:
         FileNotFoundError: If modules directory doesn't exist
         ImportError: If there are issues importing module routes
     """
+    init_json(app)
+    init_query_stats(app)
+    init_metrics(app)
+
+    if app.config.get("CONSTRICTOR_ASSETS", False) and "constrictor_assets" not in app.blueprints:
+        init_assets(app)
+
+    if compress is None:
+        compress = app.config.get("CONSTRICTOR_COMPRESS", False)
+    if compress and not isinstance(app.wsgi_app, GzipMiddleware):
+        app.wsgi_app = GzipMiddleware(
+            app.wsgi_app, min_size=app.config.get("CONSTRICTOR_COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE))
+
     root_path = app.root_path
     modules_dir = os.path.join(root_path, "modules")
     
@@ -0,0 +1,230 @@
+"""
+Response caching for read-heavy views.
+
+    @blueprint.route('/article/api/')
+    @model_access_required('article', 'read')
+    @cached(ttl=60)
+    def api():
+        ...
+
+Put @cached below the auth decorators, so access is still checked on every
+request and only the view's own work is skipped. Responses are cached per
+URL (path and query string) and, with vary_on_roles (the default), per
+effective role set of the caller - the roles they hold plus every role those
+imply - so a response rendered for one set of permissions is never served
+to a caller with another. Anonymous callers share one entry.
+
+Only successful (200) GET/HEAD responses that aren't streamed and don't set
+cookies are stored. The store is picked per app from config:
+
+    CONSTRICTOR_CACHE_STORE = "memory"   # default: per-process LRU with TTL
+    CONSTRICTOR_CACHE_STORE = "file"     # shared by every worker process
+    CONSTRICTOR_CACHE_DIR = "/dev/shm/myapp-cache"   # tmpfs = shared memory
+    CONSTRICTOR_CACHE_MAX_ENTRIES = 1024
+
+or a CacheStore instance for anything else (e.g. one backed by Redis).
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Optional
+
+from flask import current_app, g, make_response, request
+from flask_login import current_user
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class CacheStore:
+    """Interface for cache backends. Values are any picklable object."""
+
+    def get(self, key: str) -> Optional[Any]:
+        """The value stored under key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryStore(CacheStore):
+    """In-process LRU with per-entry expiry. Thread-safe; not shared
+    between worker processes."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileStore(CacheStore):
+    """One pickle file per entry in a directory, shared by every process
+    that points at it. On a tmpfs such as /dev/shm this is a shared-memory
+    cache. Writes are atomic (write to a temporary file, then rename), so
+    readers never see a partial entry."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (hashlib.sha256(key.encode()).hexdigest() + ".cache")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((time.time() + ttl, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for path in self.directory.glob("*.cache"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def get_store(app=None) -> CacheStore:
+    """The cache store for an app (default: the current one), created from
+    its config on first use."""
+    app = app or current_app._get_current_object()
+    store = app.extensions.get("constrictor_cache")
+    if store is None:
+        configured = app.config.get("CONSTRICTOR_CACHE_STORE", "memory")
+        if isinstance(configured, CacheStore):
+            store = configured
+        elif configured == "memory":
+            store = MemoryStore(app.config.get("CONSTRICTOR_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        elif configured == "file":
+            directory = app.config.get("CONSTRICTOR_CACHE_DIR") or os.path.join(app.instance_path, "cache")
+            store = FileStore(directory)
+        else:
+            raise ValueError(f"Unknown CONSTRICTOR_CACHE_STORE: {configured!r}")
+        app.extensions["constrictor_cache"] = store
+    return store
+
+
+def _role_key() -> str:
+    if not hasattr(current_app, "login_manager") or not current_user.is_authenticated:
+        return "anonymous"
+    return ",".join(sorted(current_user.role_names())) or "authenticated"
+
+
+def cache_key(vary_on_roles: bool = True) -> str:
+    """The cache key for the current request.
+
+    Under @conditional(validator), the key includes the resource's current
+    version, so a write makes the next request miss instead of serving the
+    old body under the new ETag.
+    """
+    parts = [request.endpoint or "", request.path, request.query_string.decode("latin-1")]
+    if vary_on_roles:
+        parts.append(_role_key())
+    version = g.get("constrictor_resource_version")
+    if version is not None:
+        parts.append(version)
+        g.constrictor_cache_versioned = True
+    return "view:" + "|".join(parts)
+
+
+def cached(ttl: float = 60, vary_on_roles: bool = True):
+    """
+    Cache a view's successful GET/HEAD responses for ttl seconds.
+
+    Args:
+        ttl: Seconds a response stays fresh
+        vary_on_roles: Keep separate entries per effective role set of the
+            caller; turn off only for responses that don't depend on who
+            is asking
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            store = get_store()
+            key = cache_key(vary_on_roles)
+            hit = store.get(key)
+            if hit is not None:
+                body, status, headers = hit
+                response = current_app.response_class(body, status=status, headers=headers)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and not response.is_streamed
+                    and "Set-Cookie" not in response.headers):
+                store.set(key, (response.get_data(), response.status_code, list(response.headers)), ttl)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapped
+    return decorator
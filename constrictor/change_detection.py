@@ -0,0 +1,135 @@
+"""
+Changed-module detection for Constrictor projects.
+
+Maps the files git reports as changed to the modules that own them (using
+the modules/<name>/ layout), then widens that set to every module that
+imports one of them, directly or transitively. `constrictor test --changed`
+uses this to run only the tests a change can actually affect.
+"""
+
+import ast
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+# Files outside modules/ that every module depends on: a change to any of
+# these means every module's tests have to run.
+GLOBAL_FILES = {
+    "app.py", "conftest.py", "requirements.txt", "pytest.ini",
+    "setup.cfg", "pyproject.toml", "tox.ini", ".env",
+}
+
+
+class ChangeDetectionError(Exception):
+    """Raised when git can't report what changed (not a repo, bad ref, ...)."""
+
+
+def _git_lines(args: List[str]) -> List[str]:
+    try:
+        result = subprocess.run(["git"] + args, capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise ChangeDetectionError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise ChangeDetectionError(e.stderr.strip() or f"git {' '.join(args)} failed")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def git_changed_files(since: Optional[str] = None) -> List[str]:
+    """
+    Files changed relative to a git ref, as paths relative to the current
+    directory (which need not be the repository root).
+
+    Includes committed changes since `since`, uncommitted changes (staged or
+    not) and untracked files.
+
+    Args:
+        since: Git ref to compare against (defaults to HEAD, i.e. only
+            uncommitted changes)
+
+    Returns:
+        Changed file paths
+    """
+    ref = since or "HEAD"
+    changed = _git_lines(["diff", "--name-only", "--relative", ref, "--"])
+    changed += _git_lines(["ls-files", "--others", "--exclude-standard"])
+    return sorted(set(changed))
+
+
+def owning_modules(files: Iterable[str]) -> Optional[Set[str]]:
+    """
+    Map changed files to the modules that own them: modules/<name>/... and
+    templates/<name>/... belong to module <name>.
+
+    Returns:
+        Module names, or None if a project-wide file changed and every
+        module has to be considered affected
+    """
+    modules = set()
+    for file in files:
+        parts = Path(file).parts
+        if len(parts) >= 3 and parts[0] in ("modules", "templates"):
+            # templates/<name>/... is the module's share of the
+            # centralized project-root templates directory
+            modules.add(parts[1])
+        elif Path(file).name in GLOBAL_FILES or (len(parts) == 1 and file.endswith(".py")):
+            return None
+    return modules
+
+
+def module_imports(modules_dir: Path, module_name: str) -> Set[str]:
+    """
+    Names of the other modules a module imports (`modules.<other>...` or
+    `from modules import <other>`), from a static parse of its .py files.
+    """
+    imported = set()
+    for path in (modules_dir / module_name).rglob("*.py"):
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+                if node.module == "modules":
+                    names = [f"modules.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                parts = name.split(".")
+                if len(parts) >= 2 and parts[0] == "modules":
+                    imported.add(parts[1])
+    imported.discard(module_name)
+    return imported
+
+
+def affected_modules(changed: Set[str], modules_dir: Path = Path("modules")) -> Set[str]:
+    """
+    Widen a set of changed modules to every module that depends on one of
+    them, directly or transitively.
+
+    Args:
+        changed: Names of modules whose own files changed
+        modules_dir: The project's modules/ directory
+
+    Returns:
+        The changed modules plus all their dependents (only modules that
+        still exist)
+    """
+    all_modules = sorted(p.name for p in modules_dir.iterdir() if p.is_dir()) if modules_dir.is_dir() else []
+    dependents: Dict[str, Set[str]] = {name: set() for name in all_modules}
+    for name in all_modules:
+        for dependency in module_imports(modules_dir, name):
+            dependents.setdefault(dependency, set()).add(name)
+
+    affected = set()
+    queue = deque(changed)
+    while queue:
+        name = queue.popleft()
+        if name in affected:
+            continue
+        affected.add(name)
+        queue.extend(dependents.get(name, ()))
+    return affected & set(all_modules)
@@ -1,12 +1,29 @@
 import click
+import logging
 import os
 import subprocess
 import sys
 import re
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Optional
-from .yaml_parser import generate_module_from_yaml
-from .swagger_generator import SwaggerGenerator
+from .yaml_parser import generate_module_from_yaml, generate_modules_from_yaml
+from .swagger_generator import SwaggerGenerator, WATCH_PATTERNS
+from .shard_runner import pytest_command, run_shards, stream_command
+from .hook_runner import HookError, load_dependencies, run_in_dependency_order
+from .migration_explain import DEFAULT_LARGE_TABLE_ROWS
+
+
+# Packages every generated project depends on, written to its
+# requirements.txt and installed into its .venv.
+PROJECT_REQUIREMENTS = [
+    "constrictor-framework>=1.0.0",
+    "Flask>=3.0.3",
+    "python-dotenv>=1.0.1",
+    "Flask-SQLAlchemy>=3.1.1",
+    "Flask-Migrate>=4.0.7",
+    "Flask-Login>=0.6.3",
+]
 
 
 @click.group()
@@ -41,7 +58,8 @@ def validate_name(name: str, name_type: str = "name") -> bool:
         return False
     
     # Reserved names
-    reserved_names = ['test', 'tests', 'modules', 'app', 'main', 'config', 'settings']
+    # 'many' is the `constrictor generate many ...` batch keyword
+    reserved_names = ['test', 'tests', 'modules', 'app', 'main', 'config', 'settings', 'many']
     if name.lower() in reserved_names:
         return False
     
@@ -99,11 +117,26 @@ def project_env() -> dict:
 
 @main.command()
 @click.argument('project_name')
-def new(project_name):
+@click.option('--no-venv', is_flag=True,
+              help="Don't create a .venv or install packages (use the current environment)")
+@click.option('--venv-from', type=click.Path(exists=True, file_okay=False), default=None,
+              help='Reuse an existing virtual environment instead of creating one')
+@click.option('--copy-venv', is_flag=True,
+              help='With --venv-from: copy the environment instead of symlinking it')
+def new(project_name, no_venv, venv_from, copy_venv):
     """Create a new project.
 
     This command initializes a new Flask project with the specified name. It sets up the basic directory structure and provides an environment for module generation.
+
+    By default a fresh .venv is created and the project's requirements are
+    installed from a shared wheel cache (see CONSTRICTOR_WHEEL_CACHE), which
+    only needs the network the first time. Use --no-venv to skip the
+    environment entirely, or --venv-from to link (or --copy-venv) an existing one.
     """
+    if no_venv and venv_from:
+        click.echo("Error: --no-venv and --venv-from can't be used together.")
+        raise click.Abort()
+
     # Validate project name
     if not validate_name(project_name, "project"):
         click.echo(f"Error: Invalid project name '{project_name}'. Project names must:")
@@ -209,8 +242,8 @@ wheels/
 .installed.cfg
 *.egg
 
-# Virtual Environment
-.venv/
+# Virtual Environment (no trailing slash: also matches a --venv-from symlink)
+.venv
 venv/
 ENV/
 env/
@@ -219,6 +252,12 @@ env/
 instance/
 .webassets-cache
 
+# Constrictor local caches (e.g. recorded test shard durations)
+.constrictor/
+
+# Built assets (constrictor assets build)
+static/assets/
+
 # Environment variables
 .env
 
@@ -237,38 +276,15 @@ Thumbs.db
             f.write(gitignore_content)
         
         # Create requirements.txt
-        requirements_content = '''constrictor-framework>=1.0.0
-Flask>=3.0.3
-python-dotenv>=1.0.1
-Flask-SQLAlchemy>=3.1.1
-Flask-Migrate>=4.0.7
-Flask-Login>=0.6.3
-'''
+        requirements_content = "\n".join(PROJECT_REQUIREMENTS) + "\n"
         
         with open(project_path / "requirements.txt", 'w') as f:
             f.write(requirements_content)
         
-        # Create virtual environment
-        click.echo("Creating virtual environment...")
-        try:
-            result = run_command([sys.executable, "-m", "venv", ".venv"], cwd=project_name)
-            
-            # Install Flask
-            click.echo("Installing Flask...")
-            pip_path = project_path / ".venv" / "bin" / "pip"
-            if os.name == 'nt':  # Windows
-                pip_path = project_path / ".venv" / "Scripts" / "pip.exe"
-            
-            if pip_path.exists():
-                run_command([str(pip_path), "install", "constrictor-framework>=1.0.0", "Flask>=3.0.3",
-                             "python-dotenv>=1.0.1", "Flask-SQLAlchemy>=3.1.1", "Flask-Migrate>=4.0.7",
-                             "Flask-Login>=0.6.3"],
-                            cwd=project_name)
-            else:
-                click.echo("Warning: Virtual environment creation failed, skipping package installation")
-        except Exception as e:
-            click.echo(f"Warning: Could not create virtual environment: {e}")
-            click.echo("You can create it manually later with: python -m venv .venv")
+        if venv_from:
+            _link_venv(Path(venv_from), project_path / ".venv", copy_venv)
+        elif not no_venv:
+            _create_venv(project_path)
         
         # Initialize git repository
         try:
@@ -286,7 +302,8 @@ Flask-Login>=0.6.3
         click.echo(f"Project '{project_name}' created successfully!")
         click.echo(f"To get started:")
         click.echo(f"  cd {project_name}")
-        click.echo(f"  source .venv/bin/activate  # On Windows: .venv\\Scripts\\activate")
+        if not no_venv:
+            click.echo(f"  source .venv/bin/activate  # On Windows: .venv\\Scripts\\activate")
         click.echo(f"  constrictor run")
         
     except Exception as e:
@@ -298,11 +315,122 @@ Flask-Login>=0.6.3
         raise click.Abort()
 
 
+def _venv_executable(venv_path: Path, name: str) -> Path:
+    """Path of an executable (python, pip) inside a virtual environment."""
+    if os.name == 'nt':  # Windows
+        return venv_path / "Scripts" / f"{name}.exe"
+    return venv_path / "bin" / name
+
+
+def _wheel_cache_dir(requirements: List[str]) -> Path:
+    """
+    Content-addressed wheel cache directory for a set of requirements.
+
+    Keyed by a hash of the requirement specs and the interpreter version, so
+    every project created with the same requirements on the same Python
+    shares one set of wheels. Defaults to ~/.cache/constrictor/wheels,
+    overridable with CONSTRICTOR_WHEEL_CACHE.
+    """
+    import hashlib
+    root = os.environ.get('CONSTRICTOR_WHEEL_CACHE') or Path.home() / '.cache' / 'constrictor' / 'wheels'
+    key = "\n".join(sorted(requirements) + [f"py{sys.version_info[0]}.{sys.version_info[1]}"])
+    return Path(root) / hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+def _populate_wheel_cache(requirements: List[str], cache_dir: Path) -> None:
+    """
+    Build wheels for requirements (and their dependencies) into cache_dir,
+    unless a complete cache for this exact requirement set already exists.
+    Uses the pip of the Python running constrictor.
+
+    Wheels are built into a temporary sibling directory and renamed into
+    place, so an interrupted or failed build never leaves a partial cache
+    that a later offline install would trust.
+    """
+    if (cache_dir / '.complete').exists():
+        return
+
+    import shutil
+    import tempfile
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=cache_dir.parent, prefix=f".{cache_dir.name}."))
+    try:
+        click.echo("Building wheel cache (first run only, needs network)...")
+        run_command([sys.executable, "-m", "pip", "wheel", "--wheel-dir", str(staging)] + requirements)
+        (staging / '.complete').touch()
+        try:
+            os.rename(staging, cache_dir)
+        except OSError:
+            # Another process finished the same cache first - use theirs.
+            pass
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging)
+
+
+def _create_venv(project_path: Path) -> None:
+    """
+    Create project_path/.venv and install PROJECT_REQUIREMENTS into it from
+    the shared wheel cache (offline once the cache exists).
+
+    The venv is created --without-pip and pip itself is installed from the
+    cached pip wheel (run directly, as pip supports) in the same install as
+    everything else - ensurepip alone costs more than the whole install.
+    Failures only warn - the project itself is still usable.
+    """
+    click.echo("Creating virtual environment...")
+    try:
+        run_command([sys.executable, "-m", "venv", "--without-pip", ".venv"], cwd=str(project_path))
+
+        # Absolute, since commands below don't run from the project directory
+        python_path = _venv_executable((project_path / ".venv").resolve(), "python")
+        if not python_path.exists():
+            click.echo("Warning: Virtual environment creation failed, skipping package installation")
+            return
+
+        requirements = ["pip"] + PROJECT_REQUIREMENTS
+        cache_dir = _wheel_cache_dir(requirements)
+        _populate_wheel_cache(requirements, cache_dir)
+        pip_wheel = next(cache_dir.glob("pip-*.whl"))
+
+        click.echo("Installing packages from wheel cache...")
+        run_command([str(python_path), str(pip_wheel / "pip"), "install", "--no-compile",
+                     "--no-index", "--find-links", str(cache_dir)] + requirements)
+    except Exception as e:
+        click.echo(f"Warning: Could not set up virtual environment: {e}")
+        click.echo("You can create it manually later with: python -m venv .venv && .venv/bin/pip install -r requirements.txt")
+
+
+def _link_venv(source: Path, venv_path: Path, copy: bool) -> None:
+    """
+    Reuse an existing virtual environment for a new project, by symlinking
+    it (instant, shared) or copying it (independent, but slower).
+    """
+    if not _venv_executable(source, "python").exists():
+        click.echo(f"Warning: '{source}' doesn't look like a virtual environment (no python executable found)")
+
+    if copy:
+        import shutil
+        click.echo(f"Copying virtual environment from {source}...")
+        # symlinks=True keeps the environment's python -> base interpreter link
+        shutil.copytree(source, venv_path, symlinks=True)
+    else:
+        click.echo(f"Linking virtual environment from {source}...")
+        venv_path.symlink_to(source.resolve(), target_is_directory=True)
+
+
 @main.command()
 @click.argument('module_name')
+@click.argument('more_names', nargs=-1)
 @click.option('--template', '-t', default='yaml', 
               help='Template to use for module generation (yaml or path to custom template)')
-def generate(module_name, template):
+@click.option('--from-file', 'names_file', type=click.File('r'), default=None,
+              help="With 'many': read module names from a file, one per line")
+@click.option('--jobs', '-j', type=int, default=None,
+              help="With 'many': number of modules rendered in parallel")
+@click.option('--update', '-u', is_flag=True,
+              help='Regenerate existing modules in place, keeping files edited since they were generated')
+def generate(module_name, more_names, template, names_file, jobs, update):
     """Generate a new module.
 
     This command creates a new module inside the 'modules' directory of your Flask project. 
@@ -310,7 +438,23 @@ def generate(module_name, template):
     
     By default uses YAML-based templates for maximum flexibility.
     You can specify a custom template file path if needed.
+
+    Use `constrictor generate many a b c` (and/or --from-file names.txt) to
+    generate several modules in one run: the template is loaded and compiled
+    once and the modules are written in parallel.
+
+    With --update, an existing module is refreshed from the template instead
+    of being deleted and recreated: files still exactly as generated are
+    updated, files you've edited are left alone, and missing ones are added.
     """
+    if module_name == 'many':
+        _generate_many(list(more_names), names_file, template, jobs, update)
+        return
+
+    if more_names or names_file:
+        click.echo("Error: To generate several modules at once use 'constrictor generate many <name> ...'.")
+        raise click.Abort()
+
     # Validate module name
     if not validate_name(module_name, "module"):
         click.echo(f"Error: Invalid module name '{module_name}'. Module names must:")
@@ -328,7 +472,7 @@ def generate(module_name, template):
     base_path = Path('modules') / module_name
     
     # Check if module already exists
-    if base_path.exists():
+    if base_path.exists() and not update:
         click.echo(f"Error: Module '{module_name}' already exists.")
         if not click.confirm("Do you want to overwrite it?"):
             raise click.Abort()
@@ -338,43 +482,167 @@ def generate(module_name, template):
     
     # Use YAML template generation by default
     try:
-        generate_module_from_yaml(module_name, Path('.'), template)
-        click.echo(f"Module '{module_name}' generated")
+        manifest = generate_module_from_yaml(module_name, Path('.'), template, update=update)
+        click.echo(f"Module '{module_name}' {'updated' if update else 'generated'} ({manifest.summary()})")
+        _echo_skipped(manifest)
         return
     except Exception as e:
         click.echo(f"Error generating module: {e}")
         raise click.Abort()
 
 
+def _echo_skipped(manifest) -> None:
+    """List files --update left alone because they were edited locally."""
+    for path in manifest.skipped:
+        click.echo(f"  Skipped {path} (modified since it was generated)")
+
+
+def _generate_many(names: List[str], names_file, template: str, jobs: Optional[int],
+                   update: bool = False) -> None:
+    """
+    Batch implementation of `constrictor generate many`.
+
+    Args:
+        names: Module names given on the command line
+        names_file: Optional open file with one module name per line
+            (blank lines and '#' comments are ignored)
+        template: Template to use for module generation
+        jobs: Thread pool size, or None for the default
+        update: Regenerate existing modules in place rather than replacing them
+    """
+    if names_file is not None:
+        for line in names_file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                names.append(line)
+
+    # Keep the first occurrence of each name, in order
+    names = list(dict.fromkeys(names))
+    if not names:
+        click.echo("Error: No module names given. Use 'constrictor generate many <name> ...' or --from-file.")
+        raise click.Abort()
+
+    invalid = [name for name in names if not validate_name(name, "module")]
+    if invalid:
+        click.echo(f"Error: Invalid module name(s): {', '.join(invalid)}")
+        raise click.Abort()
+
+    if not os.path.exists('modules'):
+        click.echo("Error: Not in a constrictor project. Run this command from the project root directory.")
+        raise click.Abort()
+
+    existing = [name for name in names if (Path('modules') / name).exists()]
+    if existing and not update:
+        click.echo(f"Error: {len(existing)} module(s) already exist: {', '.join(existing)}")
+        if not click.confirm("Do you want to overwrite them?"):
+            raise click.Abort()
+        import shutil
+        for name in existing:
+            shutil.rmtree(Path('modules') / name)
+
+    try:
+        manifests, failures = generate_modules_from_yaml(names, Path('.'), template,
+                                                         max_workers=jobs, update=update)
+    except Exception as e:
+        click.echo(f"Error generating modules: {e}")
+        raise click.Abort()
+
+    if update:
+        for name in names:
+            manifest = manifests.get(name)
+            if manifest is not None and (manifest.changed or manifest.skipped):
+                click.echo(f"Module '{name}' updated ({manifest.summary()})")
+                _echo_skipped(manifest)
+    for name, error in failures.items():
+        click.echo(f"Error generating module '{name}': {error}")
+    click.echo(f"{len(names) - len(failures)} of {len(names)} module(s) generated")
+    if failures:
+        raise click.Abort()
+
+
 # Add alias for generate command
 @main.command(name='g')
 @click.argument('module_name')
+@click.argument('more_names', nargs=-1)
 @click.option('--template', '-t', default='yaml',
               help='Template to use for module generation (yaml or path to custom template)')
+@click.option('--from-file', 'names_file', type=click.File('r'), default=None,
+              help="With 'many': read module names from a file, one per line")
+@click.option('--jobs', '-j', type=int, default=None,
+              help="With 'many': number of modules rendered in parallel")
+@click.option('--update', '-u', is_flag=True,
+              help='Regenerate existing modules in place, keeping files edited since they were generated')
 @click.pass_context
-def generate_alias(ctx, module_name, template):
+def generate_alias(ctx, module_name, more_names, template, names_file, jobs, update):
     """Generate a new module (alias for 'generate')."""
-    ctx.invoke(generate, module_name=module_name, template=template)
+    ctx.invoke(generate, module_name=module_name, more_names=more_names, template=template,
+               names_file=names_file, jobs=jobs, update=update)
 
 
 @main.command()
 @click.argument('modules', nargs=-1)
-def test(modules):
+@click.option('--jobs', '-j', type=int, default=None,
+              help='Run each module\'s tests as a separate shard, N at a time')
+@click.option('--changed', is_flag=True,
+              help='Only test modules affected by uncommitted changes (or changes since --since)')
+@click.option('--since', default=None, metavar='GIT_REF',
+              help='With --changed: also include changes committed since GIT_REF (e.g. origin/main)')
+def test(modules, jobs, changed, since):
     """Run tests.
 
     This command runs tests for the entire application or specific modules. 
     Use it without arguments to test all modules or specify module names to test specific ones.
+
+    With --jobs N, each module's tests/ directory runs in its own pytest
+    process, up to N at once, slowest modules (as recorded by previous runs)
+    first. Only modules/*/tests are sharded. Output is streamed as it's produced.
+
+    With --changed, only modules owning a changed file, plus every module
+    that imports one of them, are tested. A change to a project-wide file
+    (app.py, requirements.txt, conftest.py, ...) selects every module.
     """
     # Check if we're in a constrictor project
     if not os.path.exists('app.py') or not os.path.isdir('modules'):
         click.echo("Error: Not in a constrictor project. Run this command from the project root directory.")
         raise click.Abort()
+
+    if jobs is not None and jobs < 1:
+        click.echo("Error: --jobs must be at least 1.")
+        raise click.Abort()
+
+    if since and not changed:
+        click.echo("Error: --since requires --changed.")
+        raise click.Abort()
+
+    if changed:
+        if modules:
+            click.echo("Error: Pass either module names or --changed, not both.")
+            raise click.Abort()
+        modules = _changed_test_modules(since)
+        if modules is None:
+            click.echo("Project-wide files changed; testing every module.")
+            modules = ()
+        elif not modules:
+            click.echo("No modules with tests are affected by the changes.")
+            return
     
     try:
         if not modules:
-            # Run all tests
-            click.echo("Running all tests...")
-            result = run_command([sys.executable, "-m", "pytest", "-v"], check=False)
+            if jobs is None:
+                # Run all tests
+                click.echo("Running all tests...")
+                returncode = stream_command(pytest_command(), click.echo)
+            else:
+                shards = [
+                    (name, str(Path('modules') / name / 'tests'))
+                    for name in _discover_modules()
+                    if (Path('modules') / name / 'tests').is_dir()
+                ]
+                if not shards:
+                    click.echo("No modules with tests found.")
+                    return
+                click.echo(f"Running tests for {len(shards)} module(s) with {jobs} job(s)...")
+                returncode = run_shards(shards, jobs, click.echo)
         else:
             # Validate module names and run specific tests
             valid_modules = []
@@ -388,32 +656,56 @@ def test(modules):
                     click.echo(f"Warning: No tests found for module '{module_name}'")
                     continue
                 
-                valid_modules.append(str(module_test_path))
+                valid_modules.append((module_name, str(module_test_path)))
             
             if not valid_modules:
                 click.echo("No valid modules with tests found.")
                 return
             
             click.echo(f"Running tests for modules: {', '.join(modules)}")
-            result = run_command([sys.executable, "-m", "pytest", "-v"] + valid_modules, check=False)
-
-        if result.stdout:
-            click.echo(result.stdout)
-        if result.stderr:
-            click.echo(result.stderr)
+            if jobs is None:
+                returncode = stream_command(pytest_command([path for _, path in valid_modules]), click.echo)
+            else:
+                returncode = run_shards(valid_modules, jobs, click.echo)
 
-        if result.returncode == 0:
+        if returncode == 0:
             click.echo("All tests passed!")
-        elif result.returncode == 1:
+        elif returncode == 1:
             click.echo("Some tests failed - this is normal for template tests without proper setup.")
         else:
-            click.echo("Tests completed with exit code: " + str(result.returncode))
+            click.echo("Tests completed with exit code: " + str(returncode))
             
     except Exception as e:
         click.echo(f"Error running tests: {e}")
         raise click.Abort()
 
 
+def _changed_test_modules(since: Optional[str]) -> Optional[tuple]:
+    """
+    Modules with tests that are affected by changes since `since` (or by
+    uncommitted changes), or None if every module is affected.
+    """
+    from .change_detection import ChangeDetectionError, affected_modules, git_changed_files, owning_modules
+
+    try:
+        files = git_changed_files(since)
+    except ChangeDetectionError as e:
+        click.echo(f"Error: Could not determine changed files: {e}")
+        raise click.Abort()
+
+    owners = owning_modules(files)
+    if owners is None:
+        return None
+
+    affected = affected_modules(owners)
+    with_tests = tuple(sorted(name for name in affected if (Path('modules') / name / 'tests').is_dir()))
+    if with_tests:
+        dependents = sorted(affected - owners)
+        suffix = f" (including dependents: {', '.join(dependents)})" if dependents else ""
+        click.echo(f"Changed modules: {', '.join(sorted(owners))}{suffix}")
+    return with_tests
+
+
 @main.command()
 @click.option('--host', default='127.0.0.1', help='Host to run the application on')
 @click.option('--port', default=5000, help='Port to run the application on')
@@ -482,6 +774,10 @@ def _discover_modules() -> List[str]:
     )
 
 
+# Loaded project apps, keyed by project directory: (app.py (mtime_ns, size), app)
+_project_apps = {}
+
+
 def _load_project_app():
     """
     Import the current project's app.py and return its Flask `app` instance.
@@ -493,10 +789,22 @@ def _load_project_app():
     is correct even when called for multiple different projects within the
     same process - a plain module-name import would cache (or, on reload,
     re-execute from) whichever project's app.py was loaded first.
+
+    The app is cached per project directory for the life of the process,
+    so a command that needs it several times (e.g. `db upgrade`: hooks,
+    migration, access.csv seeding) only executes app.py once. Editing
+    app.py invalidates the cache.
     """
     import importlib.util
-    sys.path.insert(0, os.getcwd())
-    app_path = os.path.join(os.getcwd(), 'app.py')
+    project_path = os.getcwd()
+    app_path = os.path.join(project_path, 'app.py')
+    stat = os.stat(app_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _project_apps.get(project_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    sys.path.insert(0, project_path)
     module_name = '_constrictor_project_app'
     spec = importlib.util.spec_from_file_location(module_name, app_path)
     module = importlib.util.module_from_spec(spec)
@@ -505,40 +813,58 @@ def _load_project_app():
     # can't find it and silently resolves relative sqlite paths incorrectly.
     sys.modules[module_name] = module
     spec.loader.exec_module(module)
+    _project_apps[project_path] = (version, module.app)
     return module.app
 
 
-def _run_migration_hooks(hook_name: str, modules: List[str]) -> None:
+def _run_migration_hooks(hook_name: str, modules: List[str], jobs: int = 1) -> None:
     """
     Run modules/<name>/<hook_name>.py's run(app) for every module that defines
     one. Hooks are entirely optional - modules without a matching file are
     skipped silently.
 
+    Hooks run in dependency order (see hook_runner: each module may list the
+    modules it depends on in module.yml), up to `jobs` at once, each in its
+    own app context - and therefore with its own db.session. The first
+    failure stops the run once hooks already in progress have finished.
+
     Args:
         hook_name: 'premigrate' or 'postmigrate'
         modules: module names to check, in listing order
+        jobs: Maximum number of hooks running at once
     """
-    hook_modules = [
+    hook_modules = {
         name for name in modules
         if os.path.exists(os.path.join('modules', name, f'{hook_name}.py'))
-    ]
+    }
     if not hook_modules:
         return
 
     import importlib
+    import time
     app = _load_project_app()
 
-    for module_name in hook_modules:
+    def run_hook(module_name):
+        if module_name not in hook_modules:
+            return
         click.echo(f"Running {hook_name} hook for module '{module_name}'...")
-        try:
-            hook_module = importlib.import_module(f'modules.{module_name}.{hook_name}')
-            if hasattr(hook_module, 'run'):
-                hook_module.run(app)
-            else:
-                click.echo(f"Warning: modules/{module_name}/{hook_name}.py has no run(app) function, skipping.")
-        except Exception as e:
-            click.echo(f"Error running {hook_name} hook for module '{module_name}': {e}")
-            raise click.Abort()
+        started = time.monotonic()
+        hook_module = importlib.import_module(f'modules.{module_name}.{hook_name}')
+        if not hasattr(hook_module, 'run'):
+            click.echo(f"Warning: modules/{module_name}/{hook_name}.py has no run(app) function, skipping.")
+            return
+        with app.app_context():
+            hook_module.run(app)
+        click.echo(f"Finished {hook_name} hook for module '{module_name}' in {time.monotonic() - started:.2f}s")
+
+    try:
+        run_in_dependency_order(load_dependencies(Path('modules'), modules), run_hook, jobs)
+    except HookError as e:
+        if e.module is None or e.__cause__ is None:
+            click.echo(f"Error: {e}")
+        else:
+            click.echo(f"Error running {hook_name} hook for module '{e.module}': {e}")
+        raise click.Abort()
 
 
 def _seed_access_csv(modules: List[str]) -> None:
@@ -565,16 +891,123 @@ def _seed_access_csv(modules: List[str]) -> None:
                 click.echo(f"Seeded {inserted} access grant(s) from '{module_name}/access.csv'")
 
 
-def _run_flask_db_command(args: List[str]) -> subprocess.CompletedProcess:
-    """Run `flask db <args>` for the current project and echo its output."""
-    env = project_env()
-    env['FLASK_APP'] = 'app.py'
-    result = run_command([sys.executable, "-m", "flask", "db"] + args, check=False, env=env)
-    if result.stdout:
-        click.echo(result.stdout)
-    if result.stderr:
-        click.echo(result.stderr)
-    return result
+@contextmanager
+def _preserve_loggers():
+    """
+    Restore every existing logger's enabled/disabled state after running
+    Alembic in-process: the project's env.py calls fileConfig(), whose
+    disable_existing_loggers=True would otherwise silence constrictor's and
+    the project's loggers for the rest of the command, postmigrate hooks
+    included.
+    """
+    loggers = [logging.root] + [
+        logger for logger in logging.root.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    disabled = {logger: logger.disabled for logger in loggers}
+    try:
+        yield
+    finally:
+        for logger, was_disabled in disabled.items():
+            logger.disabled = was_disabled
+
+
+def _run_migrate_command(app, name: str, **kwargs) -> None:
+    """
+    Run a Flask-Migrate command (init, migrate, upgrade, downgrade) in-process
+    against an already-loaded project app, instead of spawning
+    `python -m flask db`, which would import the whole project a second time.
+
+    Flask-Migrate's public command functions log errors and call
+    sys.exit(1); their undecorated originals raise instead, so failures are
+    reported the same way as every other CLI error.
+
+    Args:
+        app: The project's Flask app (with Flask-Migrate initialized)
+        name: Flask-Migrate command function name
+        **kwargs: Arguments for the command function
+    """
+    import flask_migrate
+    from alembic.util import CommandError
+
+    command = getattr(flask_migrate, name)
+    command = getattr(command, '__wrapped__', command)
+    try:
+        with app.app_context(), _preserve_loggers():
+            command(**kwargs)
+    except (CommandError, RuntimeError) as e:
+        click.echo(f"Error: {e}")
+        raise click.Abort()
+
+
+def _render_upgrade_sql(app, revision: str) -> str:
+    """
+    Render the upgrade to REVISION as SQL with Alembic's offline mode,
+    without connecting to or changing the database.
+
+    Args:
+        app: The project's Flask app (with Flask-Migrate initialized)
+        revision: Target revision, or a 'start:end' range
+
+    Returns:
+        The migration script's SQL
+    """
+    import io
+    from alembic import command
+    from alembic.util import CommandError
+
+    buffer = io.StringIO()
+    try:
+        with app.app_context(), _preserve_loggers():
+            config = app.extensions['migrate'].migrate.get_config()
+            config.output_buffer = buffer
+            command.upgrade(config, revision, sql=True)
+    except (CommandError, RuntimeError) as e:
+        click.echo(f"Error: {e}")
+        raise click.Abort()
+    return buffer.getvalue()
+
+
+def _explain_upgrade(app, revision: str, large_table_rows: int) -> None:
+    """
+    Print each statement of the pending upgrade with the row count of the
+    table it touches, flagging rewrites and scans of large tables.
+    """
+    from alembic.runtime.migration import MigrationContext
+    from constrictor import db
+    from .migration_explain import EXPENSIVE, explain_sql
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            heads = MigrationContext.configure(connection).get_current_heads()
+            if len(heads) > 1:
+                click.echo(f"Error: The database has multiple heads ({', '.join(heads)}); explain one branch at a time.")
+                raise click.Abort()
+            if ':' not in revision and heads:
+                revision = f"{heads[0]}:{revision}"
+            explained = explain_sql(_render_upgrade_sql(app, revision), connection)
+
+    if not explained:
+        click.echo("No pending migrations.")
+        return
+
+    large = 0
+    for statement in explained:
+        first_line = " ".join(statement.sql.split())
+        if len(first_line) > 100:
+            first_line = first_line[:97] + "..."
+        if statement.kind in EXPENSIVE:
+            rows = "new table" if statement.rows is None else f"~{statement.rows:,} rows"
+            flag = " [LARGE]" if statement.is_large(large_table_rows) else ""
+            large += bool(flag)
+            click.echo(f"  {statement.kind.upper():8} {statement.table} ({rows}){flag}: {first_line}")
+        else:
+            click.echo(f"  {(statement.kind or 'other').upper():8} {first_line}")
+
+    if large:
+        click.echo(f"{large} statement(s) rewrite or scan tables with {large_table_rows:,}+ rows - "
+                   f"schedule this migration for a maintenance window.")
+    else:
+        click.echo(f"No statements rewrite or scan tables with {large_table_rows:,}+ rows.")
 
 
 @main.group(name='db')
@@ -597,9 +1030,7 @@ def db_init():
         raise click.Abort()
 
     click.echo("Initializing migrations directory...")
-    result = _run_flask_db_command(['init'])
-    if result.returncode != 0:
-        raise click.Abort()
+    _run_migrate_command(_load_project_app(), 'init')
     click.echo("Migrations directory created. Run 'constrictor db migrate' to create your first revision.")
 
 
@@ -612,47 +1043,56 @@ def db_migrate(message):
         click.echo("Error: No migrations/ directory found. Run 'constrictor db init' first.")
         raise click.Abort()
 
-    args = ['migrate']
-    if message:
-        args += ['-m', message]
-
     click.echo("Generating migration revision...")
-    result = _run_flask_db_command(args)
-    if result.returncode != 0:
-        raise click.Abort()
+    _run_migrate_command(_load_project_app(), 'migrate', message=message)
 
 
 @db_group.command(name='upgrade')
 @click.argument('revision', default='head', required=False)
-def db_upgrade(revision):
+@click.option('--jobs', '-j', type=int, default=1,
+              help='Run up to N independent pre/post migration hooks at once')
+@click.option('--sql', 'sql', is_flag=True,
+              help="Print the migration's SQL instead of running it (offline; REVISION may be 'start:end')")
+@click.option('--explain', is_flag=True,
+              help='Estimate the cost of pending migrations against the database without running them')
+@click.option('--large-table-rows', type=int, default=DEFAULT_LARGE_TABLE_ROWS, show_default=True,
+              help='With --explain: row count from which a rewritten or scanned table is flagged')
+def db_upgrade(revision, jobs, sql, explain, large_table_rows):
     """Apply migrations up to REVISION (default: head).
 
     Runs each module's optional premigrate.py before, seeds auth_role/
     auth_model_access from each module's access.csv, then runs postmigrate.py.
+    With --sql or --explain nothing is applied and no hooks run.
     """
     _require_project()
     if not os.path.exists('migrations'):
         click.echo("Error: No migrations/ directory found. Run 'constrictor db init' first.")
         raise click.Abort()
 
+    if sql or explain:
+        app = _load_project_app()
+        if sql:
+            click.echo(_render_upgrade_sql(app, revision), nl=False)
+        if explain:
+            _explain_upgrade(app, revision, large_table_rows)
+        return
+
     modules = _discover_modules()
-    _run_migration_hooks('premigrate', modules)
+    _run_migration_hooks('premigrate', modules, jobs)
 
     click.echo(f"Upgrading database to '{revision}'...")
-    # '--' guards revisions that look like options (e.g. the '-1' default)
-    # from being misparsed as flags by Click's argument parser.
-    result = _run_flask_db_command(['upgrade', '--', revision])
-    if result.returncode != 0:
-        raise click.Abort()
+    _run_migrate_command(_load_project_app(), 'upgrade', revision=revision)
 
     _seed_access_csv(modules)
-    _run_migration_hooks('postmigrate', modules)
+    _run_migration_hooks('postmigrate', modules, jobs)
     click.echo("Database upgraded successfully!")
 
 
 @db_group.command(name='downgrade')
 @click.argument('revision', default='-1', required=False)
-def db_downgrade(revision):
+@click.option('--jobs', '-j', type=int, default=1,
+              help='Run up to N independent pre/post migration hooks at once')
+def db_downgrade(revision, jobs):
     """Revert migrations down to REVISION (default: one revision back).
 
     Runs each module's optional premigrate.py before and postmigrate.py after.
@@ -663,17 +1103,110 @@ def db_downgrade(revision):
         raise click.Abort()
 
     modules = _discover_modules()
-    _run_migration_hooks('premigrate', modules)
+    _run_migration_hooks('premigrate', modules, jobs)
 
     click.echo(f"Downgrading database to '{revision}'...")
-    result = _run_flask_db_command(['downgrade', '--', revision])
-    if result.returncode != 0:
-        raise click.Abort()
+    _run_migrate_command(_load_project_app(), 'downgrade', revision=revision)
 
-    _run_migration_hooks('postmigrate', modules)
+    _run_migration_hooks('postmigrate', modules, jobs)
     click.echo("Database downgraded successfully!")
 
 
+def _squash_scratch_error(dialect: str, scratch_url: Optional[str]) -> Optional[str]:
+    """Why the history can't be replayed on scratch_url, if it can't.
+
+    Replaying on another dialect would lose the project dialect's DDL
+    (server defaults, enums, partial indexes...) and fail on statements
+    SQLite can't run, so the scratch database must match the project's.
+    """
+    from sqlalchemy.engine import make_url
+
+    if scratch_url is None:
+        if dialect != 'sqlite':
+            return (f"The project database is {dialect}; pass --scratch-url with an empty "
+                    f"{dialect} database to replay the history on.")
+        return None
+    if make_url(scratch_url).get_backend_name() != dialect:
+        return f"--scratch-url must be a {dialect} database, like the project database."
+    return None
+
+
+@db_group.command(name='squash')
+@click.option('--up-to', 'up_to', default='heads', show_default=True,
+              help='Newest revision to fold into the baseline')
+@click.option('--scratch-url', default=None,
+              help='Disposable database to replay the history on, of the same kind as the project '
+                   'database (default for SQLite projects: a temporary SQLite file)')
+def db_squash(up_to, scratch_url):
+    """Replace the migration history up to a revision with one baseline.
+
+    The baseline keeps the revision id of --up-to, so databases already at
+    that revision or later, and revisions written after it, keep working.
+    The replaced revision files are moved to migrations/squashed/<id>/.
+    """
+    _require_project()
+    if not os.path.exists('migrations'):
+        click.echo("Error: No migrations/ directory found. Run 'constrictor db init' first.")
+        raise click.Abort()
+
+    import tempfile
+    from flask import Flask
+    from alembic.script import ScriptDirectory
+    from constrictor import db, migrate
+    from .migration_squash import (SquashError, check_schema_only, render_schema, revisions_to_squash,
+                                   verify_baseline, write_baseline)
+
+    app = _load_project_app()
+    with app.app_context():
+        script = ScriptDirectory.from_config(app.extensions['migrate'].migrate.get_config())
+        dialect = db.engine.dialect.name
+    error = _squash_scratch_error(dialect, scratch_url)
+    if error:
+        click.echo(f"Error: {error}")
+        raise click.Abort()
+    try:
+        squashed = revisions_to_squash(script, up_to)
+    except SquashError as e:
+        click.echo(f"Error: {e}")
+        raise click.Abort()
+    target = squashed[0].revision
+    if len(squashed) == 1:
+        click.echo(f"Nothing to squash: {target} is already the first revision.")
+        return
+    try:
+        check_schema_only(squashed)
+    except SquashError as e:
+        click.echo(f"Error: {e}")
+        raise click.Abort()
+
+    click.echo(f"Replaying {len(squashed)} revision(s) up to {target} on a scratch database...")
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        scratch_app = Flask('constrictor_squash', root_path=os.getcwd())
+        scratch_app.config['SQLALCHEMY_DATABASE_URI'] = (
+            scratch_url or f"sqlite:///{os.path.join(scratch_dir, 'scratch.db')}"
+        )
+        db.init_app(scratch_app)
+        migrate.init_app(scratch_app, db)
+        _run_migrate_command(scratch_app, 'upgrade', revision=target)
+        with scratch_app.app_context():
+            try:
+                with db.engine.begin() as connection:
+                    upgrades, downgrades, imports = render_schema(connection)
+                    verify_baseline(connection, upgrades, imports)
+            except SquashError as e:
+                click.echo(f"Error: {e}")
+                click.echo("Nothing was written.")
+                raise click.Abort()
+            finally:
+                db.engine.dispose()
+
+    path = write_baseline(script, squashed, upgrades, downgrades, imports)
+    click.echo(f"Squashed {len(squashed)} revision(s) into {path}")
+    click.echo(f"Replaced revision files were moved to migrations/squashed/{target}/.")
+    click.echo(f"Databases at {target} or later are unaffected. Upgrade any database still on an "
+               f"older revision to {target} before deploying the squashed history.")
+
+
 @main.group(name='auth')
 def auth_group():
     """User and role management commands.
@@ -764,6 +1297,37 @@ def auth_create_user(email, roles, password):
         raise click.Abort()
 
 
+@main.group(name='assets')
+def assets_group():
+    """Static asset commands."""
+    pass
+
+
+@assets_group.command(name='build')
+@click.option('--clean', is_flag=True, help='Remove files from previous builds first')
+def assets_build(clean):
+    """Fingerprint and gzip module static files into static/assets/.
+
+    Built files are served from /assets/ with a one-year immutable
+    Cache-Control; use asset_url('<module>/<path>') in templates to link to
+    the current version. Run this as part of each deploy.
+    """
+    _require_project()
+
+    from constrictor.assets import ASSETS_DIR, build_assets
+
+    try:
+        built = build_assets(Path.cwd(), clean=clean)
+    except OSError as e:
+        click.echo(f"Error building assets: {e}")
+        raise click.Abort()
+
+    for asset in built:
+        suffix = " (+ .gz)" if asset.gzipped else ""
+        click.echo(f"  {asset.source} -> {asset.fingerprinted}{suffix}")
+    click.echo(f"Built {len(built)} asset(s) into {ASSETS_DIR.as_posix()}/")
+
+
 @main.group()
 def swagger():
     """Swagger documentation commands."""
@@ -779,7 +1343,11 @@ def swagger():
               help='Serve Swagger UI after generation')
 @click.option('--port', '-p', default=8080, 
               help='Port for Swagger UI server (default: 8080)')
-def build(output, format, serve, port):
+@click.option('--watch', '-w', is_flag=True,
+              help='Keep running and regenerate when routes or template YAMLs change')
+@click.option('--interval', default=1.0, show_default=True,
+              help='Seconds between file polls in --watch mode')
+def build(output, format, serve, port, watch, interval):
     """Build Swagger documentation from all modules.
     
     This command scans all modules in the modules directory and generates
@@ -789,6 +1357,7 @@ def build(output, format, serve, port):
         constrictor swagger build
         constrictor swagger build --output api-docs.yaml --format yaml
         constrictor swagger build --serve --port 8080
+        constrictor swagger build --watch --serve
     """
     # Check if we're in a constrictor project
     if not os.path.exists('modules'):
@@ -826,8 +1395,16 @@ def build(output, format, serve, port):
         elif paths_found == 0:
             click.echo("⚠️  No API routes found in modules. Check that your routes.py files have @blueprint.route decorators.")
         
-        # Serve Swagger UI if requested
-        if serve:
+        if watch:
+            if serve:
+                # The server re-reads the spec file on every request, so it
+                # picks up each rewrite without being restarted.
+                import threading
+                click.echo(f"🌐 Starting Swagger UI server on port {port}...")
+                threading.Thread(target=_serve_swagger_ui, args=(output_path, port), daemon=True).start()
+            _watch_swagger(generator, project_path, output_path, format, interval)
+        elif serve:
+            # Serve Swagger UI if requested
             click.echo(f"🌐 Starting Swagger UI server on port {port}...")
             _serve_swagger_ui(output_path, port)
             
@@ -836,6 +1413,55 @@ def build(output, format, serve, port):
         raise click.Abort()
 
 
+def _changed_modules(project_path: Path, changed: set) -> set:
+    """Map changed file paths under modules/<name>/ to their module names."""
+    modules_path = project_path / 'modules'
+    names = set()
+    for path in changed:
+        try:
+            relative = path.relative_to(modules_path)
+        except ValueError:
+            continue
+        names.add(relative.parts[0])
+    return names
+
+
+def _watch_swagger(generator: SwaggerGenerator, project_path: Path, output_path: Path,
+                   format: str, interval: float) -> None:
+    """
+    Poll the project's routes and template YAMLs, re-processing only the
+    modules whose files changed and atomically rewriting the spec file.
+
+    Args:
+        generator: Generator holding the already-built spec
+        project_path: Path to the project root
+        output_path: Spec file to rewrite
+        format: Output format ('json' or 'yaml')
+        interval: Seconds between polls
+    """
+    from .watcher import PollingWatcher
+
+    def regenerate(changed):
+        modules = _changed_modules(project_path, changed)
+        if not modules:
+            return
+        try:
+            generator.refresh_modules(modules)
+            generator.save_to_file(output_path, format)
+        except Exception as e:
+            # Keep watching - the next save will usually fix it.
+            click.echo(f"❌ Error regenerating Swagger documentation: {e}")
+            return
+        click.echo(f"🔄 Regenerated {output_path} for: {', '.join(sorted(modules))}")
+
+    watcher = PollingWatcher(project_path, WATCH_PATTERNS, interval=interval, debounce=interval / 2)
+    click.echo("👀 Watching modules for changes. Press Ctrl+C to stop.")
+    try:
+        watcher.watch(regenerate)
+    except KeyboardInterrupt:
+        click.echo("\n🛑 Stopped watching.")
+
+
 def _serve_swagger_ui(swagger_file: Path, port: int):
     """
     Serve Swagger UI for the generated documentation.
@@ -855,6 +1481,12 @@ def _serve_swagger_ui(swagger_file: Path, port: int):
         class SwaggerHandler(http.server.SimpleHTTPRequestHandler):
             def __init__(self, *args, **kwargs):
                 super().__init__(*args, directory=str(swagger_file.parent), **kwargs)
+
+            def end_headers(self):
+                # The spec may be rewritten by --watch at any time; make sure
+                # a browser reload always fetches the current one.
+                self.send_header('Cache-Control', 'no-cache')
+                super().end_headers()
             
             def do_GET(self):
                 if self.path == '/' or self.path == '/index.html':
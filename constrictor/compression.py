@@ -0,0 +1,175 @@
+"""
+Gzip compression for dynamic responses.
+
+GzipMiddleware wraps a WSGI app and compresses compressible responses (text,
+JSON, JavaScript, XML, SVG, NDJSON) for clients that accept gzip. It's
+opt-in - `load(app, compress=True)` or CONSTRICTOR_COMPRESS = True - since a
+reverse proxy often does this already.
+
+Responses smaller than min_size are sent as they are: below roughly a packet
+the CPU spent compressing buys nothing. Streamed responses (no
+Content-Length) are compressed incrementally, flushing after every chunk, so
+a streaming export still reaches the client as it's produced.
+"""
+
+import gzip
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+DEFAULT_MIN_SIZE = 500
+DEFAULT_LEVEL = 6
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "application/manifest+json",
+    "image/svg+xml",
+}
+
+
+def is_compressible(content_type: str) -> bool:
+    mimetype = content_type.split(";", 1)[0].strip().lower()
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith("+json")
+
+
+def accepts_gzip(environ) -> bool:
+    """True if the request's Accept-Encoding allows gzip."""
+    for coding in environ.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def _header(headers: List[Tuple[str, str]], name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _compressed_headers(headers: List[Tuple[str, str]], length: Optional[int]) -> List[Tuple[str, str]]:
+    result = []
+    vary = None
+    for key, value in headers:
+        lower = key.lower()
+        if lower == "content-length":
+            continue
+        if lower == "vary":
+            vary = value
+            continue
+        if lower == "etag" and not value.startswith("W/"):
+            # The compressed body is a different representation
+            value = "W/" + value
+        result.append((key, value))
+    result.append(("Content-Encoding", "gzip"))
+    if vary is None:
+        result.append(("Vary", "Accept-Encoding"))
+    elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+        result.append(("Vary", f"{vary}, Accept-Encoding"))
+    else:
+        result.append(("Vary", vary))
+    if length is not None:
+        result.append(("Content-Length", str(length)))
+    return result
+
+
+class GzipMiddleware:
+    """WSGI middleware that gzips compressible responses."""
+
+    def __init__(self, app, min_size: int = DEFAULT_MIN_SIZE, level: int = DEFAULT_LEVEL):
+        """
+        Args:
+            app: The WSGI app to wrap (usually flask_app.wsgi_app)
+            min_size: Smallest body, in bytes, worth compressing
+            level: zlib compression level (1 fastest - 9 smallest)
+        """
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def _should_compress(self, environ, status: str, headers) -> bool:
+        if environ.get("REQUEST_METHOD") == "HEAD" or not status.startswith("200"):
+            return False
+        if _header(headers, "Content-Encoding") is not None:
+            return False
+        if "no-transform" in (_header(headers, "Cache-Control") or "").lower():
+            return False
+        if not is_compressible(_header(headers, "Content-Type") or ""):
+            return False
+        length = _header(headers, "Content-Length")
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if not accepts_gzip(environ):
+            return self.app(environ, start_response)
+
+        captured = []
+        # Body bytes passed to the (legacy) write() callable, which come
+        # before anything the returned iterable yields
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        body = self.app(environ, capture)
+        iterator = iter(body)
+        first = []
+        if not captured:
+            # start_response is called lazily by the first chunk of some apps
+            first = [chunk for chunk in [next(iterator, None)] if chunk is not None]
+        first = written + first
+        status, headers, exc_info = captured
+
+        if not self._should_compress(environ, status, headers):
+            start_response(status, headers, exc_info)
+            # Hand back the app's own iterable where possible, so e.g.
+            # wsgi.file_wrapper responses keep their fast path
+            return _chain(first, iterator, body) if first else body
+
+        if _header(headers, "Content-Length") is not None:
+            try:
+                data = gzip.compress(b"".join(first) + b"".join(iterator), self.level, mtime=0)
+            finally:
+                _close(body)
+            start_response(status, _compressed_headers(headers, len(data)), exc_info)
+            return [data]
+
+        start_response(status, _compressed_headers(headers, None), exc_info)
+        return self._stream(first, iterator, body)
+
+    def _stream(self, first, iterator, body) -> Iterable[bytes]:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        try:
+            for chunk in _chain(first, iterator, None):
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            _close(body)
+
+
+def _chain(first, iterator, body) -> Iterable[bytes]:
+    try:
+        yield from first
+        yield from iterator
+    finally:
+        if body is not None:
+            _close(body)
+
+
+def _close(body) -> None:
+    close = getattr(body, "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,137 @@
+"""
+Conditional GET (ETag / Last-Modified) for views.
+
+    @blueprint.route('/article/api/')
+    @model_access_required('article', 'read')
+    @conditional()
+    def api():
+        ...
+
+A client that already holds the current version of a response sends its
+validators back (If-None-Match / If-Modified-Since) and gets an empty 304
+instead of the body. By default the ETag is a hash of the response body,
+which saves bandwidth but still runs the view. With a validator - a cheap
+function of the view's arguments that returns the resource's version - the
+check happens before the view runs, so an unchanged resource costs one small
+query instead of the full render:
+
+    @conditional(model_validator(ArticleModel, "updated_at"))
+    def article_get(pk):
+        ...
+
+Place @conditional below the auth decorators (a 304 must not leak whether a
+resource the caller can't read has changed) and above @cached, which then
+keys its entries on the validator's version of the resource.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import func, inspect, select
+from werkzeug.http import is_resource_modified
+
+from .db import db
+
+# A validator returns (etag, last_modified); either may be None.
+Validators = Tuple[Optional[str], Optional[datetime]]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # Columns filled from datetime.utcnow() are naive UTC
+        return value.replace(tzinfo=timezone.utc, microsecond=0)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _hash(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def model_validator(model, column: str = "updated_at") -> Callable[..., Validators]:
+    """
+    A validator for views over a model with a last-modified timestamp
+    column (it should be indexed, so MAX() over it is an index lookup).
+
+    For item views (called with `pk`) the ETag and Last-Modified come from
+    that row's timestamp. For collection views the ETag covers the row count
+    and the newest timestamp, so inserts, updates and deletes all change it;
+    no Last-Modified is sent, since a delete doesn't move the newest
+    timestamp and a date alone would keep validating a stale list.
+
+    Args:
+        model: The db.Model class
+        column: Name of its last-modified column
+    """
+    timestamp = getattr(model, column)
+    pk = inspect(model).primary_key[0]
+    table = inspect(model).local_table.name
+
+    def validate(*args, **kwargs) -> Validators:
+        if "pk" in kwargs:
+            modified = db.session.scalar(select(timestamp).where(pk == kwargs["pk"]))
+            if modified is None:
+                return None, None
+            return _hash(table, kwargs["pk"], modified.isoformat()), modified
+        count, newest = db.session.execute(select(func.count(), func.max(timestamp)).select_from(model)).one()
+        return _hash(table, count, newest.isoformat() if newest else ""), None
+
+    return validate
+
+
+def _not_modified(etag: Optional[str], last_modified: Optional[datetime]):
+    response = current_app.response_class(status=304)
+    if etag:
+        response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def conditional(validator: Optional[Callable[..., Validators]] = None):
+    """
+    Answer conditional GET/HEAD requests with 304 Not Modified.
+
+    Args:
+        validator: Called with the view's arguments, returns (etag,
+            last_modified) for the current version of the resource without
+            rendering it. Without one, a weak ETag is computed from the
+            rendered body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            etag = last_modified = None
+            if validator is not None:
+                etag, last_modified = validator(*args, **kwargs)
+                last_modified = _as_utc(last_modified)
+                if (etag or last_modified) and not is_resource_modified(
+                        request.environ, etag=etag, last_modified=last_modified):
+                    return _not_modified(etag, last_modified)
+                if etag or last_modified:
+                    # Read by @cached below, to key its entry on this version
+                    g.constrictor_resource_version = f"{etag}@{last_modified.isoformat() if last_modified else ''}"
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            if response.headers.get("X-Cache") == "HIT" and not g.pop("constrictor_cache_versioned", False):
+                # A cached body of unknown version: the validators describe
+                # the current resource, not necessarily this body
+                etag = last_modified = None
+            if etag:
+                response.set_etag(etag, weak=True)
+            elif "ETag" not in response.headers:
+                response.add_etag(weak=True)
+            if last_modified and response.last_modified is None:
+                response.last_modified = last_modified
+            return response.make_conditional(request)
+        return wrapped
+    return decorator
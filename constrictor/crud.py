@@ -0,0 +1,460 @@
+"""
+JSON CRUD endpoints over a module's model.
+
+A `crud:` route in a module template generates thin view functions that
+delegate to a CrudResource:
+
+    from constrictor.crud import CrudResource
+    from .models import ArticleModel
+
+    article_crud = CrudResource(ArticleModel, order_by="created_at", descending=True)
+
+    @blueprint.route('/article/api/items/', methods=['GET'])
+    @model_access_required('article', 'read')
+    def article_list():
+        return article_crud.list()
+
+Lists are paginated by keyset rather than OFFSET: each page ends with an
+opaque cursor holding the last row's (order_by, primary key) values, and the
+next page starts strictly after it. The database seeks straight to that
+position through the order_by column's index, so page 1000 costs the same
+as page 1, and rows inserted or deleted between requests don't shift items
+across page boundaries. Single items are fetched by primary key.
+
+With `bulk: true` the route also gets POST/PATCH <path>bulk/ endpoints that
+take a JSON array or an NDJSON stream (one object per line). Items are
+validated individually, written with executemany INSERT/UPDATEs in chunked
+transactions, and reported back one result per item - so an import of
+thousands of records is a handful of requests and commits, not thousands.
+
+With `export: true` it gets GET <path>export/?format=ndjson|csv, streamed
+from a server-side cursor by constrictor.export.stream_export().
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import itertools
+import json
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import jsonify, request
+from sqlalchemy import UniqueConstraint, and_, insert, inspect, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from .db import db
+from .serialization import encoder_for, json_value
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Bulk endpoints: rows per transaction, and items per request
+BULK_CHUNK_SIZE = 500
+MAX_BULK_ITEMS = 10_000
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+
+class _InvalidJson:
+    """Stands in for an NDJSON line that isn't valid JSON."""
+
+
+def serialize(obj) -> Dict[str, Any]:
+    """A model instance as a JSON-ready dict: its to_dict() if it has one,
+    otherwise its column attributes."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return encoder_for(type(obj))(obj)
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _parse_value(column, value):
+    """Convert a JSON value to the column's Python type.
+
+    Raises:
+        ValueError: If the value can't be converted
+    """
+    if value is None:
+        return None
+    python_type = _python_type(column)
+    if python_type is datetime.datetime and isinstance(value, str):
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if python_type is datetime.date and isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    if python_type is datetime.time and isinstance(value, str):
+        return datetime.time.fromisoformat(value)
+    if python_type is decimal.Decimal and isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            return decimal.Decimal(str(value))
+        except decimal.InvalidOperation:
+            raise ValueError("must be a number")
+    if python_type is uuid.UUID and not isinstance(value, bool):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            raise ValueError("must be a UUID")
+    if python_type is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if python_type is bool and not isinstance(value, bool):
+        raise ValueError("must be a boolean")
+    if python_type is int and (isinstance(value, bool) or not isinstance(value, int)):
+        raise ValueError("must be an integer")
+    if python_type is str:
+        if not isinstance(value, str):
+            raise ValueError("must be a string")
+        length = getattr(column.type, "length", None)
+        if length is not None and len(value) > length:
+            raise ValueError(f"must be at most {length} characters")
+    if python_type in (datetime.datetime, datetime.date, datetime.time, decimal.Decimal, float):
+        raise ValueError(f"must be a {python_type.__name__}")
+    return value
+
+
+class CrudResource:
+    """List/get/create/update/delete handlers for one model.
+
+    Each handler reads the current request and returns a Flask response;
+    access checks are left to the decorators on the generated views.
+    """
+
+    def __init__(self, model, order_by: Optional[str] = None, descending: bool = False,
+                 fields: Optional[Iterable[str]] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                 max_page_size: int = MAX_PAGE_SIZE, chunk_size: int = BULK_CHUNK_SIZE,
+                 max_bulk_items: int = MAX_BULK_ITEMS):
+        """
+        Args:
+            model: The db.Model class to expose
+            order_by: Column to paginate by (default: the primary key). It
+                must be NOT NULL and should be indexed; the primary key
+                breaks ties between equal values.
+            descending: Return newest/largest first
+            fields: Columns clients may set (default: every column except
+                the primary key)
+            page_size: Items per page when the client doesn't ask
+            max_page_size: Largest page a client may ask for
+            chunk_size: Rows written per transaction by the bulk endpoints
+            max_bulk_items: Most items one bulk request may carry
+
+        Raises:
+            ValueError: If the model or order_by column can't be paginated
+        """
+        mapper = inspect(model)
+        if len(mapper.primary_key) != 1:
+            raise ValueError(f"{model.__name__}: CRUD endpoints need a single-column primary key")
+        self.model = model
+        self.pk = mapper.primary_key[0]
+        self.pk_key = mapper.get_property_by_column(self.pk).key
+        self.columns = {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+
+        order_by = order_by or self.pk_key
+        if order_by not in self.columns:
+            raise ValueError(f"{model.__name__} has no column '{order_by}' to order by")
+        self.order_key = order_by
+        self.order_column = self.columns[order_by]
+        if self.order_column is not self.pk:
+            if self.order_column.nullable:
+                raise ValueError(f"{model.__name__}.{order_by} must be NOT NULL to paginate by it")
+            if not _is_indexed(self.order_column):
+                raise ValueError(f"{model.__name__}.{order_by} must be indexed to paginate by it")
+        self.descending = descending
+
+        if fields is None:
+            fields = [key for key, column in self.columns.items() if column is not self.pk]
+        for field in fields:
+            if field not in self.columns:
+                raise ValueError(f"{model.__name__} has no column '{field}'")
+        self.fields = list(fields)
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.chunk_size = chunk_size
+        self.max_bulk_items = max_bulk_items
+
+    # Cursors
+
+    def _encode_cursor(self, obj) -> str:
+        values = [json_value(getattr(obj, self.order_key)), json_value(getattr(obj, self.pk_key))]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> Tuple[Any, Any]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            order_value, pk_value = json.loads(raw)
+            return _parse_value(self.order_column, order_value), _parse_value(self.pk, pk_value)
+        except (binascii.Error, ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    def page_query(self, limit: int, cursor: Optional[str] = None):
+        """The SELECT for one page: limit + 1 rows, so the caller can tell
+        whether another page follows.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        order_column, pk = self.order_column, self.pk
+        query = select(self.model)
+        if cursor:
+            order_value, pk_value = self._decode_cursor(cursor)
+            if order_column is pk:
+                after = pk < pk_value if self.descending else pk > pk_value
+            elif self.descending:
+                after = or_(order_column < order_value, and_(order_column == order_value, pk < pk_value))
+            else:
+                after = or_(order_column > order_value, and_(order_column == order_value, pk > pk_value))
+            query = query.where(after)
+        ordering = [order_column] if order_column is pk else [order_column, pk]
+        if self.descending:
+            ordering = [column.desc() for column in ordering]
+        return query.order_by(*ordering).limit(limit + 1)
+
+    # Handlers
+
+    def list(self):
+        """GET a page: ?limit=N&cursor=<next_cursor from the previous page>."""
+        limit = request.args.get("limit", self.page_size, type=int)
+        if limit < 1 or limit > self.max_page_size:
+            return jsonify({"error": f"Limit must be between 1 and {self.max_page_size}"}), 400
+        try:
+            query = self.page_query(limit, request.args.get("cursor"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        rows = list(db.session.scalars(query))
+        next_cursor = self._encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return jsonify({
+            "items": [serialize(row) for row in rows[:limit]],
+            "limit": limit,
+            "next_cursor": next_cursor,
+        })
+
+    def get(self, pk):
+        """GET one item by primary key."""
+        obj = db.session.get(self.model, pk)
+        if obj is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify(serialize(obj))
+
+    def validate(self, data: Any, partial: bool = False) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Check a JSON object against the writable fields.
+
+        Args:
+            data: The decoded request body
+            partial: Allow required fields to be missing (updates)
+
+        Returns:
+            (values to set, {field: error}); errors is empty when valid
+        """
+        if isinstance(data, _InvalidJson):
+            return {}, {"_": "Invalid JSON"}
+        if not isinstance(data, dict):
+            return {}, {"_": "Expected a JSON object"}
+        values, errors = {}, {}
+        for key, value in data.items():
+            if key not in self.fields:
+                errors[key] = "unknown or read-only field"
+                continue
+            column = self.columns[key]
+            if value is None and not column.nullable:
+                errors[key] = "may not be null"
+                continue
+            try:
+                values[key] = _parse_value(column, value)
+            except ValueError as e:
+                errors[key] = str(e)
+        if not partial:
+            for key in self.fields:
+                column = self.columns[key]
+                if (key not in data and not column.nullable and column.default is None
+                        and column.server_default is None):
+                    errors[key] = "is required"
+        return values, errors
+
+    def create(self):
+        """POST a JSON object to create an item."""
+        values, errors = self.validate(request.get_json(silent=True))
+        if errors:
+            return jsonify({"error": "Invalid data", "fields": errors}), 400
+        obj = self.model(**values)
+        db.session.add(obj)
+        db.session.commit()
+        return jsonify(serialize(obj)), 201
+
+    def update(self, pk):
+        """PUT/PATCH a JSON object with the fields to change."""
+        obj = db.session.get(self.model, pk)
+        if obj is None:
+            return jsonify({"error": "Not found"}), 404
+        values, errors = self.validate(request.get_json(silent=True), partial=True)
+        if errors:
+            return jsonify({"error": "Invalid data", "fields": errors}), 400
+        for key, value in values.items():
+            setattr(obj, key, value)
+        db.session.commit()
+        return jsonify(serialize(obj))
+
+    def delete(self, pk):
+        """DELETE one item by primary key."""
+        obj = db.session.get(self.model, pk)
+        if obj is None:
+            return jsonify({"error": "Not found"}), 404
+        db.session.delete(obj)
+        db.session.commit()
+        return "", 204
+
+    def export(self):
+        """GET every item as a streamed download: ?format=ndjson (default) or csv."""
+        from .export import EXPORT_FORMATS, stream_export
+
+        format = request.args.get("format", "ndjson")
+        if format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        return stream_export(self.model, format)
+
+    # Bulk handlers
+
+    def _bulk_items(self):
+        """The items of a bulk request body. An NDJSON body is read only up
+        to the first item past max_bulk_items, so an oversized stream is
+        rejected before any of it is written, like an oversized array.
+
+        Returns:
+            (list of items, None), or (None, error response)
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            data = list(itertools.islice(_iter_ndjson(request.stream), self.max_bulk_items + 1))
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return None, (jsonify({"error": "Expected a JSON array or NDJSON"}), 400)
+        if len(data) > self.max_bulk_items:
+            return None, (jsonify({"error": f"At most {self.max_bulk_items} items per request"}), 413)
+        return data, None
+
+    def _bulk(self, validate_item, write_chunk):
+        items, error = self._bulk_items()
+        if error:
+            return error
+        results: List[Dict[str, Any]] = []
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for index, item in enumerate(items):
+            values, errors = validate_item(item)
+            if errors:
+                results.append({"index": index, "status": "invalid", "errors": errors})
+                continue
+            chunk.append((index, values))
+            if len(chunk) >= self.chunk_size:
+                results.extend(write_chunk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(write_chunk(chunk))
+
+        results.sort(key=lambda result: result["index"])
+        summary: Dict[str, Any] = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        summary["results"] = results
+        return jsonify(summary)
+
+    def _write_chunk(self, chunk, write_all):
+        """Write a chunk in one transaction; if the database rejects it, fall
+        back to one transaction per item so only the offending items fail."""
+        try:
+            results = write_all(chunk)
+            db.session.commit()
+            return results
+        except SQLAlchemyError:
+            db.session.rollback()
+        results = []
+        for index, values in chunk:
+            try:
+                results.extend(write_all([(index, values)]))
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                results.append({"index": index, "status": "failed", "error": str(getattr(e, "orig", None) or e).splitlines()[0]})
+        return results
+
+    def _insert_chunk(self, chunk):
+        rows = [values for _, values in chunk]
+        statement = insert(self.model)
+        if db.session.get_bind().dialect.insert_executemany_returning:
+            statement = statement.returning(self.pk, sort_by_parameter_order=True)
+            ids = list(db.session.scalars(statement, rows))
+        else:
+            db.session.execute(statement, rows)
+            ids = [None] * len(rows)
+        return [{"index": index, "status": "created", "id": json_value(pk)}
+                for (index, _), pk in zip(chunk, ids)]
+
+    def _update_chunk(self, chunk):
+        ids = [values[self.pk_key] for _, values in chunk]
+        existing = set(db.session.scalars(select(self.pk).where(self.pk.in_(ids))))
+        found = [(index, values) for index, values in chunk if values[self.pk_key] in existing]
+        if found:
+            db.session.execute(update(self.model), [values for _, values in found])
+        return [
+            {"index": index, "id": json_value(values[self.pk_key]),
+             "status": "updated" if values[self.pk_key] in existing else "not_found"}
+            for index, values in chunk
+        ]
+
+    def _validate_update(self, item):
+        if not isinstance(item, dict):
+            return self.validate(item, partial=True)
+        fields = dict(item)
+        if fields.get(self.pk_key) is None:
+            return {}, {self.pk_key: "is required"}
+        pk_value = fields.pop(self.pk_key)
+        values, errors = self.validate(fields, partial=True)
+        if not values and not errors:
+            errors["_"] = "No fields to update"
+        try:
+            values[self.pk_key] = _parse_value(self.pk, pk_value)
+        except ValueError as e:
+            errors[self.pk_key] = str(e)
+        return values, errors
+
+    def bulk_create(self):
+        """POST a JSON array (or NDJSON) of objects to create them in chunks.
+
+        Returns a count per status (created/invalid/failed) and one result
+        per item, in request order.
+        """
+        return self._bulk(self.validate, lambda chunk: self._write_chunk(chunk, self._insert_chunk))
+
+    def bulk_update(self):
+        """PATCH a JSON array (or NDJSON) of objects, each with its primary
+        key and the fields to change.
+
+        Returns a count per status (updated/not_found/invalid/failed) and one
+        result per item, in request order.
+        """
+        return self._bulk(self._validate_update, lambda chunk: self._write_chunk(chunk, self._update_chunk))
+
+
+def _iter_ndjson(stream) -> Iterator[Any]:
+    """Decode an NDJSON body line by line, without buffering all of it."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield _InvalidJson()
+
+
+def _is_indexed(column) -> bool:
+    """True if column is unique/indexed itself or leads a table index."""
+    if column.primary_key or column.index or column.unique:
+        return True
+    table = column.table
+    candidates = list(table.indexes) + [c for c in table.constraints if isinstance(c, UniqueConstraint)]
+    return any(len(c.columns) and list(c.columns)[0] is column for c in candidates)
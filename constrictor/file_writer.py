@@ -0,0 +1,173 @@
+"""
+Change-aware file writing for Constrictor's code generators.
+
+Generated files are staged in memory and only touched on disk when their
+content actually differs. Unchanged files keep their mtime, so regenerating
+a module doesn't wake up Flask's reloader, pytest caches or any other
+mtime-based watcher for files that are byte-for-byte the same. Files that
+do change are written to a temporary sibling and renamed into place, so a
+reader never sees a half-written file.
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+SKIPPED = "skipped"
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    """SHA-256 hex digest of text (encoded as UTF-8) or bytes."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def atomic_write(path: Union[str, Path], content: str) -> None:
+    """
+    Write content to path via a temporary file and an atomic rename.
+
+    Args:
+        path: Destination file
+        content: Text to write (encoded as UTF-8)
+    """
+    path = Path(path)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = None
+
+    # Created like open(path, 'w') would: 0666 less the umask, applied by
+    # the kernel - reading the umask would mean setting it, process-wide
+    tmp_path = path.parent / f".{path.name}.{uuid.uuid4().hex}"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode('utf-8'))
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path: Union[str, Path], content: str) -> str:
+    """
+    Atomically write content to path unless the file already holds it.
+
+    Args:
+        path: Destination file
+        content: Text to write (encoded as UTF-8)
+
+    Returns:
+        CREATED, UPDATED or UNCHANGED
+    """
+    path = Path(path)
+    encoded = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == encoded:
+                return UNCHANGED
+        status = UPDATED
+    except FileNotFoundError:
+        status = CREATED
+
+    atomic_write(path, content)
+    return status
+
+
+class WriteManifest:
+    """Which files a StagedWriter.commit() created, updated or left alone.
+
+    `skipped` lists files that would have changed but were left alone
+    because they were edited after they were last generated.
+    """
+
+    def __init__(self):
+        self.created: List[Path] = []
+        self.updated: List[Path] = []
+        self.unchanged: List[Path] = []
+        self.skipped: List[Path] = []
+
+    @property
+    def changed(self) -> List[Path]:
+        """Files whose content on disk is new or different."""
+        return self.created + self.updated
+
+    def add(self, path: Path, status: str) -> None:
+        getattr(self, status).append(path)
+
+    def summary(self) -> str:
+        summary = (f"{len(self.created)} created, {len(self.updated)} updated, "
+                   f"{len(self.unchanged)} unchanged")
+        if self.skipped:
+            summary += f", {len(self.skipped)} skipped (modified locally)"
+        return summary
+
+    def __repr__(self):
+        return f"<WriteManifest {self.summary()}>"
+
+
+class StagedWriter:
+    """Collects directories and file contents, then writes only what changed."""
+
+    def __init__(self):
+        self._directories: List[Path] = []
+        self._files: Dict[Path, str] = {}
+
+    def stage_dir(self, path: Union[str, Path]) -> None:
+        """Stage a directory to be created (with parents) on commit."""
+        self._directories.append(Path(path))
+
+    def stage(self, path: Union[str, Path], content: str) -> None:
+        """Stage a file's full content. Staging the same path again replaces it."""
+        self._files[Path(path)] = content
+
+    @property
+    def files(self) -> Dict[Path, str]:
+        """Staged file contents, keyed by path."""
+        return dict(self._files)
+
+    def commit(self, baseline: Optional[Dict[Path, str]] = None) -> WriteManifest:
+        """
+        Create staged directories and write every staged file whose content
+        differs from what's on disk.
+
+        With a baseline - the content_hash() of each file as it was last
+        generated - this becomes a three-way, file-level merge: a file on
+        disk that no longer matches its baseline hash was edited by hand, so
+        it is kept as-is and reported as skipped instead of being
+        overwritten. Files without a baseline entry are treated as edited.
+
+        Args:
+            baseline: Optional mapping of path to last-generated content hash
+
+        Returns:
+            Manifest of created, updated, unchanged and skipped files
+        """
+        manifest = WriteManifest()
+        for directory in self._directories:
+            directory.mkdir(parents=True, exist_ok=True)
+        for path, content in self._files.items():
+            if baseline is not None and self._locally_modified(path, content, baseline.get(path)):
+                manifest.add(path, SKIPPED)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            manifest.add(path, write_if_changed(path, content))
+        return manifest
+
+    @staticmethod
+    def _locally_modified(path: Path, content: str, base_hash: Optional[str]) -> bool:
+        try:
+            current = path.read_bytes()
+        except FileNotFoundError:
+            return False
+        if current == content.encode('utf-8'):
+            return False
+        return content_hash(current) != base_hash
@@ -0,0 +1,143 @@
+"""
+Dependency-ordered, parallel execution of per-module migration hooks.
+
+A module declares which other modules' hooks must finish before its own run
+in an optional modules/<name>/module.yml:
+
+    depends_on:
+      - catalog
+      - accounts
+
+Hooks whose dependencies have all finished run concurrently on a thread
+pool; everything else waits for its turn. Modules without a hook still take
+part in the ordering, so a dependency chain isn't broken by a module in the
+middle that has nothing to run.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+import yaml
+
+MODULE_METADATA_FILE = "module.yml"
+
+
+class HookError(Exception):
+    """Raised for invalid hook dependencies, or when a hook fails."""
+
+    def __init__(self, message: str, module: str = None):
+        super().__init__(message)
+        self.module = module
+
+
+def load_dependencies(modules_dir: Path, modules: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Read each module's declared dependencies from its module.yml.
+
+    Args:
+        modules_dir: The project's modules/ directory
+        modules: Module names to read
+
+    Returns:
+        Mapping of module name to the names it depends on
+
+    Raises:
+        HookError: If a module.yml is malformed
+    """
+    dependencies = {}
+    for name in modules:
+        path = Path(modules_dir) / name / MODULE_METADATA_FILE
+        if not path.exists():
+            dependencies[name] = []
+            continue
+        try:
+            metadata = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        except yaml.YAMLError as e:
+            raise HookError(f"Invalid {path}: {e}", name)
+        depends_on = (metadata.get("depends_on") or []) if isinstance(metadata, dict) else None
+        if not isinstance(depends_on, list) or not all(isinstance(d, str) for d in depends_on):
+            raise HookError(f"Invalid {path}: 'depends_on' must be a list of module names", name)
+        dependencies[name] = depends_on
+    return dependencies
+
+
+def validate_dependencies(dependencies: Dict[str, List[str]]) -> None:
+    """
+    Check that every dependency names a known module and that there are no
+    cycles.
+
+    Raises:
+        HookError: Describing the first problem found
+    """
+    for name, depends_on in sorted(dependencies.items()):
+        for dependency in depends_on:
+            if dependency not in dependencies:
+                raise HookError(f"Module '{name}' depends on unknown module '{dependency}'", name)
+
+    remaining = {name: set(depends_on) for name, depends_on in dependencies.items()}
+    while remaining:
+        ready = [name for name, depends_on in remaining.items() if not depends_on]
+        if not ready:
+            cycle = ", ".join(sorted(remaining))
+            raise HookError(f"Circular hook dependencies between modules: {cycle}")
+        for name in ready:
+            del remaining[name]
+        for depends_on in remaining.values():
+            depends_on.difference_update(ready)
+
+
+def run_in_dependency_order(dependencies: Dict[str, List[str]], run: Callable[[str], None],
+                            jobs: int = 1) -> None:
+    """
+    Call run(name) for every module once all of its dependencies have
+    finished, up to `jobs` at a time. Ready modules start in name order, so
+    with jobs=1 and no dependencies this is plain alphabetical order.
+
+    On the first failure no further modules are started; hooks already
+    running are allowed to finish, then the failure is raised.
+
+    Args:
+        dependencies: Mapping of module name to the names it depends on
+        run: Runs one module's hook
+        jobs: Maximum number of hooks running at once
+
+    Raises:
+        HookError: If the dependencies are invalid, or wrapping the first
+            exception raised by run()
+    """
+    validate_dependencies(dependencies)
+
+    waiting_on = {name: set(depends_on) for name, depends_on in dependencies.items()}
+    dependents: Dict[str, List[str]] = {name: [] for name in dependencies}
+    for name, depends_on in dependencies.items():
+        for dependency in depends_on:
+            dependents[dependency].append(name)
+
+    ready = sorted(name for name, depends_on in waiting_on.items() if not depends_on)
+    failure = None
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running = {}
+        while ready or running:
+            while ready and failure is None and len(running) < max(1, jobs):
+                name = ready.pop(0)
+                running[pool.submit(run, name)] = name
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    failure = failure or (name, error)
+                    continue
+                for dependent in dependents[name]:
+                    waiting_on[dependent].discard(name)
+                    if not waiting_on[dependent]:
+                        ready.append(dependent)
+            ready.sort()
+
+    if failure is not None:
+        name, error = failure
+        raise HookError(str(error), name) from error
@@ -0,0 +1,192 @@
+"""
+Prometheus metrics for requests, per module and endpoint.
+
+With CONSTRICTOR_METRICS = True, load() records for every request:
+
+    constrictor_http_requests_total{module, endpoint, method, status}
+    constrictor_http_request_duration_seconds{module, endpoint}    (histogram)
+    constrictor_http_requests_in_flight{module}
+    constrictor_db_queries_total{module, endpoint}
+    constrictor_db_duration_seconds_total{module, endpoint}
+
+and serves them in the Prometheus text format at CONSTRICTOR_METRICS_PATH
+(default /metrics). `module` is the blueprint - so the module - that
+handled the request ("app" for routes on the app itself) and `endpoint` the
+view; `sum by (module, le)` over the histogram gives per-module latency.
+Database time comes from constrictor.querystats.
+
+Each request takes one lock twice, at start and finish, for a few
+dict increments; a scrape copies the numbers under the lock and formats
+them after releasing it, so serving threads never wait on a scrape. Numbers
+are per process: with several worker processes, scrape each one or run a
+single-process server.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from flask import g, request
+
+from . import querystats
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Requests that matched no route are labelled with this endpoint, so
+# scanners probing random URLs can't create unbounded series
+UNMATCHED = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Request metrics for one app."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._in_flight = Counter()
+        self._requests = Counter()
+        # (module, endpoint) -> per-bucket counts, the last one for +Inf
+        self._latency: Dict[Tuple[str, str], List[int]] = {}
+        self._latency_sum = Counter()
+        self._db_queries = Counter()
+        self._db_seconds = Counter()
+
+    def started(self, module: str) -> None:
+        with self._lock:
+            self._in_flight[module] += 1
+
+    def finished(self, module: str, endpoint: str, method: str, status: int, seconds: float,
+                 db_queries: int = 0, db_seconds: float = 0.0) -> None:
+        """Record a completed request."""
+        bucket = bisect_left(self.buckets, seconds)
+        key = (module, endpoint)
+        with self._lock:
+            self._in_flight[module] -= 1
+            self._requests[(module, endpoint, method, str(status))] += 1
+            counts = self._latency.get(key)
+            if counts is None:
+                counts = self._latency[key] = [0] * (len(self.buckets) + 1)
+            counts[bucket] += 1
+            self._latency_sum[key] += seconds
+            if db_queries:
+                self._db_queries[key] += db_queries
+                self._db_seconds[key] += db_seconds
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            in_flight = dict(self._in_flight)
+            requests = dict(self._requests)
+            latency = {key: list(counts) for key, counts in self._latency.items()}
+            latency_sum = dict(self._latency_sum)
+            db_queries = dict(self._db_queries)
+            db_seconds = dict(self._db_seconds)
+
+        route = ("module", "endpoint")
+        lines = [
+            "# HELP constrictor_http_requests_total Requests handled.",
+            "# TYPE constrictor_http_requests_total counter",
+        ]
+        for key, count in sorted(requests.items()):
+            lines.append(f"constrictor_http_requests_total"
+                         f"{_labels(('module', 'endpoint', 'method', 'status'), key)} {count}")
+
+        lines += [
+            "# HELP constrictor_http_request_duration_seconds Request latency.",
+            "# TYPE constrictor_http_request_duration_seconds histogram",
+        ]
+        for key, counts in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (None,), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound is None else f'le="{_number(bound)}"'
+                lines.append(f"constrictor_http_request_duration_seconds_bucket{_labels(route, key, le)} {cumulative}")
+            lines.append(f"constrictor_http_request_duration_seconds_sum{_labels(route, key)} "
+                         f"{_number(latency_sum[key])}")
+            lines.append(f"constrictor_http_request_duration_seconds_count{_labels(route, key)} {cumulative}")
+
+        lines += [
+            "# HELP constrictor_http_requests_in_flight Requests being handled.",
+            "# TYPE constrictor_http_requests_in_flight gauge",
+        ]
+        for module, count in sorted(in_flight.items()):
+            lines.append(f"constrictor_http_requests_in_flight{_labels(('module',), (module,))} {count}")
+
+        lines += [
+            "# HELP constrictor_db_queries_total SQL statements issued by requests.",
+            "# TYPE constrictor_db_queries_total counter",
+        ]
+        for key, count in sorted(db_queries.items()):
+            lines.append(f"constrictor_db_queries_total{_labels(route, key)} {count}")
+        lines += [
+            "# HELP constrictor_db_duration_seconds_total Time requests spent in SQL statements.",
+            "# TYPE constrictor_db_duration_seconds_total counter",
+        ]
+        for key, seconds in sorted(db_seconds.items()):
+            lines.append(f"constrictor_db_duration_seconds_total{_labels(route, key)} {_number(seconds)}")
+        return "\n".join(lines) + "\n"
+
+
+def _route_labels() -> Tuple[str, str]:
+    if request.url_rule is None:
+        return request.blueprint or "app", UNMATCHED
+    return request.blueprint or "app", request.endpoint
+
+
+def init_metrics(app) -> None:
+    """Record request metrics and serve them, if CONSTRICTOR_METRICS is set."""
+    if not app.config.get("CONSTRICTOR_METRICS", False):
+        return
+    if "constrictor_metrics" in app.extensions:
+        return
+    registry = app.extensions["constrictor_metrics"] = MetricsRegistry(
+        app.config.get("CONSTRICTOR_METRICS_BUCKETS", DEFAULT_BUCKETS))
+
+    @app.before_request
+    def _start_metrics():
+        g._constrictor_metrics = (time.perf_counter(), _route_labels())
+        registry.started(g._constrictor_metrics[1][0])
+        querystats.track()
+
+    @app.after_request
+    def _metrics_status(response):
+        g._constrictor_metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_metrics(exc):
+        started = g.pop("_constrictor_metrics", None)
+        if started is None:
+            return
+        start, (module, endpoint) = started
+        status = g.pop("_constrictor_metrics_status", 500)
+        stats = querystats.current_stats()
+        # Runs before querystats' own teardown (teardowns run in reverse),
+        # which has already used the stats by now
+        querystats.stop()
+        registry.finished(module, endpoint, request.method, status, time.perf_counter() - start,
+                          stats.count if stats else 0, stats.duration if stats else 0.0)
+
+    def metrics():
+        return app.response_class(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(app.config.get("CONSTRICTOR_METRICS_PATH", "/metrics"), "constrictor_metrics", metrics)
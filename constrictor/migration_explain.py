@@ -0,0 +1,166 @@
+"""
+Cost estimates for pending migrations.
+
+`constrictor db upgrade --explain` renders the pending revisions as SQL
+(Alembic's offline mode), classifies each statement by how it touches its
+target table and looks up that table's current row count, so migrations
+that will rewrite or lock a large table can be spotted - and scheduled -
+before they run against production.
+
+The classification is a deliberately conservative, dialect-agnostic
+heuristic; what actually rewrites a table varies by database and version.
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+
+# How a statement touches its table.
+REWRITE = "rewrite"    # table is copied/rewritten, usually under an exclusive lock
+SCAN = "scan"          # full scan (index build, constraint validation, bulk DML), blocks writes
+METADATA = "metadata"  # catalog-only change, brief lock
+CREATE = "create"      # new table, nothing to scan
+
+EXPENSIVE = (REWRITE, SCAN)
+
+DEFAULT_LARGE_TABLE_ROWS = 100_000
+
+_IDENT = r'[`"\[]?([\w.$]+)[`"\]]?'
+
+# (pattern, kind), first match wins. Patterns run against a statement with
+# whitespace collapsed.
+_RULES = [
+    # SQLite batch migrations copy the table: INSERT INTO _alembic_tmp_<t> SELECT ... FROM <t>
+    (re.compile(r'^INSERT INTO [`"\[]?_alembic_tmp_([\w.$]+)', re.I), REWRITE),
+    (re.compile(rf"^CREATE TABLE (?:IF NOT EXISTS )?{_IDENT}", re.I), CREATE),
+    (re.compile(rf"^CREATE (?:UNIQUE )?INDEX CONCURRENTLY .*? ON (?:ONLY )?{_IDENT}", re.I), METADATA),
+    (re.compile(rf"^CREATE (?:UNIQUE )?INDEX .*? ON (?:ONLY )?{_IDENT}", re.I), SCAN),
+    (re.compile(rf"^ALTER TABLE (?:ONLY )?{_IDENT} .*(?:\bALTER (?:COLUMN )?\S+ (?:SET DATA )?TYPE\b"
+                r"|\bMODIFY (?:COLUMN )?\S+ |\bCHANGE (?:COLUMN )?\S+ \S+ )", re.I), REWRITE),
+    (re.compile(rf"^ALTER TABLE (?:ONLY )?{_IDENT} .*\bADD\b(?: COLUMN)? .*\bNOT NULL\b", re.I), REWRITE),
+    (re.compile(rf"^ALTER TABLE (?:ONLY )?{_IDENT} .*(?:\bSET NOT NULL\b|\bADD CONSTRAINT\b"
+                r"|\bADD (?:UNIQUE|FOREIGN KEY|PRIMARY KEY|CHECK)\b)", re.I), SCAN),
+    (re.compile(rf"^ALTER TABLE (?:ONLY )?{_IDENT}", re.I), METADATA),
+    (re.compile(rf"^UPDATE (?:ONLY )?{_IDENT}", re.I), SCAN),
+    (re.compile(rf"^DELETE FROM (?:ONLY )?{_IDENT}", re.I), SCAN),
+]
+
+_IGNORED_TABLES = {"alembic_version"}
+
+
+class ExplainedStatement:
+    """One SQL statement with its target table, kind and row estimate."""
+
+    def __init__(self, sql: str, table: Optional[str] = None, kind: Optional[str] = None,
+                 rows: Optional[int] = None):
+        self.sql = sql
+        self.table = table
+        self.kind = kind
+        self.rows = rows
+
+    def is_large(self, threshold: int) -> bool:
+        """True if this rewrites or scans a table of at least threshold rows."""
+        return self.kind in EXPENSIVE and self.rows is not None and self.rows >= threshold
+
+    def __repr__(self):
+        return f"<ExplainedStatement {self.kind} {self.table} rows={self.rows}>"
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split Alembic's offline SQL output into statements, dropping comments
+    and transaction control.
+    """
+    statements = []
+    current: List[str] = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            statement = "\n".join(current).strip().rstrip(";").strip()
+            current = []
+            if statement.upper() not in ("BEGIN", "COMMIT", "BEGIN TRANSACTION"):
+                statements.append(statement)
+    if current:
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def classify_statement(sql: str):
+    """
+    Work out which table a statement touches and how.
+
+    Returns:
+        (table, kind), or (None, None) for statements that don't touch a
+        user table
+    """
+    flat = " ".join(sql.split())
+    for pattern, kind in _RULES:
+        match = pattern.match(flat)
+        if match:
+            table = match.group(1)
+            if table in _IGNORED_TABLES:
+                return None, None
+            return table, kind
+    return None, None
+
+
+def estimate_rows(connection, table: str) -> Optional[int]:
+    """
+    Estimated row count of a table: planner statistics on PostgreSQL and
+    MySQL (cheap even on huge tables), an exact COUNT(*) elsewhere.
+
+    Returns:
+        The estimate, or None if the table doesn't exist yet
+    """
+    schema, _, name = table.rpartition(".")
+    if not inspect(connection).has_table(name, schema=schema or None):
+        return None
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        rows = connection.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+        ).scalar()
+        # reltuples is -1 for a table that has never been analyzed
+        if rows is not None and rows >= 0:
+            return int(rows)
+    elif dialect in ("mysql", "mariadb"):
+        rows = connection.execute(
+            text("SELECT table_rows FROM information_schema.tables "
+                 "WHERE table_schema = COALESCE(:schema, DATABASE()) AND table_name = :name"),
+            {"schema": schema or None, "name": name},
+        ).scalar()
+        if rows is not None:
+            return int(rows)
+
+    quoted = ".".join(connection.dialect.identifier_preparer.quote(part) for part in table.split("."))
+    return connection.execute(text(f"SELECT COUNT(*) FROM {quoted}")).scalar()
+
+
+def explain_sql(sql: str, connection) -> List[ExplainedStatement]:
+    """
+    Classify every statement in an offline migration script and attach row
+    estimates for the tables they touch.
+
+    Args:
+        sql: Output of `alembic upgrade --sql`
+        connection: Connection to the database the migration would run on
+
+    Returns:
+        One entry per statement, in order
+    """
+    estimates = {}
+    explained = []
+    for statement in split_statements(sql):
+        table, kind = classify_statement(statement)
+        rows = None
+        if table is not None and kind != CREATE:
+            if table not in estimates:
+                estimates[table] = estimate_rows(connection, table)
+            rows = estimates[table]
+        explained.append(ExplainedStatement(statement, table, kind, rows))
+    return explained
@@ -0,0 +1,246 @@
+"""
+Squashing of a project's Alembic history into a single baseline revision.
+
+Every module's model changes land in one project-wide history, so a fresh
+database (CI, test fixtures, a new developer) replays every revision ever
+written. Squashing replaces all revisions up to and including a target with
+one baseline that creates the schema as it stood at the target - and gives
+the baseline the target's revision id, so databases already at (or past)
+the target, and revisions written after it, don't notice anything changed.
+
+The baseline's schema comes from actually running the old history against
+a scratch database of the project's own dialect and reflecting the result,
+so hand-written DDL is accounted for exactly as it ran. Only the schema is
+carried over, not rows: a history whose upgrades insert, update or delete
+data (op.bulk_insert, or op.execute with DML) can't be squashed, since a
+fresh database built from the baseline would be missing that data. Before
+anything is written, the baseline is run on the scratch database in place
+of the history and the two schemas are compared.
+"""
+
+import ast
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import sqlalchemy as sa
+from alembic.autogenerate import produce_migrations, render_python_code
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from alembic.util import format_as_comma, template_to_file, to_tuple
+
+# Squashed revision files are moved here (relative to the migrations
+# directory, outside versions/ so Alembic no longer loads them).
+SQUASHED_DIR = "squashed"
+
+_DIALECT_MODULE = re.compile(r"\b(postgresql|mysql|sqlite|mssql|oracle)\.")
+
+# SQL text or SQLAlchemy expressions that change rows
+_DML = re.compile(r"\b(insert|update|delete)\b", re.IGNORECASE)
+
+
+class SquashError(Exception):
+    """Raised when a history can't be squashed at the requested revision."""
+
+
+def revisions_to_squash(script: ScriptDirectory, up_to: str) -> List:
+    """
+    The revisions a baseline at `up_to` replaces: `up_to` and all of its
+    ancestors.
+
+    Args:
+        script: The project's Alembic script directory
+        up_to: Target revision (id, prefix, 'head' or 'heads')
+
+    Returns:
+        Script objects, newest first
+
+    Raises:
+        SquashError: If the target is ambiguous, or a revision that isn't
+            being squashed branches off from the middle of the squashed range
+    """
+    try:
+        target = script.get_revision(up_to)
+    except Exception as e:
+        raise SquashError(str(e))
+    if target is None:
+        raise SquashError(f"No revision '{up_to}' to squash up to")
+
+    squashed = list(script.iterate_revisions(target.revision, "base"))
+    ids = {revision.revision for revision in squashed}
+    for revision in script.walk_revisions():
+        if revision.revision in ids:
+            continue
+        parents = set(to_tuple(revision.down_revision, default=())) & ids
+        if parents - {target.revision}:
+            raise SquashError(
+                f"Revision {revision.revision} branches off {', '.join(sorted(parents))}, "
+                f"inside the range being squashed; squash up to an earlier revision or merge first"
+            )
+    return squashed
+
+
+def _writes_data(source: str) -> bool:
+    """True if the upgrade() of a revision's source calls op.bulk_insert,
+    or op.execute with INSERT/UPDATE/DELETE SQL or expressions."""
+    tree = ast.parse(source)
+    upgrade = next((node for node in tree.body
+                    if isinstance(node, ast.FunctionDef) and node.name == "upgrade"), None)
+    if upgrade is None:
+        return False
+    # SQL kept in a variable or module constant is passed to execute() by name
+    sql_constants = [node.value for node in ast.walk(tree)
+                     if isinstance(node, ast.Constant) and isinstance(node.value, str)
+                     and re.match(r"\s*(insert|update|delete)\b", node.value, re.IGNORECASE)]
+    for node in ast.walk(upgrade):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            continue
+        if node.func.attr == "bulk_insert":
+            return True
+        if node.func.attr == "execute" and node.args:
+            if _DML.search(ast.unparse(node.args[0])):
+                return True
+            if isinstance(node.args[0], ast.Name) and sql_constants:
+                return True
+    return False
+
+
+def check_schema_only(squashed: List) -> None:
+    """
+    Refuse to squash revisions that migrate data, which a schema-only
+    baseline would silently drop from every fresh database.
+
+    Args:
+        squashed: Revisions being replaced
+
+    Raises:
+        SquashError: Naming the revisions whose upgrade writes rows
+    """
+    writing = [revision.revision for revision in squashed
+               if _writes_data(Path(revision.path).read_text(encoding="utf-8"))]
+    if writing:
+        raise SquashError(
+            f"Revision(s) {', '.join(reversed(writing))} insert, update or delete rows in upgrade(); "
+            f"the baseline only recreates the schema, so fresh databases would lose that data. "
+            f"Move the data into a postmigrate hook, or squash up to an earlier revision"
+        )
+
+
+def reflect_schema(connection, exclude=("alembic_version",)) -> sa.MetaData:
+    """The tables of a database, less the excluded ones."""
+    metadata = sa.MetaData()
+    metadata.reflect(bind=connection)
+    for name in exclude:
+        if name in metadata.tables:
+            metadata.remove(metadata.tables[name])
+    return metadata
+
+
+def _without_tables(name, type_, parent_names) -> bool:
+    return type_ != "table"
+
+
+def render_schema(connection, exclude=("alembic_version",)):
+    """
+    Render Alembic operations that create the schema of a database from
+    nothing.
+
+    Args:
+        connection: Connection to the database whose schema to render
+
+    Returns:
+        (upgrade code, downgrade code, extra import lines)
+    """
+    metadata = reflect_schema(connection, exclude)
+
+    # Compare against the same database with its tables hidden, so every
+    # table comes out as a create_table (with its indexes and constraints),
+    # rendered for this database's dialect.
+    context = MigrationContext.configure(connection, opts={"include_name": _without_tables})
+    migration = produce_migrations(context, metadata)
+
+    upgrades = render_python_code(migration.upgrade_ops)
+    downgrades = render_python_code(migration.downgrade_ops)
+    modules = sorted(set(_DIALECT_MODULE.findall(upgrades + downgrades)))
+    imports = "\n".join(f"from sqlalchemy.dialects import {module}" for module in modules)
+    return upgrades, downgrades, imports
+
+
+def verify_baseline(connection, upgrades: str, imports: str = "", exclude=("alembic_version",)) -> None:
+    """
+    Check that the rendered baseline recreates the schema of the database
+    it was rendered from: drop the database's tables, run the baseline's
+    upgrade on it, and compare the result with the original schema.
+
+    Args:
+        connection: Connection to the (disposable) database render_schema() read
+        upgrades: Rendered upgrade() body
+        imports: Extra import lines for the baseline
+
+    Raises:
+        SquashError: If the schemas differ
+    """
+    from alembic.autogenerate import compare_metadata
+    from alembic.operations import Operations
+
+    expected = reflect_schema(connection, exclude)
+    expected.drop_all(connection)
+
+    namespace = {"sa": sa, "op": Operations(MigrationContext.configure(connection))}
+    exec(imports + "\n\ndef upgrade():\n    " + upgrades, namespace)
+    namespace["upgrade"]()
+
+    context = MigrationContext.configure(connection, opts={
+        "include_name": lambda name, type_, parent_names: type_ != "table" or name not in exclude,
+        "compare_type": True,
+        "compare_server_default": True,
+    })
+    differences = compare_metadata(context, expected)
+    if differences:
+        listed = "\n".join(f"  {difference}" for difference in differences)
+        raise SquashError(f"The squashed baseline doesn't reproduce the replayed schema:\n{listed}")
+
+
+def write_baseline(script: ScriptDirectory, squashed: List, upgrades: str, downgrades: str,
+                   imports: str = "") -> Path:
+    """
+    Move the squashed revision files out of versions/ and write the baseline
+    revision in their place, under the newest squashed revision's id.
+
+    Args:
+        script: The project's Alembic script directory
+        squashed: Revisions being replaced, newest first
+        upgrades: Rendered upgrade() body
+        downgrades: Rendered downgrade() body
+        imports: Extra import lines for the revision file
+
+    Returns:
+        Path of the baseline revision file
+    """
+    target = squashed[0]
+    versions_dir = Path(target.path).parent
+    archive = Path(script.dir) / SQUASHED_DIR / target.revision
+    archive.mkdir(parents=True, exist_ok=True)
+    for revision in squashed:
+        shutil.move(revision.path, archive / Path(revision.path).name)
+    shutil.rmtree(versions_dir / "__pycache__", ignore_errors=True)
+
+    path = versions_dir / f"{target.revision}_squashed_baseline.py"
+    template_to_file(
+        str(Path(script.dir) / "script.py.mako"),
+        str(path),
+        script.output_encoding,
+        up_revision=target.revision,
+        down_revision=None,
+        branch_labels=tuple(sorted(target.branch_labels)) or None,
+        depends_on=None,
+        create_date=datetime.now(),
+        comma=format_as_comma,
+        message=f"Squashed baseline of {len(squashed)} revision(s) up to {target.revision}",
+        upgrades=upgrades,
+        downgrades=downgrades,
+        imports=imports,
+    )
+    return path
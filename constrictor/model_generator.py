@@ -0,0 +1,189 @@
+"""
+Model code generation for Constrictor's YAML templates.
+
+Renders the `models:` section of a module template into a models.py of
+db.Model classes. Indexes, unique constraints and foreign keys are part of
+the declaration, so `constrictor db migrate` picks them up with the tables
+instead of someone remembering to add them after the first slow query:
+
+    models:
+      - name: "{{module_name|title}}Model"
+        table: "{{module_name}}"
+        columns:
+          - {name: id, type: Integer, primary_key: true}
+          - {name: name, type: String(255), nullable: false, index: true}
+          - {name: owner_id, type: Integer, foreign_key: auth_user.id, ondelete: CASCADE}
+          - {name: created_at, type: DateTime, auto_now: true}
+          - {name: updated_at, type: DateTime, auto_update: true, index: true}
+        indexes:
+          - columns: [owner_id, created_at]
+        unique:
+          - [owner_id, name]
+"""
+
+import re
+from typing import Any, Dict, List
+
+import sqlalchemy
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_]\w*$")
+_COLUMN_TYPE = re.compile(r"^(\w+)\s*(?:\(\s*(\d+(?:\s*,\s*\d+)*)?\s*\))?$")
+_FOREIGN_KEY = re.compile(r"^\w+(?:\.\w+)?\.\w+$")
+
+# Column types whose values to_dict() serializes with isoformat()
+_TEMPORAL_TYPES = {"Date", "DateTime", "Time"}
+
+# Keys a column may declare, in the order they're rendered
+_COLUMN_FLAGS = ("primary_key", "nullable", "unique", "index")
+
+
+def _identifier(value: Any, what: str) -> str:
+    if not isinstance(value, str) or not _IDENTIFIER.match(value):
+        raise ValueError(f"Invalid {what}: {value!r}")
+    return value
+
+
+def column_type(spec: str) -> str:
+    """
+    Turn a YAML column type such as 'String(255)' or 'Numeric(10, 2)' into
+    its db.<Type>(...) expression.
+
+    Raises:
+        ValueError: If the type isn't a SQLAlchemy type
+    """
+    match = _COLUMN_TYPE.match(str(spec).strip())
+    type_class = getattr(sqlalchemy, match.group(1), None) if match else None
+    if not (isinstance(type_class, type) and issubclass(type_class, sqlalchemy.types.TypeEngine)):
+        raise ValueError(f"Unknown column type: {spec!r}")
+    args = match.group(2)
+    if args is None:
+        return f"db.{match.group(1)}"
+    return f"db.{match.group(1)}({', '.join(arg.strip() for arg in args.split(','))})"
+
+
+def _column_names(columns: Any, model: Dict[str, Any], declared: List[str], what: str) -> List[str]:
+    if isinstance(columns, str):
+        columns = [columns]
+    if not columns or not isinstance(columns, list):
+        raise ValueError(f"Model '{model['name']}': {what} needs a list of columns")
+    for column in columns:
+        if column not in declared:
+            raise ValueError(f"Model '{model['name']}': {what} refers to unknown column '{column}'")
+    return columns
+
+
+def _render_column(column: Dict[str, Any]) -> str:
+    args = [column_type(column.get("type", "String(255)"))]
+    if column.get("foreign_key"):
+        target = column["foreign_key"]
+        if not _FOREIGN_KEY.match(str(target)):
+            raise ValueError(f"Invalid foreign key for column '{column['name']}': {target!r}")
+        fk_args = [repr(target)]
+        if column.get("ondelete"):
+            fk_args.append(f"ondelete={column['ondelete']!r}")
+        args.append(f"db.ForeignKey({', '.join(fk_args)})")
+    for flag in _COLUMN_FLAGS:
+        if flag in column:
+            args.append(f"{flag}={bool(column[flag])}")
+    if column.get("auto_now") or column.get("auto_update"):
+        args.append("default=datetime.utcnow")
+        if column.get("auto_update"):
+            args.append("onupdate=datetime.utcnow")
+    elif "default" in column:
+        args.append(f"default={column['default']!r}")
+    return f"    {column['name']} = db.Column({', '.join(args)})\n"
+
+
+def _render_table_args(model: Dict[str, Any], table: str, declared: List[str]) -> str:
+    entries = []
+    for index in model.get("indexes") or []:
+        if not isinstance(index, dict):
+            index = {"columns": index}
+        columns = _column_names(index.get("columns"), model, declared, "index")
+        name = index.get("name") or f"ix_{table}_{'_'.join(columns)}"
+        unique = ", unique=True" if index.get("unique") else ""
+        entries.append(f"db.Index({name!r}, {', '.join(repr(c) for c in columns)}{unique})")
+    for constraint in model.get("unique") or []:
+        if not isinstance(constraint, dict):
+            constraint = {"columns": constraint}
+        columns = _column_names(constraint.get("columns"), model, declared, "unique constraint")
+        name = constraint.get("name") or f"uq_{table}_{'_'.join(columns)}"
+        entries.append(f"db.UniqueConstraint({', '.join(repr(c) for c in columns)}, name={name!r})")
+    if not entries:
+        return ""
+    body = "".join(f"        {entry},\n" for entry in entries)
+    return f"    __table_args__ = (\n{body}    )\n"
+
+
+def _render_to_dict(columns: List[Dict[str, Any]]) -> str:
+    lines = []
+    for column in columns:
+        name = column["name"]
+        type_name = _COLUMN_TYPE.match(str(column.get("type", "String")).strip()).group(1)
+        if type_name in _TEMPORAL_TYPES:
+            value = f"self.{name}.isoformat() if self.{name} else None"
+        else:
+            value = f"self.{name}"
+        lines.append(f"            '{name}': {value},\n")
+    return (
+        "    def to_dict(self):\n"
+        "        return {\n"
+        + "".join(lines)
+        + "        }\n"
+    )
+
+
+def render_model(model: Dict[str, Any]) -> str:
+    """
+    Render one model declaration as a db.Model class.
+
+    Raises:
+        ValueError: If the declaration is invalid
+    """
+    name = _identifier(model.get("name"), "model name")
+    table = model.get("table") or name.lower()
+    _identifier(table, f"table name for model '{name}'")
+    columns = model.get("columns") or []
+    if not columns:
+        raise ValueError(f"Model '{name}' declares no columns")
+    for column in columns:
+        _identifier(column.get("name"), f"column name in model '{name}'")
+    declared = [column["name"] for column in columns]
+    if not any(column.get("primary_key") for column in columns):
+        raise ValueError(f"Model '{name}' has no primary_key column")
+
+    description = model.get("description") or f"Model for the {table} table."
+    code = f"class {name}(db.Model):\n"
+    code += f'    """{description}"""\n\n'
+    code += f'    __tablename__ = "{table}"\n'
+    code += _render_table_args(model, table, declared)
+    code += "\n"
+    code += "".join(_render_column(column) for column in columns)
+    code += "\n"
+    code += _render_to_dict(columns)
+    return code
+
+
+def render_models(module_name: str, models: List[Dict[str, Any]]) -> str:
+    """
+    Render a module's models.py from its template's `models:` section.
+
+    Args:
+        module_name: Name of the module being generated
+        models: Model declarations (already Jinja-rendered)
+
+    Returns:
+        models.py source
+    """
+    uses_datetime = any(column.get("auto_now") or column.get("auto_update")
+                        for model in models for column in model.get("columns") or [])
+    code = f"# {module_name} models\n"
+    code += "# Generated from the `models:` section of the module template. Import `db`\n"
+    code += "# from constrictor (never a new SQLAlchemy()) so these tables register on the\n"
+    code += "# shared metadata that `constrictor db migrate` autogenerates revisions from.\n"
+    if uses_datetime:
+        code += "from datetime import datetime\n\n"
+    code += "from constrictor import db\n"
+    for model in models:
+        code += "\n\n" + render_model(model)
+    return code
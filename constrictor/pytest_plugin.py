@@ -0,0 +1,175 @@
+"""
+Pytest fixtures for Constrictor projects (registered through the `pytest11`
+entry point, so installing constrictor is enough to make them available).
+
+Creating the `auth_` tables and every module's tables for each test is the
+slowest part of a database test. These fixtures build the schema once per
+session straight from `db.metadata` into a template SQLite file, then give
+each test its isolation cheaply:
+
+- `constrictor_app` binds a fresh app to a byte-for-byte copy of the
+  template - full isolation, even for code that commits or runs DDL.
+- `constrictor_db_session` shares one database for the whole session and
+  wraps each test in a transaction that is rolled back afterwards; commits
+  made by the code under test only release a SAVEPOINT.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from .auth import login_manager
+from .blueprint_loader import load
+from .db import db
+
+TEMPLATE_DB_NAME = "template.db"
+
+
+def _project_root(config) -> Path:
+    """
+    The Constrictor project under test: the first of the current directory,
+    pytest's rootdir and its parents that has a modules/ directory.
+    """
+    rootpath = Path(config.rootpath)
+    for candidate in (Path.cwd(), rootpath, *rootpath.parents):
+        if (candidate / "modules").is_dir():
+            return candidate
+    return Path.cwd()
+
+
+def create_test_app(root_path: Path, database_uri: str, **config) -> Flask:
+    """
+    Build a Flask app for tests, wired like a generated project's app.py
+    (shared db, login manager, every module's blueprints and models) but
+    bound to the given database.
+
+    Args:
+        root_path: Project root (the directory containing modules/)
+        database_uri: SQLAlchemy database URI
+        **config: Extra config values, applied before load() so that its
+            CONSTRICTOR_* switches take effect
+
+    Returns:
+        Configured Flask application
+    """
+    app = Flask("constrictor_test_app", root_path=str(root_path), template_folder="templates")
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY="constrictor-test",
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    app.config.update(config)
+    db.init_app(app)
+    login_manager.init_app(app)
+    # Imports every module's routes and models, so db.metadata is complete
+    load(app)
+    return app
+
+
+def _dispose(app: Flask) -> None:
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _enable_sqlite_savepoints(engine) -> None:
+    """
+    Let pysqlite's transactions nest properly. By default the driver issues
+    BEGIN lazily and on its own terms, so SAVEPOINTs don't roll back as
+    expected; the fix is to take over transaction handling entirely.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def constrictor_project_root(pytestconfig) -> Path:
+    """Root directory of the Constrictor project under test."""
+    return _project_root(pytestconfig)
+
+
+@pytest.fixture(scope="session")
+def constrictor_db_template(constrictor_project_root, tmp_path_factory) -> Path:
+    """
+    Path to a SQLite file holding the full schema (built once per session
+    with db.create_all(), not by replaying migrations). Treat it as
+    read-only; the other fixtures hand out copies of it.
+    """
+    path = tmp_path_factory.mktemp("constrictor_db") / TEMPLATE_DB_NAME
+    app = create_test_app(constrictor_project_root, f"sqlite:///{path}")
+    with app.app_context():
+        db.create_all()
+    _dispose(app)
+    return path
+
+
+@pytest.fixture
+def constrictor_app(constrictor_project_root, constrictor_db_template, tmp_path):
+    """
+    An app bound to its own copy of the template database, with an app
+    context pushed for the duration of the test.
+    """
+    path = tmp_path / "test.db"
+    shutil.copyfile(constrictor_db_template, path)
+    app = create_test_app(constrictor_project_root, f"sqlite:///{path}")
+    with app.app_context():
+        yield app
+        db.session.remove()
+    _dispose(app)
+
+
+@pytest.fixture
+def constrictor_client(constrictor_app):
+    """Test client for `constrictor_app`."""
+    return constrictor_app.test_client()
+
+
+@pytest.fixture(scope="session")
+def _constrictor_shared_app(constrictor_project_root, constrictor_db_template, tmp_path_factory):
+    path = tmp_path_factory.mktemp("constrictor_db") / "shared.db"
+    shutil.copyfile(constrictor_db_template, path)
+    app = create_test_app(constrictor_project_root, f"sqlite:///{path}")
+    with app.app_context():
+        _enable_sqlite_savepoints(db.engine)
+    yield app
+    _dispose(app)
+
+
+@pytest.fixture
+def constrictor_db_session(_constrictor_shared_app):
+    """
+    `db.session`, bound to a single connection of the session-wide database
+    inside a transaction that is rolled back when the test ends.
+
+    The session joins that transaction with SAVEPOINTs, so `commit()` and
+    `rollback()` in the code under test behave normally without ever
+    reaching the database for real. Faster than `constrictor_app`, but
+    doesn't isolate DDL or work done on other connections.
+    """
+    app = _constrictor_shared_app
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        original_session = db.session
+        # A plain SQLAlchemy session: Flask-SQLAlchemy's own Session class
+        # picks the app's engine in get_bind() and would ignore `bind`.
+        db.session = scoped_session(
+            sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
+        )
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+            db.session = original_session
+            transaction.rollback()
+            connection.close()
@@ -0,0 +1,146 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+When enabled - CONSTRICTOR_QUERY_STATS, which defaults to the app's debug
+flag - load() times every statement a request sends through any SQLAlchemy
+engine, and reports the totals on the response:
+
+    X-Query-Count: 14
+    X-Query-Time: 3.21
+    Server-Timing: db;dur=3.21;desc="14 queries"
+
+and in one log line per request (logger "constrictor.querystats"). The same
+statement text run CONSTRICTOR_N_PLUS_ONE_THRESHOLD times or more in one
+request is almost always a loop issuing one query per row where a join or
+IN query would do; those statements, and requests issuing more than
+CONSTRICTOR_QUERY_WARN_COUNT statements in total, are logged as warnings
+and counted in X-Query-Repeated.
+
+The engine hooks are installed once per process and cost a context-variable
+lookup per statement while no request is being tracked.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARN_COUNT = 30
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# Longest statement text quoted in a warning
+_STATEMENT_PREVIEW = 200
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("constrictor_query_stats", default=None)
+
+
+class QueryStats:
+    """Statements issued in one request: how many, how long, and which."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements run at least threshold times, most frequent first."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+def current_stats() -> Optional[QueryStats]:
+    """The stats of the request being tracked in this context, if any."""
+    return _current.get()
+
+
+def track() -> QueryStats:
+    """Start tracking statements in this context (or return the stats
+    already being collected)."""
+    _install_engine_hooks()
+    stats = _current.get()
+    if stats is None:
+        stats = QueryStats()
+        _current.set(stats)
+    return stats
+
+
+def stop() -> None:
+    """Stop tracking statements in this context."""
+    _current.set(None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("constrictor_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("constrictor_query_start")
+    if starts:
+        stats.duration += time.perf_counter() - starts.pop()
+    stats.count += 1
+    if not executemany:
+        # Parameters are bound separately, so identical text is the same
+        # statement shape whatever the values
+        stats.statements[statement] += 1
+
+
+def _install_engine_hooks() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_query_stats(app) -> None:
+    """Track statements per request, if CONSTRICTOR_QUERY_STATS (default:
+    app.debug) is set."""
+    if not app.config.get("CONSTRICTOR_QUERY_STATS", app.debug):
+        return
+    if "constrictor_query_stats" in app.extensions:
+        return
+    app.extensions["constrictor_query_stats"] = True
+    warn_count = app.config.get("CONSTRICTOR_QUERY_WARN_COUNT", DEFAULT_WARN_COUNT)
+    threshold = app.config.get("CONSTRICTOR_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+    _install_engine_hooks()
+
+    @app.before_request
+    def _start_query_stats():
+        track()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        milliseconds = stats.duration * 1000
+        repeated = stats.repeated(threshold)
+        response.headers["X-Query-Count"] = str(stats.count)
+        response.headers["X-Query-Time"] = f"{milliseconds:.2f}"
+        response.headers["X-Query-Repeated"] = str(len(repeated))
+        response.headers.add("Server-Timing", f'db;dur={milliseconds:.2f};desc="{stats.count} queries"')
+
+        summary = f"{request.method} {request.path} {response.status_code}: " \
+                  f"{stats.count} queries in {milliseconds:.2f} ms"
+        if stats.count > warn_count:
+            logger.warning(f"{summary} (more than {warn_count})")
+        else:
+            logger.info(summary)
+        for statement, n in repeated:
+            preview = " ".join(statement.split())[:_STATEMENT_PREVIEW]
+            logger.warning(f"Possible N+1 in {request.method} {request.path}: ran {n} times: {preview}")
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        stop()
@@ -0,0 +1,209 @@
+"""
+Fast JSON encoding for responses and model rows.
+
+With CONSTRICTOR_JSON = True, load() replaces Flask's default JSON provider
+with JSONProvider, which jsonify() and returned dicts go through. It uses
+orjson when it's installed (`pip install constrictor-framework[fast]`) and
+the standard library otherwise, with compact separators and without sorting
+keys. It's opt-in because it changes the wire format (see below).
+
+Model instances serialize through an encoder built once per class: the
+column names, a single attrgetter for their values and a converter for each
+column whose values aren't JSON types (dates, times, decimals, UUIDs), all
+worked out from the mapper when the class is first encoded. Encoding a row
+is then one C-level attribute fetch plus the conversions it actually needs,
+instead of walking the mapper and type-checking every value each time.
+Models get the same encoder as their to_dict() from SerializerMixin:
+
+    class ArticleModel(SerializerMixin, db.Model):
+        ...
+
+Dates and times are encoded as ISO 8601 (matching the to_dict() methods
+generated from `models:`), not as HTTP dates like Flask's default provider.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import inspect
+from sqlalchemy.exc import NoInspectionAvailable
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+Encoder = Callable[[Any], Dict[str, Any]]
+
+_encoders: Dict[type, Encoder] = {}
+
+
+def json_value(value):
+    """A column value as a JSON type; other values are returned as they are."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _converter(column_attr) -> Optional[Callable]:
+    """How to make a column's values JSON-ready, or None if they already are."""
+    column = column_attr.columns[0]
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return json_value
+    if issubclass(python_type, (datetime.datetime, datetime.date, datetime.time)):
+        return _isoformat
+    if issubclass(python_type, (decimal.Decimal, uuid.UUID)):
+        return _str
+    if issubclass(python_type, (str, int, float, bool, dict, list)):
+        return None
+    return json_value
+
+
+def _build_encoder(model) -> Encoder:
+    attrs = inspect(model).column_attrs
+    keys = tuple(attr.key for attr in attrs)
+    if not keys:
+        return lambda obj: {}
+    getter = attrgetter(*keys)
+    conversions = tuple(
+        (index, converter)
+        for index, converter in enumerate(_converter(attr) for attr in attrs)
+        if converter is not None
+    )
+
+    def encode(obj) -> Dict[str, Any]:
+        values = getter(obj)
+        if len(keys) == 1:
+            values = (values,)
+        if conversions:
+            values = list(values)
+            for index, converter in conversions:
+                values[index] = converter(values[index])
+        return dict(zip(keys, values))
+
+    return encode
+
+
+def encoder_for(model) -> Encoder:
+    """
+    The cached row encoder for a model class.
+
+    Args:
+        model: A mapped model class
+
+    Returns:
+        A function from an instance to a dict of its column values, ready
+        for JSON encoding
+    """
+    encoder = _encoders.get(model)
+    if encoder is None:
+        encoder = _encoders[model] = _build_encoder(model)
+    return encoder
+
+
+class SerializerMixin:
+    """Gives a model a to_dict() of its columns, using its cached encoder."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return encoder_for(type(self))(self)
+
+
+def default(obj):
+    """Encode what json/orjson can't: model instances (their to_dict(), or
+    their columns), dates, decimals, UUIDs, dataclasses and Markup."""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    value = json_value(obj)
+    if value is not obj:
+        return value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    try:
+        return encoder_for(type(obj))(obj)
+    except NoInspectionAvailable:
+        pass
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """
+    Encode obj as UTF-8 JSON, with orjson when it's installed.
+
+    Args:
+        obj: The value to encode
+        indent: Indent by two spaces instead of encoding compactly
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default,
+                                option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib handles those
+            pass
+    if indent:
+        return json.dumps(obj, default=default, ensure_ascii=False, indent=2).encode()
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider using dumps() above. Subclass it, or set
+    app.json_provider_class to another provider before calling load(), to
+    plug in a different serializer.
+    """
+
+    default = staticmethod(default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs and not self.sort_keys:
+            return dumps(obj).decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.sort_keys:
+            return super().response(obj)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app) -> None:
+    """Install JSONProvider if CONSTRICTOR_JSON is set, unless the app
+    already uses a provider of its own."""
+    if app.config.get("CONSTRICTOR_JSON", False) and type(app.json) is DefaultJSONProvider:
+        app.json = JSONProvider(app)
@@ -0,0 +1,147 @@
+"""
+Sharded, parallel test runner for Constrictor projects.
+
+Each module's tests/ directory is a natural shard: modules don't import each
+other's tests and each one runs in its own pytest process, so shards can run
+concurrently with no shared state. Output is streamed line by line as it's
+produced rather than captured until the end, and each shard's wall time is
+recorded so the next run can start the slowest modules first (longest-
+processing-time-first scheduling keeps one slow module from becoming the
+tail of the whole run).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Per-project cache of shard durations, relative to the project root.
+DURATIONS_FILE = Path(".constrictor") / "test_durations.json"
+
+# pytest's exit code when a run collected no tests.
+NO_TESTS_COLLECTED = 5
+
+
+def pytest_command(paths: Sequence[str] = ()) -> List[str]:
+    """The pytest invocation `constrictor test` uses for the given paths."""
+    return [sys.executable, "-m", "pytest", "-v"] + list(paths)
+
+
+def stream_command(command: List[str], echo: Callable[[str], None],
+                   prefix: str = "") -> int:
+    """
+    Run a command, echoing each line of its combined stdout/stderr as soon as
+    it's written.
+
+    Args:
+        command: Command to run as list of strings
+        echo: Called with each output line (without trailing newline)
+        prefix: Prepended to every echoed line
+
+    Returns:
+        The command's exit code
+    """
+    # Python block-buffers stdout when it's a pipe; without this, output
+    # would still arrive in large chunks rather than as it happens.
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env=env,
+    )
+    for line in process.stdout:
+        echo(prefix + line.rstrip("\n"))
+    return process.wait()
+
+
+def load_durations(path: Path = DURATIONS_FILE) -> Dict[str, float]:
+    """Load recorded shard durations ({module: seconds}), if any."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_durations(durations: Dict[str, float], path: Path = DURATIONS_FILE) -> None:
+    """Merge new shard durations into the recorded ones."""
+    merged = load_durations(path)
+    merged.update(durations)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(merged.items())), f, indent=2)
+
+
+def order_shards(shards: List[Tuple[str, str]], durations: Dict[str, float]) -> List[Tuple[str, str]]:
+    """
+    Order shards slowest-first by their last recorded duration. Shards with
+    no recorded duration go first, since they could be the slowest of all.
+    """
+    return sorted(shards, key=lambda shard: -durations.get(shard[0], float("inf")))
+
+
+def combine_exit_codes(codes: Sequence[int]) -> int:
+    """
+    Reduce per-shard pytest exit codes to one, the way a single pytest run
+    over all shards would report: failures win, then other errors, and
+    "no tests collected" only if no shard collected anything.
+    """
+    if not codes:
+        return NO_TESTS_COLLECTED
+    if 1 in codes:
+        return 1
+    errors = [code for code in codes if code not in (0, NO_TESTS_COLLECTED)]
+    if errors:
+        return errors[0]
+    if all(code == NO_TESTS_COLLECTED for code in codes):
+        return NO_TESTS_COLLECTED
+    return 0
+
+
+def run_shards(shards: List[Tuple[str, str]], jobs: int, echo: Callable[[str], None],
+               durations_path: Optional[Path] = DURATIONS_FILE) -> int:
+    """
+    Run each (module, tests path) shard in its own pytest process, at most
+    `jobs` at a time, streaming output prefixed with the module name.
+
+    Args:
+        shards: (module name, tests directory) pairs
+        jobs: Maximum number of concurrent pytest processes
+        echo: Called with each output line; calls are serialized
+        durations_path: Where shard durations are read from and recorded
+            (None to neither read nor record them)
+
+    Returns:
+        Combined pytest exit code (see combine_exit_codes)
+    """
+    recorded = load_durations(durations_path) if durations_path else {}
+    lock = threading.Lock()
+    durations: Dict[str, float] = {}
+
+    def locked_echo(line):
+        with lock:
+            echo(line)
+
+    def run_shard(shard):
+        module_name, tests_path = shard
+        start = time.monotonic()
+        code = stream_command(pytest_command([tests_path]), locked_echo, prefix=f"[{module_name}] ")
+        elapsed = time.monotonic() - start
+        durations[module_name] = round(elapsed, 3)
+        locked_echo(f"[{module_name}] finished in {elapsed:.2f}s (exit code {code})")
+        return code
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        codes = list(executor.map(run_shard, order_shards(shards, recorded)))
+
+    if durations_path:
+        save_durations(durations, durations_path)
+    return combine_exit_codes(codes)
@@ -13,6 +13,15 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional, Set
 from datetime import datetime
 
+from .file_writer import atomic_write
+
+
+# Per-module files _load_template_metadata reads, in priority order.
+TEMPLATE_METADATA_FILES = ("template.yml", "template.yaml", "swagger.yml", "swagger.yaml")
+
+# Everything the generated spec depends on, relative to the project root.
+WATCH_PATTERNS = ["modules/*/routes.py"] + [f"modules/*/{name}" for name in TEMPLATE_METADATA_FILES]
+
 
 class SwaggerGenerator:
     """Generator for Swagger/OpenAPI documentation from Constrictor modules."""
@@ -54,6 +63,13 @@ class SwaggerGenerator:
             "tags": []
         }
         self.processed_modules: Set[str] = set()
+        # (openapi_path, method) pairs each module contributed, so a single
+        # module can be dropped and re-processed without a full rebuild.
+        self._module_operations: Dict[str, List[tuple]] = {}
+        # Which module currently owns each (openapi_path, method): when two
+        # modules declare the same operation, the later one wins, and
+        # dropping the earlier one must leave it alone.
+        self._operation_owners: Dict[tuple, str] = {}
     
     def build(self) -> Dict[str, Any]:
         """
@@ -62,6 +78,11 @@ class SwaggerGenerator:
         Returns:
             Complete Swagger/OpenAPI specification
         """
+        self.swagger_spec["paths"] = {}
+        self.processed_modules.clear()
+        self._module_operations.clear()
+        self._operation_owners.clear()
+
         modules = self._discover_modules()
         
         if not modules:
@@ -75,6 +96,41 @@ class SwaggerGenerator:
         self._add_module_tags()
         
         return self.swagger_spec
+
+    def refresh_modules(self, module_names: Set[str]) -> None:
+        """
+        Re-process only the given modules, leaving every other module's
+        paths untouched. A module whose routes.py no longer exists is
+        dropped from the spec.
+
+        Args:
+            module_names: Names of the modules whose files changed
+        """
+        for module_name in module_names:
+            self._remove_module(module_name)
+            if (self.modules_path / module_name / "routes.py").exists():
+                self._process_module(module_name)
+
+        self._add_module_tags()
+
+    def _remove_module(self, module_name: str) -> None:
+        """
+        Remove every operation a module previously contributed.
+
+        Args:
+            module_name: Name of the module to remove
+        """
+        paths = self.swagger_spec["paths"]
+        for openapi_path, method in self._module_operations.pop(module_name, []):
+            if self._operation_owners.get((openapi_path, method)) != module_name:
+                continue
+            del self._operation_owners[(openapi_path, method)]
+            operations = paths.get(openapi_path, {})
+            operations.pop(method, None)
+            if not operations:
+                paths.pop(openapi_path, None)
+
+        self.processed_modules.discard(module_name)
     
     def _discover_modules(self) -> List[str]:
         """
@@ -144,12 +200,7 @@ class SwaggerGenerator:
         """
         # Look for template files in the module directory
         module_dir = self.modules_path / module_name
-        template_files = [
-            module_dir / "template.yml",
-            module_dir / "template.yaml",
-            module_dir / "swagger.yml",
-            module_dir / "swagger.yaml"
-        ]
+        template_files = [module_dir / name for name in TEMPLATE_METADATA_FILES]
         
         for template_file in template_files:
             if template_file.exists():
@@ -416,6 +467,8 @@ class SwaggerGenerator:
                 operation["parameters"] = path_parameters
         
         self.swagger_spec["paths"][openapi_path][method] = operation
+        self._module_operations.setdefault(route_info['module_name'], []).append((openapi_path, method))
+        self._operation_owners[(openapi_path, method)] = route_info['module_name']
     
     def _extract_path_parameters(self, path: str) -> List[Dict[str, Any]]:
         """
@@ -454,8 +507,13 @@ class SwaggerGenerator:
         return parameters
     
     def _add_module_tags(self) -> None:
-        """Add module tags to the Swagger specification."""
-        for module_name in self.processed_modules:
+        """Add module tags to the Swagger specification.
+
+        Rebuilds the tag list from scratch so it can be called again after
+        refresh_modules() without duplicating tags.
+        """
+        self.swagger_spec["tags"] = []
+        for module_name in sorted(self.processed_modules):
             tag = {
                 "name": module_name,
                 "description": f"Operations for {module_name} module"
@@ -465,21 +523,25 @@ class SwaggerGenerator:
     def save_to_file(self, output_path: Path, format: str = 'json') -> None:
         """
         Save Swagger specification to file.
+
+        The file is written to a temporary sibling and renamed into place, so
+        a Swagger UI server (or anything else) reading it concurrently sees
+        either the old or the new spec, never a half-written one.
         
         Args:
             output_path: Path where to save the file
             format: Output format ('json' or 'yaml')
         """
         if format == 'json':
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(self.swagger_spec, f, indent=2, ensure_ascii=False)
+            content = json.dumps(self.swagger_spec, indent=2, ensure_ascii=False)
         elif format == 'yaml':
-            with open(output_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.swagger_spec, f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=False)
+            content = yaml.dump(self.swagger_spec, default_flow_style=False,
+                                allow_unicode=True, sort_keys=False)
         else:
             raise ValueError(f"Unsupported format: {format}")
 
+        atomic_write(output_path, content)
+
 
 def generate_swagger_docs(project_path: Path, output_path: Path, 
                          format: str = 'json') -> Dict[str, Any]:
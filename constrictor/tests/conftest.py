@@ -0,0 +1,28 @@
+import pytest
+
+from constrictor.db import db
+from constrictor.pytest_plugin import create_test_app
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Factory for an app rooted at tmp_path (see create_test_app) on its own
+    SQLite file, with the tables of every model defined so far created.
+    Keyword arguments are config values, applied before load().
+    """
+    apps = []
+
+    def make(**config):
+        app = create_test_app(tmp_path, f"sqlite:///{tmp_path / 'test.db'}", **config)
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
@@ -0,0 +1,92 @@
+import gzip
+import json
+
+from click.testing import CliRunner
+from flask import render_template_string
+
+from constrictor.assets import build_assets, fingerprint_name
+from constrictor.cli import main
+
+CSS = 'body { color: red; }\n' * 50
+
+
+def make_project(root):
+    static = root / 'modules' / 'blog' / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'app.css').write_text(CSS)
+    (static / 'logo.png').write_bytes(b'\x89PNG' * 10)
+
+
+def test_fingerprint_name():
+    assert fingerprint_name('css/app.css', 'abc') == 'css/app.abc.css'
+    assert fingerprint_name('app.min.js', 'abc') == 'app.abc.min.js'
+    assert fingerprint_name('LICENSE', 'abc') == 'LICENSE.abc'
+
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    make_project(tmp_path)
+    built = {asset.source: asset for asset in build_assets(tmp_path)}
+
+    css = built['blog/css/app.css']
+    assert css.gzipped and not built['blog/logo.png'].gzipped
+    output = tmp_path / 'static' / 'assets'
+    assert (output / css.fingerprinted).read_text() == CSS
+    assert gzip.decompress((output / f'{css.fingerprinted}.gz').read_bytes()).decode() == CSS
+    manifest = json.loads((output / 'manifest.json').read_text())
+    assert manifest == {'blog/css/app.css': css.fingerprinted, 'blog/logo.png': built['blog/logo.png'].fingerprinted}
+
+    # A changed file gets a new name; the old one stays until --clean
+    (tmp_path / 'modules' / 'blog' / 'static' / 'css' / 'app.css').write_text(CSS + 'a {}\n')
+    changed = {asset.source: asset for asset in build_assets(tmp_path)}['blog/css/app.css']
+    assert changed.fingerprinted != css.fingerprinted
+    assert (output / css.fingerprinted).exists()
+    build_assets(tmp_path, clean=True)
+    assert not (output / css.fingerprinted).exists()
+
+
+def test_serves_built_assets_with_immutable_caching(tmp_path, make_app):
+    make_project(tmp_path)
+    build_assets(tmp_path)
+    app = make_app(CONSTRICTOR_ASSETS=True)
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('blog/css/app.css') }}")
+    assert url.startswith('/assets/blog/css/app.') and url.endswith('.css')
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).decode() == CSS
+    response.close()
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data.decode() == CSS
+    plain.close()
+
+    # Unbuilt paths are served from the module without long-lived caching
+    source = client.get('/assets/blog/css/app.css')
+    assert source.headers['Cache-Control'] == 'no-cache'
+    assert source.data.decode() == CSS
+    source.close()
+    assert client.get('/assets/blog/missing.css').status_code == 404
+
+
+def test_assets_route_is_opt_in(tmp_path, make_app):
+    make_project(tmp_path)
+    app = make_app()
+    assert 'constrictor_assets' not in app.blueprints
+    assert app.test_client().get('/assets/blog/css/app.css').status_code == 404
+
+
+def test_assets_build_command(tmp_path, monkeypatch):
+    make_project(tmp_path)
+    (tmp_path / 'app.py').write_text('')
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(main, ['assets', 'build'])
+    assert result.exit_code == 0, result.output
+    assert 'Built 2 asset(s) into static/assets/' in result.output
+    assert (tmp_path / 'static' / 'assets' / 'manifest.json').exists()
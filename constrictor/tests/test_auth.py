@@ -230,7 +230,7 @@ def test_generated_module_ships_access_csv():
 # ---------------------------------------------------------------------------
 
 def _make_project(runner, module_name):
-    result = runner.invoke(main, ['new', 'proj'])
+    result = runner.invoke(main, ['new', 'proj', '--no-venv'])
     assert result.exit_code == 0
     os.chdir('proj')
     result = runner.invoke(main, ['generate', module_name])
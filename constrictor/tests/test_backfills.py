@@ -0,0 +1,127 @@
+import json
+import uuid
+
+import pytest
+
+from constrictor import backfill, db
+
+
+class BackfillItem(db.Model):
+    __tablename__ = "backfill_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=True)
+
+
+class BackfillToken(db.Model):
+    __tablename__ = "backfill_token"
+
+    id = db.Column(db.Uuid, primary_key=True)
+    value = db.Column(db.Integer, nullable=True)
+
+
+def _fill(low, high):
+    return db.session.execute(
+        db.update(BackfillItem).where(BackfillItem.id.between(low, high)).values(value=BackfillItem.id * 2)
+    ).rowcount
+
+
+@pytest.fixture
+def app_ctx(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all(BackfillItem(id=i) for i in range(1, 26))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def test_backfill_processes_every_row_in_chunks(app_ctx):
+    ranges = []
+
+    def fill(low, high):
+        ranges.append((low, high))
+        return _fill(low, high)
+
+    result = backfill("double", BackfillItem, fill, batch_size=10, progress=None)
+
+    assert ranges == [(1, 10), (11, 20), (21, 25)]
+    assert result.completed and result.processed == 25 and result.changed == 25 and result.batches == 3
+    assert all(item.value == item.id * 2 for item in BackfillItem.query.all())
+
+
+def test_backfill_resumes_after_failure_and_skips_when_complete(app_ctx, tmp_path):
+    calls = []
+
+    def flaky(low, high):
+        calls.append(low)
+        if low == 11:
+            raise RuntimeError("interrupted")
+        return _fill(low, high)
+
+    with pytest.raises(RuntimeError):
+        backfill("resume", BackfillItem, flaky, batch_size=10, progress=None)
+    assert db.session.get(BackfillItem, 10).value == 20
+    assert db.session.get(BackfillItem, 11).value is None
+    checkpoint = json.loads((tmp_path / '.constrictor' / 'backfills' / 'resume.json').read_text())
+    assert checkpoint['last_pk'] == 10 and not checkpoint['completed']
+
+    result = backfill("resume", BackfillItem, lambda low, high: calls.append(low) or _fill(low, high),
+                      batch_size=10, progress=None)
+    assert calls == [1, 11, 11, 21]
+    assert result.processed == 25 and result.total == 25
+
+    result = backfill("resume", BackfillItem, lambda low, high: calls.append(low), progress=None)
+    assert result.completed and len(calls) == 4
+
+
+def test_backfill_where_and_throttle(app_ctx, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("constrictor.backfills.time.sleep", sleeps.append)
+    lags = iter([3.0, 0.5, 0.0])
+    reports = []
+
+    result = backfill("evens", BackfillItem, _fill, batch_size=100, where=BackfillItem.id > 20,
+                      sleep=0.1, lag=lambda: next(lags), max_lag=1.0, progress=reports.append)
+
+    assert result.processed == 5 and result.total == 5
+    assert db.session.get(BackfillItem, 20).value is None
+    assert sleeps == [3.0, 0.1]
+    assert reports == [result] and "5/5 rows, 5 changed (done" in result.summary()
+
+
+def test_backfill_requires_single_column_primary_key(app_ctx):
+    table = db.Table("backfill_pair", db.MetaData(), db.Column("a", db.Integer, primary_key=True),
+                     db.Column("b", db.Integer, primary_key=True))
+    with pytest.raises(ValueError):
+        backfill("pair", table, _fill, progress=None)
+
+
+def test_backfill_checkpoints_uuid_primary_key(app_ctx, tmp_path):
+    keys = sorted(uuid.UUID(int=i) for i in range(1, 6))
+    db.session.add_all(BackfillToken(id=key) for key in keys)
+    db.session.commit()
+    calls = []
+
+    def flaky(low, high):
+        calls.append((low, high))
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        return db.session.execute(
+            db.update(BackfillToken).where(BackfillToken.id.between(low, high)).values(value=1)).rowcount
+
+    with pytest.raises(RuntimeError):
+        backfill("tokens", BackfillToken, flaky, batch_size=2, progress=None)
+    checkpoint_dir = tmp_path / '.constrictor' / 'backfills'
+    assert json.loads((checkpoint_dir / 'tokens.json').read_text())['last_pk'] == str(keys[1])
+    assert not list(checkpoint_dir.glob('*.tmp'))
+
+    result = backfill("tokens", BackfillToken, flaky, batch_size=2, progress=None)
+    assert calls[2:] == [(keys[2], keys[3]), (keys[4], keys[4])]
+    assert result.completed and result.processed == 5 and result.last_pk == keys[4]
+
+
+def test_backfill_rejects_primary_key_it_cannot_checkpoint(app_ctx):
+    table = db.Table("backfill_blob", db.MetaData(), db.Column("key", db.LargeBinary, primary_key=True))
+    with pytest.raises(ValueError, match="can't checkpoint"):
+        backfill("blob", table, _fill, progress=None)
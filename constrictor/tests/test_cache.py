@@ -0,0 +1,155 @@
+import pytest
+from flask import Flask, request
+
+from constrictor import cached, current_user
+from constrictor.auth import login_manager
+from constrictor.auth_models import Role, User
+from constrictor.cache import FileStore, MemoryStore, get_store
+from constrictor.db import db
+from constrictor.yaml_parser import YamlTemplateParser
+
+
+def test_memory_store_evicts_least_recently_used_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('constrictor.cache.time.monotonic', lambda: now[0])
+    store = MemoryStore(max_entries=2)
+    store.set('a', 1, ttl=10)
+    store.set('b', 2, ttl=10)
+    assert store.get('a') == 1
+    store.set('c', 3, ttl=10)
+
+    assert store.get('b') is None
+    assert (store.get('a'), store.get('c')) == (1, 3)
+
+    now[0] = 110.0
+    assert store.get('a') is None
+    assert len(store) == 1
+
+
+def test_file_store_is_shared_between_instances(tmp_path, monkeypatch):
+    first, second = FileStore(tmp_path), FileStore(tmp_path)
+    first.set('key', {'body': b'x'}, ttl=10)
+    assert second.get('key') == {'body': b'x'}
+    assert not list(tmp_path.glob('*.tmp'))
+
+    monkeypatch.setattr('constrictor.cache.time.time', lambda: 1e12)
+    assert second.get('key') is None
+    assert not list(tmp_path.glob('*.cache'))
+
+
+def test_get_store_from_config(tmp_path):
+    app = Flask(__name__)
+    assert isinstance(get_store(app), MemoryStore)
+    assert get_store(app) is get_store(app)
+
+    app = Flask(__name__)
+    app.config.update(CONSTRICTOR_CACHE_STORE='file', CONSTRICTOR_CACHE_DIR=str(tmp_path))
+    assert get_store(app).directory == tmp_path
+
+    app = Flask(__name__)
+    app.config['CONSTRICTOR_CACHE_STORE'] = 'redis'
+    with pytest.raises(ValueError):
+        get_store(app)
+
+
+@pytest.fixture
+def cached_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SECRET_KEY'] = 'test'
+    db.init_app(app)
+    login_manager.init_app(app)
+    calls = []
+
+    @app.route('/report', methods=['GET', 'POST'])
+    @cached(ttl=30)
+    def report():
+        calls.append(request.method)
+        if request.args.get('fail'):
+            return 'nope', 500
+        who = ','.join(sorted(current_user.role_names())) if current_user.is_authenticated else 'anon'
+        return f'report for {who}'
+
+    @app.route('/public')
+    @cached(ttl=30, vary_on_roles=False)
+    def public():
+        calls.append('public')
+        return 'same for everyone'
+
+    with app.app_context():
+        db.create_all()
+        admin, editor = Role(name='admin'), Role(name='editor')
+        users = [User(email=f'{name}@example.com', password_hash='x') for name in ('a1', 'a2', 'e1')]
+        users[0].roles.append(admin)
+        users[1].roles.append(admin)
+        users[2].roles.append(editor)
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    # No app context held open across requests: Flask-Login caches the
+    # current user on it
+    yield app, calls, user_ids
+
+
+def _client(app, user_id=None):
+    client = app.test_client()
+    if user_id is not None:
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+    return client
+
+
+def test_cached_view_varies_on_role_set(cached_app):
+    app, calls, (admin1, admin2, editor) = cached_app
+
+    response = _client(app, admin1).get('/report')
+    assert response.headers['X-Cache'] == 'MISS'
+    # Same role set, different user: served from the cache
+    response = _client(app, admin2).get('/report')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.get_data(as_text=True) == 'report for admin'
+    # Different role set, or anonymous: never sees the admin response
+    assert _client(app, editor).get('/report').get_data(as_text=True) == 'report for editor'
+    assert _client(app).get('/report').get_data(as_text=True) == 'report for anon'
+    assert _client(app).get('/report?page=2').headers['X-Cache'] == 'MISS'
+    assert len(calls) == 4
+
+    for _ in range(2):
+        _client(app, editor).get('/public')
+        _client(app).get('/public')
+    assert calls.count('public') == 1
+
+
+def test_only_successful_gets_are_cached(cached_app):
+    app, calls, _ = cached_app
+    client = _client(app)
+    client.post('/report')
+    client.post('/report')
+    client.get('/report?fail=1')
+    client.get('/report?fail=1')
+    assert calls == ['POST', 'POST', 'GET', 'GET']
+
+
+def test_cache_option_generates_decorator(tmp_path):
+    (tmp_path / 'custom.yml').write_text(
+        "routes:\n"
+        "  - path: '/{{module_name}}/api/'\n"
+        "    function: api\n"
+        "    model_access: read\n"
+        "    cache: 30\n"
+        "  - path: '/{{module_name}}/stats/'\n"
+        "    function: stats\n"
+        "    cache: {ttl: 5, vary_on_roles: false}\n"
+    )
+    parser = YamlTemplateParser(str(tmp_path))
+    parser.generate_module_structure('shop', parser.load_template('custom.yml'), tmp_path / 'out')
+    code = (tmp_path / 'out' / 'modules' / 'shop' / 'routes.py').read_text()
+
+    assert "from constrictor.cache import cached\n" in code
+    assert "@model_access_required('shop', 'read')\n@cached(ttl=30)\ndef api():" in code
+    assert "@cached(ttl=5, vary_on_roles=False)\ndef stats():" in code
+
+    (tmp_path / 'bad.yml').write_text("routes:\n  - {path: '/x/', function: x, cache: -1}\n")
+    with pytest.raises(ValueError, match='ttl'):
+        parser.generate_module_structure('shop', parser.load_template('bad.yml'), tmp_path / 'out')
@@ -0,0 +1,80 @@
+import os
+import subprocess
+
+from click.testing import CliRunner
+
+from constrictor.change_detection import affected_modules, module_imports, owning_modules
+from constrictor.cli import main
+
+
+def _git(*args):
+    subprocess.run(['git', '-c', 'user.email=t@example.com', '-c', 'user.name=t'] + list(args),
+                   check=True, capture_output=True)
+
+
+def _write(path, content):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def _make_modules(root):
+    _write(f'{root}/modules/catalog/models.py', "X = 1\n")
+    _write(f'{root}/modules/orders/routes.py', "from modules.catalog.models import X\n")
+    _write(f'{root}/modules/invoices/routes.py', "from modules import orders\n")
+    _write(f'{root}/modules/blog/routes.py', "import os\n")
+
+
+def test_owning_modules_maps_layout_and_global_files():
+    assert owning_modules(['modules/blog/routes.py', 'templates/shop/index.html', 'README.md']) == {'blog', 'shop'}
+    assert owning_modules(['modules/blog/routes.py', 'app.py']) is None
+    assert owning_modules(['requirements.txt']) is None
+
+
+def test_affected_modules_includes_transitive_dependents(tmp_path):
+    _make_modules(tmp_path)
+    modules_dir = tmp_path / 'modules'
+
+    assert module_imports(modules_dir, 'invoices') == {'orders'}
+    assert affected_modules({'catalog'}, modules_dir) == {'catalog', 'orders', 'invoices'}
+    assert affected_modules({'orders'}, modules_dir) == {'orders', 'invoices'}
+    assert affected_modules({'blog', 'deleted'}, modules_dir) == {'blog'}
+
+
+def test_cli_test_changed_runs_only_affected_modules():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _write('app.py', "print('Mock app')\n")
+        _make_modules('.')
+        for name in ('catalog', 'orders', 'invoices', 'blog'):
+            _write(f'modules/{name}/tests/test_{name}.py', "def test_ok():\n    pass\n")
+        _git('init', '-q')
+        _git('add', '.')
+        _git('commit', '-q', '-m', 'initial')
+
+        result = runner.invoke(main, ['test', '--changed'])
+        assert result.exit_code == 0
+        assert "No modules with tests are affected" in result.output
+
+        _write('modules/orders/routes.py', "from modules.catalog.models import X\nY = 2\n")
+        result = runner.invoke(main, ['test', '--changed'])
+        assert result.exit_code == 0
+        assert "Changed modules: orders (including dependents: invoices)" in result.output
+        assert "Running tests for modules: invoices, orders" in result.output
+        assert "test_catalog" not in result.output
+        assert "test_blog" not in result.output
+
+        _git('commit', '-q', '-am', 'change orders')
+        result = runner.invoke(main, ['test', '--changed', '--since', 'HEAD~1'])
+        assert "Running tests for modules: invoices, orders" in result.output
+
+
+def test_cli_test_changed_outside_git_errors():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _write('app.py', "print('Mock app')\n")
+        os.makedirs('modules')
+        result = runner.invoke(main, ['test', '--changed', '--since', 'no-such-ref'])
+        assert result.exit_code != 0
+        assert "Could not determine changed files" in result.output
@@ -0,0 +1,88 @@
+import gzip
+import zlib
+
+from flask import Response, stream_with_context
+
+from constrictor.compression import GzipMiddleware, accepts_gzip
+
+BODY = 'constrictor ' * 200
+
+
+def add_routes(app):
+    @app.route('/text')
+    def text():
+        return BODY
+
+    @app.route('/small')
+    def small():
+        return 'tiny'
+
+    @app.route('/png')
+    def png():
+        return Response(b'\x89PNG' * 500, mimetype='image/png')
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(f'{i}\n' * 100 for i in range(5)), mimetype='application/x-ndjson')
+
+    return app
+
+
+def test_accepts_gzip():
+    assert accepts_gzip({'HTTP_ACCEPT_ENCODING': 'br, gzip;q=0.8'})
+    assert accepts_gzip({'HTTP_ACCEPT_ENCODING': '*'})
+    assert not accepts_gzip({'HTTP_ACCEPT_ENCODING': 'gzip;q=0'})
+    assert not accepts_gzip({})
+
+
+def test_compression_is_opt_in(make_app):
+    client = add_routes(make_app()).test_client()
+    response = client.get('/text', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_compresses_large_compressible_responses(make_app):
+    app = add_routes(make_app(CONSTRICTOR_COMPRESS=True))
+    assert isinstance(app.wsgi_app, GzipMiddleware)
+    client = app.test_client()
+
+    response = client.get('/text', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert int(response.headers['Content-Length']) == len(response.data) < len(BODY)
+    assert gzip.decompress(response.data).decode() == BODY
+
+    assert client.get('/text').data.decode() == BODY
+    for path in ('/small', '/png'):
+        assert 'Content-Encoding' not in client.get(path, headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_write_callable_output_is_kept():
+    def legacy_app(environ, start_response):
+        write = start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(BODY)))])
+        write(BODY[:100].encode())
+        return [BODY[100:].encode()]
+
+    app = GzipMiddleware(legacy_app)
+    environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+    headers = {}
+    body = b''.join(app(environ, lambda status, response_headers, exc_info=None: headers.update(response_headers)))
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body).decode() == BODY
+
+    small = GzipMiddleware(legacy_app, min_size=10**6)
+    assert b''.join(small(environ, lambda *args: None)).decode() == BODY
+
+
+def test_streamed_responses_are_compressed_incrementally(make_app):
+    client = add_routes(make_app(CONSTRICTOR_COMPRESS=True)).test_client()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    chunks = [decompressor.decompress(chunk) for chunk in response.response]
+    # Each chunk is flushed as it's produced, so it decodes on its own
+    assert chunks[0] == b'0\n' * 100
+    assert b''.join(chunks) == b''.join(f'{i}\n'.encode() * 100 for i in range(5))
+    response.close()
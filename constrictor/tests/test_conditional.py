@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from constrictor import cached, db
+from constrictor.conditional import conditional, model_validator
+from constrictor.yaml_parser import YamlTemplateParser
+
+
+class ConditionalItem(db.Model):
+    __tablename__ = "conditional_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    updated_at = db.Column(db.DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    app.calls = []
+    validator = model_validator(ConditionalItem)
+
+    @app.route('/hashed', methods=['GET', 'POST'])
+    @conditional()
+    def hashed():
+        app.calls.append('hashed')
+        return {'value': 1}
+
+    @app.route('/items/')
+    @conditional(validator)
+    def items():
+        app.calls.append('items')
+        return {'names': [item.name for item in ConditionalItem.query.order_by(ConditionalItem.id)]}
+
+    @app.route('/items/<int:pk>/')
+    @conditional(validator)
+    def item(pk):
+        app.calls.append('item')
+        obj = db.session.get(ConditionalItem, pk)
+        return ({'name': obj.name}, 200) if obj else ({'error': 'Not found'}, 404)
+
+    @app.route('/cached/<int:pk>/')
+    @conditional(validator)
+    @cached(ttl=300)
+    def cached_item(pk):
+        app.calls.append('cached')
+        return {'name': db.session.get(ConditionalItem, pk).name}
+
+    with app.app_context():
+        db.session.add_all([ConditionalItem(id=1, name='a', updated_at=datetime(2024, 1, 1, 12, 0, 0, 500)),
+                            ConditionalItem(id=2, name='b', updated_at=datetime(2024, 1, 2))])
+        db.session.commit()
+    return app
+
+
+def test_body_hash_etag(app):
+    client = app.test_client()
+    first = client.get('/hashed')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"')
+
+    second = client.get('/hashed', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    # Without a validator the view still runs; only the body is saved
+    assert app.calls == ['hashed', 'hashed']
+
+    assert client.post('/hashed', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_item_validator_answers_before_running_view(app):
+    client = app.test_client()
+    first = client.get('/items/1/')
+    assert first.headers['Last-Modified'] == 'Mon, 01 Jan 2024 12:00:00 GMT'
+
+    assert client.get('/items/1/', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/items/1/', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+    assert app.calls == ['item']
+
+    with app.app_context():
+        db.session.get(ConditionalItem, 1).name = 'changed'
+        db.session.commit()
+    response = client.get('/items/1/', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json() == {'name': 'changed'}
+    assert response.headers['ETag'] != first.headers['ETag']
+
+    assert client.get('/items/99/').status_code == 404
+
+
+def test_write_invalidates_cached_response_under_validator(app):
+    client = app.test_client()
+    first = client.get('/cached/1/')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert client.get('/cached/1/').headers['X-Cache'] == 'HIT'
+
+    with app.app_context():
+        db.session.get(ConditionalItem, 1).name = 'changed'
+        db.session.commit()
+
+    # The new version misses the cache instead of serving the old body
+    # under the new ETag
+    response = client.get('/cached/1/', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json() == {'name': 'changed'}
+    assert response.headers['ETag'] != first.headers['ETag']
+
+    again = client.get('/cached/1/', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+    assert app.calls == ['cached', 'cached']
+
+
+def test_collection_etag_changes_on_delete(app):
+    client = app.test_client()
+    first = client.get('/items/')
+    assert 'Last-Modified' not in first.headers
+    assert client.get('/items/', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    with app.app_context():
+        # Deleting the older row leaves MAX(updated_at) unchanged
+        db.session.delete(db.session.get(ConditionalItem, 1))
+        db.session.commit()
+    response = client.get('/items/', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json() == {'names': ['b']}
+
+    later = (datetime(2024, 1, 2) + timedelta(days=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+    assert client.get('/items/', headers={'If-Modified-Since': later}).status_code == 200
+
+
+def test_conditional_option_generates_decorators(tmp_path):
+    (tmp_path / 'custom.yml').write_text(
+        "routes:\n"
+        "  - path: '/{{module_name}}/api/'\n"
+        "    function: api\n"
+        "    conditional: true\n"
+        "    cache: 30\n"
+        "  - path: '/{{module_name}}/api/items/'\n"
+        "    function: items\n"
+        "    conditional: {updated_at: modified}\n"
+        "    crud: {model: '{{module_name|title}}Model'}\n"
+    )
+    parser = YamlTemplateParser(str(tmp_path))
+    parser.generate_module_structure('shop', parser.load_template('custom.yml'), tmp_path / 'out')
+    code = (tmp_path / 'out' / 'modules' / 'shop' / 'routes.py').read_text()
+
+    assert "from constrictor.conditional import conditional, model_validator\n" in code
+    assert "@conditional()\n@cached(ttl=30)\ndef api():" in code
+    assert code.count("@conditional(model_validator(ShopModel, 'modified'))\n") == 2
+
+    (tmp_path / 'bad.yml').write_text(
+        "routes:\n  - {path: '/x/', function: x, conditional: {updated_at: modified}}\n")
+    with pytest.raises(ValueError, match='crud'):
+        parser.generate_module_structure('shop', parser.load_template('bad.yml'), tmp_path / 'out')
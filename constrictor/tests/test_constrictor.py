@@ -25,6 +25,44 @@ def test_valid_project_creation():
         assert os.path.isfile('test_project/requirements.txt')
         assert os.path.isfile('test_project/.gitignore')
 
+def test_project_creation_without_venv():
+    """Test creating a project with --no-venv skips the environment."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(main, ['new', 'light_project', '--no-venv'])
+        assert result.exit_code == 0
+        assert "Creating virtual environment" not in result.output
+        assert not os.path.exists('light_project/.venv')
+        assert os.path.isfile('light_project/app.py')
+        with open('light_project/requirements.txt') as f:
+            assert 'Flask-Login>=0.6.3' in f.read().splitlines()
+
+def test_project_creation_venv_from_existing():
+    """Test reusing an existing environment via a symlink or a copy."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('shared_env/bin')
+        with open('shared_env/bin/python', 'w') as f:
+            f.write('')
+
+        result = runner.invoke(main, ['new', 'linked', '--venv-from', 'shared_env'])
+        assert result.exit_code == 0
+        assert os.path.islink('linked/.venv')
+        assert os.path.isfile('linked/.venv/bin/python')
+
+        result = runner.invoke(main, ['new', 'copied', '--venv-from', 'shared_env', '--copy-venv'])
+        assert result.exit_code == 0
+        assert not os.path.islink('copied/.venv')
+        assert os.path.isfile('copied/.venv/bin/python')
+
+def test_project_creation_rejects_conflicting_venv_options():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('shared_env')
+        result = runner.invoke(main, ['new', 'proj', '--no-venv', '--venv-from', 'shared_env'])
+        assert result.exit_code != 0
+        assert not os.path.exists('proj')
+
 def test_existing_project_creation():
     """Test creating a project that already exists."""
     runner = CliRunner()
@@ -73,6 +111,58 @@ def test_existing_module_creation():
         assert result.exit_code == 0
         assert "already exists" in result.output
 
+def test_generate_many_modules():
+    """Test generating several modules in one invocation."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('modules')
+        with open('names.txt', 'w') as f:
+            f.write("# modules to create\ncatalog\n\norders  # inline comment\nblog\n")
+        result = runner.invoke(main, ['generate', 'many', 'blog', 'news', '--from-file', 'names.txt'])
+        assert result.exit_code == 0
+        assert "4 of 4 module(s) generated" in result.output
+        for name in ('blog', 'news', 'catalog', 'orders'):
+            assert os.path.isfile(f'modules/{name}/routes.py')
+            assert os.path.isfile(f'templates/{name}/index.html')
+
+def test_generate_many_rejects_invalid_names_before_writing():
+    """Test that one invalid name aborts the batch without generating anything."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('modules')
+        result = runner.invoke(main, ['generate', 'many', 'good', '9bad'])
+        assert result.exit_code != 0
+        assert "Invalid module name(s): 9bad" in result.output
+        assert not os.path.exists('modules/good')
+
+def test_generate_extra_names_without_many():
+    """Test that passing several names to plain generate points at 'many'."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('modules')
+        result = runner.invoke(main, ['generate', 'blog', 'news'])
+        assert result.exit_code != 0
+        assert "constrictor generate many" in result.output
+
+
+def test_update_existing_module_keeps_local_edits():
+    """Test regenerating a module in place without losing edited files."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        os.makedirs('modules')
+        assert runner.invoke(main, ['generate', 'blog']).exit_code == 0
+        with open('modules/blog/models.py', 'w') as f:
+            f.write("# my models\n")
+        os.remove('modules/blog/views.py')
+
+        result = runner.invoke(main, ['generate', 'blog', '--update'])
+        assert result.exit_code == 0
+        assert "already exists" not in result.output
+        assert "1 created" in result.output
+        assert "Skipped modules/blog/models.py" in result.output
+        assert os.path.isfile('modules/blog/views.py')
+        with open('modules/blog/models.py') as f:
+            assert f.read() == "# my models\n"
 
 def test_run_missing_app():
     """Test run command when app.py is missing."""
@@ -0,0 +1,269 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from flask import Blueprint
+
+from constrictor import db
+from constrictor.crud import CrudResource
+from constrictor.yaml_parser import YamlTemplateParser
+
+
+class CrudItem(db.Model):
+    __tablename__ = "crud_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(20), nullable=False)
+    rank = db.Column(db.Integer, nullable=False, index=True)
+    note = db.Column(db.String(50), nullable=True)
+    code = db.Column(db.String(10), nullable=True, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CrudToken(db.Model):
+    __tablename__ = "crud_token"
+
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4)
+    label = db.Column(db.String(20), nullable=False)
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    resources = {
+        'items': CrudResource(CrudItem, page_size=2, max_page_size=5, chunk_size=2, max_bulk_items=5),
+        'ranked': CrudResource(CrudItem, order_by='rank', descending=True, fields=['name', 'rank']),
+    }
+    blueprint = Blueprint('crud_test', __name__)
+    for name, resource in resources.items():
+        blueprint.add_url_rule(f'/{name}/', f'{name}_list', resource.list)
+        blueprint.add_url_rule(f'/{name}/', f'{name}_create', resource.create, methods=['POST'])
+        blueprint.add_url_rule(f'/{name}/bulk/', f'{name}_bulk_create', resource.bulk_create, methods=['POST'])
+        blueprint.add_url_rule(f'/{name}/bulk/', f'{name}_bulk_update', resource.bulk_update, methods=['PATCH'])
+        blueprint.add_url_rule(f'/{name}/export/', f'{name}_export', resource.export)
+        blueprint.add_url_rule(f'/{name}/<int:pk>/', f'{name}_get', resource.get)
+        blueprint.add_url_rule(f'/{name}/<int:pk>/', f'{name}_update', resource.update, methods=['PATCH'])
+        blueprint.add_url_rule(f'/{name}/<int:pk>/', f'{name}_delete', resource.delete, methods=['DELETE'])
+    app.register_blueprint(blueprint)
+
+    with app.app_context():
+        db.session.add_all(CrudItem(id=i, name=f'item{i}', rank=i % 3) for i in range(1, 8))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def _walk(client, url):
+    ids, cursor = [], None
+    while True:
+        data = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        ids += [item['id'] for item in data['items']]
+        cursor = data['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_list_pages_by_cursor(app):
+    client = app.test_client()
+    first = client.get('/items/').get_json()
+    assert [item['id'] for item in first['items']] == [1, 2]
+
+    # Rows deleted before the cursor don't shift the next page
+    client.delete('/items/1/')
+    second = client.get(f"/items/?cursor={first['next_cursor']}").get_json()
+    assert [item['id'] for item in second['items']] == [3, 4]
+
+    assert _walk(client, '/items/?limit=3') == [2, 3, 4, 5, 6, 7]
+
+
+def test_list_orders_by_indexed_column_with_pk_tiebreak(app):
+    # rank desc, then id desc: rank 2 -> 5, 2; rank 1 -> 7, 4, 1; rank 0 -> 6, 3
+    assert _walk(app.test_client(), '/ranked/?limit=2') == [5, 2, 7, 4, 1, 6, 3]
+
+
+def test_list_rejects_bad_parameters(app):
+    client = app.test_client()
+    assert client.get('/items/?limit=6').status_code == 400
+    assert client.get('/items/?limit=0').status_code == 400
+    response = client.get('/items/?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+
+def test_get_create_update_delete(app):
+    client = app.test_client()
+    assert client.get('/items/3/').get_json()['name'] == 'item3'
+    assert client.get('/items/99/').status_code == 404
+
+    response = client.post('/items/', json={'name': 'new', 'rank': 1, 'created_at': '2024-01-02T03:04:05'})
+    assert response.status_code == 201
+    created = response.get_json()
+    assert db.session.get(CrudItem, created['id']).created_at == datetime(2024, 1, 2, 3, 4, 5)
+
+    response = client.patch(f"/items/{created['id']}/", json={'note': 'updated'})
+    assert response.get_json()['note'] == 'updated'
+    assert response.get_json()['name'] == 'new'
+
+    assert client.delete(f"/items/{created['id']}/").status_code == 204
+    assert client.delete(f"/items/{created['id']}/").status_code == 404
+
+
+def test_create_and_update_validate_fields(app):
+    client = app.test_client()
+    response = client.post('/items/', json={'rank': 'high', 'bogus': 1, 'name': 'x' * 21})
+    assert response.status_code == 400
+    assert response.get_json()['fields'] == {
+        'rank': 'must be an integer',
+        'bogus': 'unknown or read-only field',
+        'name': 'must be at most 20 characters',
+    }
+    assert client.post('/items/', json={'note': 'x'}).get_json()['fields'] == {
+        'name': 'is required', 'rank': 'is required'}
+    assert client.post('/items/', data='[]').status_code == 400
+
+    # Fields outside `fields` are read-only
+    response = client.patch('/ranked/1/', json={'note': 'x'})
+    assert response.get_json()['fields'] == {'note': 'unknown or read-only field'}
+    assert client.patch('/items/1/', json={'name': None}).get_json()['fields'] == {'name': 'may not be null'}
+
+
+def test_bulk_create_inserts_in_chunks_and_reports_per_item(app, monkeypatch):
+    resource = CrudResource(CrudItem, chunk_size=2)
+    chunks = []
+    insert_chunk = resource._insert_chunk
+    monkeypatch.setattr(resource, '_insert_chunk', lambda chunk: chunks.append(len(chunk)) or insert_chunk(chunk))
+    items = [{'name': 'a', 'rank': 1}, {'name': 'b'}, {'name': 'c', 'rank': 2}, {'name': 'd', 'rank': 3}]
+
+    with app.test_request_context('/', method='POST', json=items):
+        data = resource.bulk_create().get_json()
+
+    assert chunks == [2, 1]
+    assert data['created'] == 3 and data['invalid'] == 1
+    assert [result['status'] for result in data['results']] == ['created', 'invalid', 'created', 'created']
+    assert data['results'][1]['errors'] == {'rank': 'is required'}
+    assert db.session.get(CrudItem, data['results'][3]['id']).name == 'd'
+
+
+def test_bulk_create_accepts_ndjson_and_isolates_failing_rows(app):
+    body = '\n'.join([
+        '{"name": "a", "rank": 1, "code": "dup"}',
+        'not json',
+        '',
+        '{"name": "b", "rank": 1, "code": "dup"}',
+        '{"name": "c", "rank": 1, "code": "ok"}',
+    ])
+    response = app.test_client().post('/items/bulk/', data=body, content_type='application/x-ndjson')
+    data = response.get_json()
+
+    # The second "dup" breaks its chunk; retried row by row, only it fails
+    assert [result['status'] for result in data['results']] == ['created', 'invalid', 'failed', 'created']
+    assert data['results'][1]['errors'] == {'_': 'Invalid JSON'}
+    assert 'UNIQUE' in data['results'][2]['error']
+    assert CrudItem.query.filter(CrudItem.code.isnot(None)).count() == 2
+
+
+def test_bulk_update_and_limits(app):
+    client = app.test_client()
+    data = client.patch('/items/bulk/', json=[
+        {'id': 1, 'name': 'one'}, {'id': 99, 'name': 'x'}, {'name': 'no id'}, {'id': 2}, {'id': 3, 'rank': 'x'},
+    ]).get_json()
+    assert [result['status'] for result in data['results']] == [
+        'updated', 'not_found', 'invalid', 'invalid', 'invalid']
+    assert data['updated'] == 1 and data['not_found'] == 1 and data['invalid'] == 3
+    assert db.session.get(CrudItem, 1).name == 'one'
+
+    assert client.post('/items/bulk/', json=[{'name': 'x', 'rank': 1}] * 6).status_code == 413
+    assert client.post('/items/bulk/', json={'name': 'x'}).status_code == 400
+    # An oversized NDJSON stream is rejected whole too, not cut short
+    body = '\n'.join('{"name": "x", "rank": 1}' for _ in range(6))
+    response = client.post('/items/bulk/', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 413
+    assert CrudItem.query.filter_by(name='x').count() == 0
+
+
+def test_uuid_primary_key_cursor_and_bulk_update(app):
+    resource = CrudResource(CrudToken, page_size=2)
+    tokens = [CrudToken(label=f'token{i}') for i in range(5)]
+    db.session.add_all(tokens)
+    db.session.commit()
+
+    ids, cursor = [], None
+    while True:
+        with app.test_request_context('/', query_string={'cursor': cursor} if cursor else {}):
+            data = resource.list().get_json()
+        ids += [item['id'] for item in data['items']]
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert ids == sorted(str(token.id) for token in tokens)
+
+    with app.test_request_context('/', query_string={'cursor': 'WyJ4IiwieCJd'}):
+        response, status = resource.list()
+    assert status == 400
+
+    items = [{'id': str(tokens[0].id), 'label': 'renamed'}, {'id': 'not-a-uuid', 'label': 'x'},
+             {'id': str(uuid.uuid4()), 'label': 'x'}]
+    with app.test_request_context('/', method='PATCH', json=items):
+        data = resource.bulk_update().get_json()
+    assert [result['status'] for result in data['results']] == ['updated', 'invalid', 'not_found']
+    assert data['results'][1]['errors'] == {'id': 'must be a UUID'}
+    db.session.expire_all()
+    assert db.session.get(CrudToken, tokens[0].id).label == 'renamed'
+
+
+def test_export_streams_every_item(app):
+    client = app.test_client()
+    response = client.get('/items/export/')
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(response.get_data(as_text=True).splitlines()) == 7
+
+    lines = client.get('/items/export/?format=csv').get_data(as_text=True).splitlines()
+    assert lines[0] == 'id,name,rank,note,code,created_at'
+    assert lines[1].startswith('1,item1,1,')
+    assert client.get('/items/export/?format=xml').status_code == 400
+
+
+def test_order_by_must_be_indexed_and_not_null():
+    with pytest.raises(ValueError, match='indexed'):
+        CrudResource(CrudItem, order_by='name')
+    with pytest.raises(ValueError, match='NOT NULL'):
+        CrudResource(CrudItem, order_by='created_at')
+    with pytest.raises(ValueError, match="no column 'missing'"):
+        CrudResource(CrudItem, fields=['missing'])
+
+
+def test_crud_route_generates_gated_views(tmp_path):
+    (tmp_path / 'custom.yml').write_text(
+        "routes:\n"
+        "  - path: '/{{module_name}}/api/items'\n"
+        "    function: items\n"
+        "    roles: [editor]\n"
+        "    cache: 10\n"
+        "    crud:\n"
+        "      model: '{{module_name|title}}Model'\n"
+        "      order_by: created_at\n"
+        "      descending: true\n"
+        "      id_type: string\n"
+        "      bulk: true\n"
+        "      export: true\n"
+    )
+    parser = YamlTemplateParser(str(tmp_path))
+    parser.generate_module_structure('shop', parser.load_template('custom.yml'), tmp_path / 'out')
+    code = (tmp_path / 'out' / 'modules' / 'shop' / 'routes.py').read_text()
+
+    assert "from .models import ShopModel" in code
+    assert "items_crud = CrudResource(ShopModel, order_by='created_at', descending=True)" in code
+    assert ("@blueprint.route('/shop/api/items/<string:pk>/', methods=['PUT', 'PATCH'])\n"
+            "@roles_required('editor')\n"
+            "@model_access_required('shop', 'update')\n"
+            "def items_update(pk):\n") in code
+    assert ("@blueprint.route('/shop/api/items/bulk/', methods=['POST'])\n"
+            "@roles_required('editor')\n"
+            "@model_access_required('shop', 'create')\n"
+            "def items_bulk_create():\n") in code
+    assert "@blueprint.route('/shop/api/items/export/', methods=['GET'])" in code
+    # Only the paginated list and single-item reads are cached
+    assert code.count("@cached(ttl=10)\n") == 2
+    assert "@model_access_required('shop', 'read')\n@cached(ttl=10)\ndef items_get(pk):" in code
+    for handler in ('list', 'create', 'get', 'update', 'delete', 'bulk_create', 'bulk_update', 'export'):
+        assert f"    return items_crud.{handler}(" in code
@@ -1,16 +1,21 @@
+import logging
 import os
 import sqlite3
+from types import SimpleNamespace
 
+import pytest
+import sqlalchemy
 from click.testing import CliRunner
 
-from constrictor.cli import main
+from constrictor.cli import _squash_scratch_error, main
+from constrictor.migration_squash import SquashError, check_schema_only, render_schema, verify_baseline
 
 
 def _make_project(runner, module_name):
-    """Create a project and generate one module, without depending on the
+    """Create a project and generate one module, without creating the
     project's own .venv (db commands run via sys.executable, in-process
     with the test's own installed dependencies)."""
-    result = runner.invoke(main, ['new', 'proj'])
+    result = runner.invoke(main, ['new', 'proj', '--no-venv'])
     assert result.exit_code == 0
     os.chdir('proj')
     result = runner.invoke(main, ['generate', module_name])
@@ -75,8 +80,11 @@ def test_db_migrate_and_upgrade_creates_table():
         revisions = [f for f in os.listdir('migrations/versions') if f.endswith('.py')]
         assert len(revisions) == 1
 
+        logger = logging.getLogger('constrictor.backfills')
         result = runner.invoke(main, ['db', 'upgrade'])
         assert result.exit_code == 0
+        # env.py's fileConfig() must not silence loggers that already exist
+        assert not logger.disabled
 
         db_path = os.path.join('instance', 'app.db')
         assert os.path.exists(db_path)
@@ -143,3 +151,246 @@ def test_missing_hook_run_function_warns_without_failing():
         result = runner.invoke(main, ['db', 'upgrade'])
         assert result.exit_code == 0
         assert "no run(app) function" in result.output
+
+
+def test_db_upgrade_unknown_revision_reports_error():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'ledgers')
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+
+        result = runner.invoke(main, ['db', 'upgrade', 'deadbeef'])
+        assert result.exit_code != 0
+        assert "Error:" in result.output
+        assert "deadbeef" in result.output
+
+
+def test_project_app_loaded_once_per_process():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'shipments')
+        with open('app.py', 'a') as f:
+            f.write("\nwith open('app_loads.txt', 'a') as _log:\n    _log.write('load\\n')\n")
+        with open('modules/shipments/premigrate.py', 'w') as f:
+            f.write("def run(app):\n    pass\n")
+        with open('modules/shipments/postmigrate.py', 'w') as f:
+            f.write("def run(app):\n    pass\n")
+
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create shipments table']).exit_code == 0
+        assert runner.invoke(main, ['db', 'upgrade']).exit_code == 0
+        with open('app_loads.txt') as f:
+            assert len(f.read().splitlines()) == 1
+
+        # Editing app.py invalidates the cached app
+        with open('app.py', 'a') as f:
+            f.write("\n# edited\n")
+        assert runner.invoke(main, ['db', 'downgrade']).exit_code == 0
+        with open('app_loads.txt') as f:
+            assert len(f.read().splitlines()) == 2
+
+
+def test_hooks_follow_module_dependencies():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'alpha')
+        assert runner.invoke(main, ['generate', 'beta']).exit_code == 0
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create tables']).exit_code == 0
+
+        for name in ('alpha', 'beta'):
+            with open(f'modules/{name}/premigrate.py', 'w') as f:
+                f.write(
+                    "def run(app):\n"
+                    "    with open('hook_order.txt', 'a') as log:\n"
+                    f"        log.write('{name}\\n')\n"
+                )
+        with open('modules/alpha/module.yml', 'w') as f:
+            f.write("depends_on:\n  - beta\n")
+
+        result = runner.invoke(main, ['db', 'upgrade', '--jobs', '2'])
+        assert result.exit_code == 0, result.output
+        assert "Finished premigrate hook for module 'alpha' in" in result.output
+        with open('hook_order.txt') as f:
+            assert f.read().splitlines() == ['beta', 'alpha']
+
+        with open('modules/beta/module.yml', 'w') as f:
+            f.write("depends_on:\n  - alpha\n")
+        result = runner.invoke(main, ['db', 'upgrade'])
+        assert result.exit_code != 0
+        assert "Circular hook dependencies" in result.output
+
+
+def test_db_upgrade_sql_and_explain_do_not_migrate():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'parcels')
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create parcels table']).exit_code == 0
+
+        logger = logging.getLogger('constrictor.backfills')
+        result = runner.invoke(main, ['db', 'upgrade', '--sql'])
+        assert result.exit_code == 0, result.output
+        assert "CREATE TABLE parcels" in result.output
+        assert "Running premigrate" not in result.output
+        assert not logger.disabled
+
+        result = runner.invoke(main, ['db', 'upgrade', '--explain'])
+        assert result.exit_code == 0, result.output
+        assert "CREATE" in result.output and "No statements rewrite or scan" in result.output
+        con = sqlite3.connect(os.path.join('instance', 'app.db'))
+        assert con.execute("SELECT count(*) FROM sqlite_master WHERE name='parcels'").fetchone()[0] == 0
+
+        assert runner.invoke(main, ['db', 'upgrade']).exit_code == 0
+        con.executemany("INSERT INTO parcels (name) VALUES (?)", [('a',), ('b',), ('c',)])
+        con.commit()
+
+        base = next(f for f in os.listdir('migrations/versions') if f.endswith('.py')).split('_')[0]
+        with open('migrations/versions/ffff0001_index_parcels.py', 'w') as f:
+            f.write(
+                "from alembic import op\n"
+                "revision = 'ffff0001'\n"
+                f"down_revision = '{base}'\n"
+                "branch_labels = None\n"
+                "depends_on = None\n\n"
+                "def upgrade():\n"
+                "    op.create_index('ix_parcels_name', 'parcels', ['name'])\n\n"
+                "def downgrade():\n"
+                "    op.drop_index('ix_parcels_name', 'parcels')\n"
+            )
+
+        result = runner.invoke(main, ['db', 'upgrade', '--explain', '--large-table-rows', '3'])
+        assert result.exit_code == 0, result.output
+        assert "SCAN     parcels (~3 rows) [LARGE]: CREATE INDEX ix_parcels_name" in result.output
+        assert "1 statement(s) rewrite or scan tables with 3+ rows" in result.output
+        assert "CREATE TABLE parcels" not in result.output
+
+
+def test_db_squash_replaces_history_with_baseline():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'crates')
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create crates table']).exit_code == 0
+        base = next(f for f in os.listdir('migrations/versions') if f.endswith('.py')).split('_')[0]
+        with open('migrations/versions/eeee0001_index_crates.py', 'w') as f:
+            f.write(
+                "from alembic import op\n"
+                "revision = 'eeee0001'\n"
+                f"down_revision = '{base}'\n"
+                "branch_labels = None\n"
+                "depends_on = None\n\n"
+                "def upgrade():\n"
+                "    op.create_index('ix_crates_id_name', 'crates', ['id', 'name'])\n\n"
+                "def downgrade():\n"
+                "    op.drop_index('ix_crates_id_name', 'crates')\n"
+            )
+        assert runner.invoke(main, ['db', 'upgrade']).exit_code == 0
+
+        result = runner.invoke(main, ['db', 'squash'])
+        assert result.exit_code == 0, result.output
+        assert "Squashed 2 revision(s)" in result.output
+        versions = [f for f in os.listdir('migrations/versions') if f.endswith('.py')]
+        assert versions == ['eeee0001_squashed_baseline.py']
+        assert sorted(os.listdir('migrations/squashed/eeee0001')) == sorted(
+            [f'{base}_create_crates_table.py', 'eeee0001_index_crates.py'])
+
+        # The existing database is already at the baseline's id
+        result = runner.invoke(main, ['db', 'upgrade'])
+        assert result.exit_code == 0, result.output
+
+        # A fresh database gets the whole schema from the baseline alone
+        os.remove(os.path.join('instance', 'app.db'))
+        # Bump app.py's mtime so the in-process app cache (and its pooled
+        # connection to the deleted file) isn't reused
+        mtime = os.stat('app.py').st_mtime_ns + 10**9
+        os.utime('app.py', ns=(mtime, mtime))
+        assert runner.invoke(main, ['db', 'upgrade']).exit_code == 0
+        con = sqlite3.connect(os.path.join('instance', 'app.db'))
+        names = {row[0] for row in con.execute("SELECT name FROM sqlite_master")}
+        assert {'crates', 'ix_crates_name', 'ix_crates_id_name', 'auth_user'} <= names
+        assert con.execute("SELECT version_num FROM alembic_version").fetchone()[0] == 'eeee0001'
+
+        result = runner.invoke(main, ['db', 'squash'])
+        assert "Nothing to squash" in result.output
+
+
+def test_db_squash_refuses_data_migrations():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'pallets')
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create pallets table']).exit_code == 0
+        base = next(f for f in os.listdir('migrations/versions') if f.endswith('.py')).split('_')[0]
+        with open('migrations/versions/dddd0001_seed_pallets.py', 'w') as f:
+            f.write(
+                "from alembic import op\n"
+                "revision = 'dddd0001'\n"
+                f"down_revision = '{base}'\n"
+                "branch_labels = None\n"
+                "depends_on = None\n\n"
+                "def upgrade():\n"
+                "    op.execute(\"INSERT INTO pallets (name) VALUES ('default')\")\n\n"
+                "def downgrade():\n"
+                "    op.execute(\"DELETE FROM pallets WHERE name = 'default'\")\n"
+            )
+
+        result = runner.invoke(main, ['db', 'squash'])
+        assert result.exit_code != 0
+        assert "Revision(s) dddd0001 insert, update or delete rows" in result.output
+        assert os.path.exists('migrations/versions/dddd0001_seed_pallets.py')
+        assert not os.path.exists('migrations/squashed')
+
+
+@pytest.mark.parametrize('upgrade, writes', [
+    ("    op.bulk_insert(roles, [{'name': 'admin'}])\n", True),
+    ("    op.execute(roles.update().values(name='admin'))\n", True),
+    ("    op.execute(SEED)\n", True),
+    ("    op.execute('CREATE INDEX ix_roles_name ON roles (name)')\n", False),
+    ("    op.add_column('roles', sa.Column('updated_at', sa.DateTime()))\n", False),
+])
+def test_check_schema_only_detects_dml_in_upgrade(tmp_path, upgrade, writes):
+    path = tmp_path / 'cccc0001_change.py'
+    path.write_text(
+        "import sqlalchemy as sa\n"
+        "from alembic import op\n\n"
+        "SEED = \"INSERT INTO roles (name) VALUES ('admin')\"\n\n"
+        f"def upgrade():\n{upgrade}\n"
+        "def downgrade():\n"
+        "    op.execute(\"DELETE FROM roles\")\n"
+    )
+    revision = SimpleNamespace(revision='cccc0001', path=str(path))
+    if writes:
+        with pytest.raises(SquashError, match='cccc0001'):
+            check_schema_only([revision])
+    else:
+        check_schema_only([revision])
+
+
+def test_db_squash_scratch_database_must_match_project_dialect():
+    assert _squash_scratch_error('sqlite', None) is None
+    assert _squash_scratch_error('postgresql', 'postgresql+psycopg2://localhost/scratch') is None
+    assert "pass --scratch-url with an empty postgresql database" in _squash_scratch_error('postgresql', None)
+    assert "must be a postgresql database" in _squash_scratch_error('postgresql', 'sqlite:///scratch.db')
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        _make_project(runner, 'bins')
+        assert runner.invoke(main, ['db', 'init']).exit_code == 0
+        assert runner.invoke(main, ['db', 'migrate', '-m', 'create bins table']).exit_code == 0
+        result = runner.invoke(main, ['db', 'squash', '--scratch-url', 'postgresql://localhost/scratch'])
+        assert result.exit_code != 0
+        assert "--scratch-url must be a sqlite database" in result.output
+
+
+def test_verify_baseline_rejects_incomplete_schema():
+    engine = sqlalchemy.create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE boxes (id INTEGER PRIMARY KEY, name VARCHAR(20) DEFAULT 'x')")
+        connection.exec_driver_sql("CREATE INDEX ix_boxes_name ON boxes (name)")
+        upgrades, _, imports = render_schema(connection)
+        verify_baseline(connection, upgrades, imports)
+
+        missing_index = "\n".join(line for line in upgrades.splitlines() if 'create_index' not in line)
+        with pytest.raises(SquashError, match="ix_boxes_name"):
+            verify_baseline(connection, missing_index, imports)
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from constrictor import db
+from constrictor.export import stream_export
+
+
+class ExportItem(db.Model):
+    __tablename__ = "export_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True)
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all(ExportItem(id=i, name=f'item, "{i}"', created_at=datetime(2024, 1, i))
+                           for i in range(5, 0, -1))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def test_ndjson_export_streams_rows_in_primary_key_order(app):
+    executions = []
+    event.listen(db.engine, 'before_execute',
+                 lambda conn, clause, multiparams, params, options: executions.append(options))
+
+    with app.test_request_context('/'):
+        response = stream_export(ExportItem, batch_size=2)
+        assert response.is_streamed
+        blocks = list(response.response)
+
+    assert len(blocks) == 3
+    rows = [json.loads(line) for line in ''.join(blocks).splitlines()]
+    assert [row['id'] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[0] == {'id': 1, 'name': 'item, "1"', 'created_at': '2024-01-01T00:00:00'}
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="export_item.ndjson"'
+    assert executions[-1].get('yield_per') == 2
+
+
+def test_csv_export_with_statement_and_columns(app):
+    statement = select(ExportItem).where(ExportItem.id > 3).order_by(ExportItem.id.desc())
+    with app.test_request_context('/'):
+        response = stream_export(ExportItem, 'csv', statement=statement, columns=['id', 'name'],
+                                 filename='recent.csv')
+        body = ''.join(response.response)
+
+    assert body.splitlines() == ['id,name', '5,"item, ""5"""', '4,"item, ""4"""']
+    assert response.content_type == 'text/csv; charset=utf-8'
+    assert 'filename="recent.csv"' in response.headers['Content-Disposition']
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match='xml'):
+        stream_export(ExportItem, 'xml')
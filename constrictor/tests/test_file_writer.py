@@ -0,0 +1,72 @@
+import os
+import tempfile
+from pathlib import Path
+
+from constrictor.file_writer import (
+    CREATED, UNCHANGED, UPDATED, StagedWriter, atomic_write, write_if_changed,
+)
+from constrictor.yaml_parser import generate_module_from_yaml
+
+
+def test_write_if_changed_reports_status_and_keeps_unchanged_mtime(tmp_path):
+    path = tmp_path / 'routes.py'
+    assert write_if_changed(path, 'v1\n') == CREATED
+
+    os.utime(path, ns=(0, 0))
+    assert write_if_changed(path, 'v1\n') == UNCHANGED
+    assert path.stat().st_mtime_ns == 0
+
+    assert write_if_changed(path, 'v2\n') == UPDATED
+    assert path.read_text() == 'v2\n'
+
+
+def test_atomic_write_preserves_mode_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / 'script.py'
+    path.write_text('old')
+    os.chmod(path, 0o750)
+
+    atomic_write(path, 'new')
+
+    assert path.read_text() == 'new'
+    assert path.stat().st_mode & 0o777 == 0o750
+    assert os.listdir(tmp_path) == ['script.py']
+
+
+def test_atomic_write_new_file_follows_umask_without_changing_it(tmp_path, monkeypatch):
+    previous = os.umask(0o027)
+    try:
+        monkeypatch.setattr(os, 'umask', None)  # atomic_write must not touch it
+        atomic_write(tmp_path / 'new.py', 'x')
+    finally:
+        monkeypatch.undo()
+        os.umask(previous)
+
+    assert (tmp_path / 'new.py').stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['new.py']
+
+
+def test_staged_writer_commit_manifest(tmp_path):
+    (tmp_path / 'same.txt').write_text('same')
+    (tmp_path / 'old.txt').write_text('old')
+
+    writer = StagedWriter()
+    writer.stage_dir(tmp_path / 'static')
+    writer.stage(tmp_path / 'same.txt', 'same')
+    writer.stage(tmp_path / 'old.txt', 'new')
+    writer.stage(tmp_path / 'nested' / 'fresh.txt', 'fresh')
+    manifest = writer.commit()
+
+    assert manifest.created == [tmp_path / 'nested' / 'fresh.txt']
+    assert manifest.updated == [tmp_path / 'old.txt']
+    assert manifest.unchanged == [tmp_path / 'same.txt']
+    assert (tmp_path / 'static').is_dir()
+
+
+def test_regenerating_module_touches_nothing():
+    with tempfile.TemporaryDirectory() as tmp:
+        first = generate_module_from_yaml('blog', Path(tmp), None)
+        assert first.created and not first.updated
+
+        second = generate_module_from_yaml('blog', Path(tmp), None)
+        assert second.changed == []
+        assert sorted(second.unchanged) == sorted(first.created)
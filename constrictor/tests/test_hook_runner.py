@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from constrictor.hook_runner import HookError, load_dependencies, run_in_dependency_order
+
+
+def test_load_dependencies_reads_module_yml(tmp_path):
+    (tmp_path / 'orders').mkdir()
+    (tmp_path / 'orders' / 'module.yml').write_text("depends_on:\n  - catalog\n")
+    (tmp_path / 'catalog').mkdir()
+    (tmp_path / 'broken').mkdir()
+    (tmp_path / 'broken' / 'module.yml').write_text("depends_on: catalog\n")
+
+    assert load_dependencies(tmp_path, ['orders', 'catalog']) == {'orders': ['catalog'], 'catalog': []}
+    with pytest.raises(HookError, match="must be a list"):
+        load_dependencies(tmp_path, ['broken'])
+
+
+def test_dependencies_run_first_and_independent_hooks_overlap():
+    dependencies = {'catalog': [], 'accounts': [], 'orders': ['catalog', 'accounts'], 'blog': []}
+    events = []
+    lock = threading.Lock()
+    active = []
+    peak = [0]
+
+    def run(name):
+        with lock:
+            events.append(('start', name))
+            active.append(name)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(name)
+            events.append(('end', name))
+
+    run_in_dependency_order(dependencies, run, jobs=3)
+
+    assert peak[0] == 3
+    start_orders = events.index(('start', 'orders'))
+    assert events.index(('end', 'catalog')) < start_orders
+    assert events.index(('end', 'accounts')) < start_orders
+
+
+def test_sequential_order_is_alphabetical_within_dependencies():
+    order = []
+    run_in_dependency_order({'b': [], 'a': ['c'], 'c': []}, order.append)
+    assert order == ['b', 'c', 'a']
+
+
+def test_failure_stops_dependents():
+    order = []
+
+    def run(name):
+        order.append(name)
+        if name == 'catalog':
+            raise ValueError("boom")
+
+    with pytest.raises(HookError) as excinfo:
+        run_in_dependency_order({'catalog': [], 'orders': ['catalog'], 'zoo': []}, run)
+    assert excinfo.value.module == 'catalog'
+    assert isinstance(excinfo.value.__cause__, ValueError)
+    assert order == ['catalog']
+
+
+def test_invalid_dependencies_are_rejected():
+    with pytest.raises(HookError, match="unknown module 'missing'"):
+        run_in_dependency_order({'orders': ['missing']}, lambda name: None)
+    with pytest.raises(HookError, match="Circular"):
+        run_in_dependency_order({'a': ['b'], 'b': ['a'], 'c': []}, lambda name: None)
@@ -0,0 +1,82 @@
+import threading
+
+from flask import Blueprint
+from sqlalchemy import text
+
+from constrictor import db
+from constrictor.metrics import MetricsRegistry
+
+
+def add_blog(app):
+    blog = Blueprint('blog', __name__)
+
+    @blog.route('/blog/posts/')
+    def posts():
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+        return {'posts': []}
+
+    @blog.route('/blog/fail/')
+    def fail():
+        raise RuntimeError('boom')
+
+    app.register_blueprint(blog)
+    return app
+
+
+def test_metrics_endpoint(make_app):
+    client = add_blog(make_app(CONSTRICTOR_METRICS=True)).test_client()
+    client.get('/blog/posts/')
+    client.get('/blog/posts/')
+    client.get('/nowhere')
+
+    body = client.get('/metrics')
+    assert body.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    lines = body.get_data(as_text=True).splitlines()
+    route = 'module="blog",endpoint="blog.posts"'
+    assert f'constrictor_http_requests_total{{{route},method="GET",status="200"}} 2' in lines
+    assert 'constrictor_http_requests_total{module="app",endpoint="<unmatched>",method="GET",status="404"} 1' \
+        in lines
+    assert f'constrictor_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 2' in lines
+    assert f'constrictor_http_request_duration_seconds_count{{{route}}} 2' in lines
+    assert f'constrictor_db_queries_total{{{route}}} 4' in lines
+    assert any(line.startswith(f'constrictor_db_duration_seconds_total{{{route}}} ') for line in lines)
+    # The scrape itself is in flight while it renders
+    assert 'constrictor_http_requests_in_flight{module="app"} 1' in lines
+    assert 'constrictor_http_requests_in_flight{module="blog"} 0' in lines
+
+
+def test_unhandled_errors_are_counted_as_500(make_app):
+    app = add_blog(make_app(CONSTRICTOR_METRICS=True, PROPAGATE_EXCEPTIONS=False))
+    assert app.test_client().get('/blog/fail/').status_code == 500
+    rendered = app.extensions['constrictor_metrics'].render()
+    assert 'constrictor_http_requests_total{module="blog",endpoint="blog.fail",method="GET",status="500"} 1' in rendered
+
+
+def test_disabled_by_default(make_app):
+    assert add_blog(make_app()).test_client().get('/metrics').status_code == 404
+
+
+def test_histogram_buckets_and_concurrent_updates():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+    def record():
+        for _ in range(1000):
+            registry.started('blog')
+            registry.finished('blog', 'blog.posts', 'GET', 200, 0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.started('blog')
+    registry.finished('blog', 'blog.posts', 'GET', 200, 0.05)
+
+    lines = registry.render().splitlines()
+    route = 'module="blog",endpoint="blog.posts"'
+    assert f'constrictor_http_request_duration_seconds_bucket{{{route},le="0.1"}} 1' in lines
+    assert f'constrictor_http_request_duration_seconds_bucket{{{route},le="1.0"}} 8001' in lines
+    assert f'constrictor_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 8001' in lines
+    assert f'constrictor_http_request_duration_seconds_sum{{{route}}} 4000.05' in lines
+    assert 'constrictor_http_requests_in_flight{module="blog"} 0' in lines
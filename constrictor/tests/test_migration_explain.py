@@ -0,0 +1,54 @@
+import sqlalchemy as sa
+
+from constrictor.migration_explain import (
+    CREATE, METADATA, REWRITE, SCAN, classify_statement, explain_sql, split_statements,
+)
+
+OFFLINE_SQL = """BEGIN;
+
+-- Running upgrade  -> 1a2b
+
+CREATE TABLE parcels (
+    id INTEGER NOT NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_orders_total ON orders (total);
+
+INSERT INTO alembic_version (version_num) VALUES ('1a2b');
+
+COMMIT;
+"""
+
+
+def test_split_statements_drops_comments_and_transaction_control():
+    statements = split_statements(OFFLINE_SQL)
+    assert len(statements) == 3
+    assert statements[0].startswith("CREATE TABLE parcels (")
+    assert statements[1] == "CREATE INDEX ix_orders_total ON orders (total)"
+
+
+def test_classify_statement():
+    assert classify_statement("ALTER TABLE orders ALTER COLUMN total TYPE NUMERIC") == ("orders", REWRITE)
+    assert classify_statement('ALTER TABLE "orders" ADD COLUMN paid BOOLEAN NOT NULL') == ("orders", REWRITE)
+    assert classify_statement("ALTER TABLE orders ADD COLUMN type VARCHAR(20)") == ("orders", METADATA)
+    assert classify_statement("ALTER TABLE orders ADD CONSTRAINT fk FOREIGN KEY (c) REFERENCES c (id)") == ("orders", SCAN)
+    assert classify_statement("CREATE UNIQUE INDEX ix ON orders (code)") == ("orders", SCAN)
+    assert classify_statement("CREATE INDEX CONCURRENTLY ix ON orders (code)") == ("orders", METADATA)
+    assert classify_statement("INSERT INTO _alembic_tmp_orders (id) SELECT id FROM orders") == ("orders", REWRITE)
+    assert classify_statement("CREATE TABLE parcels (id INTEGER)") == ("parcels", CREATE)
+    assert classify_statement("UPDATE alembic_version SET version_num='x'") == (None, None)
+
+
+def test_explain_sql_estimates_existing_tables():
+    engine = sa.create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(sa.text("CREATE TABLE orders (id INTEGER PRIMARY KEY, total INTEGER)"))
+        connection.execute(sa.text("INSERT INTO orders (total) VALUES (1), (2)"))
+
+        explained = explain_sql(OFFLINE_SQL, connection)
+
+    assert [(e.table, e.kind, e.rows) for e in explained] == [
+        ("parcels", CREATE, None), ("orders", SCAN, 2), (None, None, None),
+    ]
+    assert explained[1].is_large(2) and not explained[1].is_large(3)
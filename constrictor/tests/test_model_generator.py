@@ -0,0 +1,91 @@
+import pytest
+import sqlalchemy as sa
+
+from constrictor import db
+from constrictor.model_generator import column_type, render_models
+from constrictor.yaml_parser import YamlTemplateParser
+
+AUTHORS = {
+    'name': 'GenAuthor',
+    'table': 'gen_author',
+    'columns': [{'name': 'id', 'type': 'Integer', 'primary_key': True}],
+}
+
+POSTS = {
+    'name': 'GenPost',
+    'table': 'gen_post',
+    'columns': [
+        {'name': 'id', 'type': 'Integer', 'primary_key': True},
+        {'name': 'author_id', 'type': 'Integer', 'foreign_key': 'gen_author.id', 'ondelete': 'CASCADE',
+         'nullable': False},
+        {'name': 'slug', 'type': 'String(120)', 'nullable': False},
+        {'name': 'price', 'type': 'Numeric(10, 2)', 'default': 0},
+        {'name': 'created_at', 'type': 'DateTime', 'auto_now': True},
+        {'name': 'updated_at', 'type': 'DateTime', 'auto_update': True},
+    ],
+    'indexes': [{'columns': ['author_id', 'created_at']}],
+    'unique': [['author_id', 'slug']],
+}
+
+
+def test_column_type():
+    assert column_type('Integer') == 'db.Integer'
+    assert column_type('String(255)') == 'db.String(255)'
+    assert column_type('Numeric( 10,2 )') == 'db.Numeric(10, 2)'
+    for bad in ('NotAType', 'String(__import__)', 'create_engine'):
+        with pytest.raises(ValueError):
+            column_type(bad)
+
+
+def test_generated_models_declare_indexes_and_constraints():
+    code = render_models('blog', [AUTHORS, POSTS])
+    assert "db.Index('ix_gen_post_author_id_created_at', 'author_id', 'created_at')" in code
+    assert "db.UniqueConstraint('author_id', 'slug', name='uq_gen_post_author_id_slug')" in code
+    assert "db.ForeignKey('gen_author.id', ondelete='CASCADE')" in code
+    assert "updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)" in code
+
+    namespace = {}
+    exec(compile(code, 'models.py', 'exec'), namespace)
+    tables = [db.metadata.tables['gen_author'], db.metadata.tables['gen_post']]
+    try:
+        engine = sa.create_engine('sqlite://')
+        db.metadata.create_all(engine, tables=tables)
+        inspector = sa.inspect(engine)
+        assert [i['column_names'] for i in inspector.get_indexes('gen_post')] == [['author_id', 'created_at']]
+        assert [c['column_names'] for c in inspector.get_unique_constraints('gen_post')] == [['author_id', 'slug']]
+        assert inspector.get_foreign_keys('gen_post')[0]['referred_table'] == 'gen_author'
+    finally:
+        for table in reversed(tables):
+            db.metadata.remove(table)
+
+    post = namespace['GenPost'](id=1, author_id=2, slug='x')
+    assert post.to_dict() == {'id': 1, 'author_id': 2, 'slug': 'x', 'price': None, 'created_at': None,
+                            'updated_at': None}
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'indexes': [['missing']]}, "unknown column 'missing'"),
+    ({'columns': [{'name': 'slug', 'type': 'String(10)'}]}, 'no primary_key'),
+    ({'name': 'Bad Name'}, 'Invalid model name'),
+])
+def test_invalid_model_declarations(change, message):
+    with pytest.raises(ValueError, match=message):
+        render_models('blog', [dict(POSTS, **change)])
+
+
+def test_models_section_generates_models_py(tmp_path):
+    (tmp_path / 'custom.yml').write_text(
+        "models:\n"
+        "  - name: '{{module_name|title}}Model'\n"
+        "    table: '{{module_name}}'\n"
+        "    columns:\n"
+        "      - {name: id, type: Integer, primary_key: true}\n"
+        "      - {name: name, type: String(255), index: true}\n"
+    )
+    parser = YamlTemplateParser(str(tmp_path))
+    parser.generate_module_structure('shop', parser.load_template('custom.yml'), tmp_path / 'out')
+
+    code = (tmp_path / 'out' / 'modules' / 'shop' / 'models.py').read_text()
+    assert 'class ShopModel(db.Model):' in code
+    assert '__tablename__ = "shop"' in code
+    assert 'name = db.Column(db.String(255), index=True)' in code
@@ -28,6 +28,19 @@ def test_performance_large_project():
         assert os.path.isdir('modules/module_0')
         assert os.path.isdir('modules/module_9')
 
+        # Scale to 1,000 modules through the batch command, which reuses one
+        # parser and renders modules in parallel
+        names = [f'batch_module_{i}' for i in range(1000)]
+        start_time = time.time()
+        result = runner.invoke(main, ['generate', 'many'] + names)
+        duration = time.time() - start_time
+
+        assert result.exit_code == 0
+        assert "1000 of 1000 module(s) generated" in result.output
+        assert duration < 60
+        assert os.path.isfile('modules/batch_module_0/routes.py')
+        assert os.path.isfile('modules/batch_module_999/tests/test_batch_module_999.py')
+
 def test_performance_project_creation():
     """Test performance of project creation."""
     runner = CliRunner()
@@ -42,3 +55,14 @@ def test_performance_project_creation():
         # Project creation should be fast
         assert result.exit_code == 0
         assert duration < 10  # Should create project in less than 10 seconds
+
+def test_performance_project_creation_without_venv():
+    """Test that --no-venv project creation is near-instant and offline."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        start_time = time.time()
+        result = runner.invoke(main, ['new', 'perf_project', '--no-venv'])
+        duration = time.time() - start_time
+
+        assert result.exit_code == 0
+        assert duration < 2
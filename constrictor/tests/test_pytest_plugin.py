@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from constrictor.cli import main
+
+PROJECT_TESTS = '''
+from constrictor import db, Role
+from modules.articles.models import ArticlesModel
+
+
+def test_copy_starts_from_template(constrictor_app):
+    assert ArticlesModel.query.count() == 0
+    db.session.add(ArticlesModel(name="first"))
+    db.session.add(Role(name="editor"))
+    db.session.commit()
+
+
+def test_copy_is_isolated(constrictor_app, constrictor_client):
+    assert ArticlesModel.query.count() == 0
+    assert Role.query.count() == 0
+    assert constrictor_client.get("/articles/hello/").status_code == 200
+
+
+def test_savepoint_commit(constrictor_db_session):
+    constrictor_db_session.add(ArticlesModel(name="first"))
+    constrictor_db_session.commit()
+    assert ArticlesModel.query.count() == 1
+
+
+def test_savepoint_rolled_back(constrictor_db_session):
+    assert ArticlesModel.query.count() == 0
+'''
+
+
+def test_plugin_fixtures_give_isolated_databases():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        assert runner.invoke(main, ['new', 'proj', '--no-venv']).exit_code == 0
+        os.chdir('proj')
+        assert runner.invoke(main, ['generate', 'articles']).exit_code == 0
+        with open('test_db_fixtures.py', 'w') as f:
+            f.write(PROJECT_TESTS)
+
+        result = subprocess.run(
+            [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', 'test_db_fixtures.py',
+             'modules/articles/tests/test_articles.py::test_articles_model'],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "5 passed" in result.stdout
@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+from constrictor import db
+from constrictor.querystats import current_stats
+
+
+class StatsItem(db.Model):
+    __tablename__ = "query_stats_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+
+def add_routes(app):
+    @app.route('/items/<int:n>')
+    def items(n):
+        # One query per item: the N+1 pattern
+        found = [db.session.scalar(select(StatsItem).where(StatsItem.id == i)) for i in range(n)]
+        return {'found': len([item for item in found if item])}
+
+    return app
+
+
+def test_counts_queries_per_request(make_app, caplog):
+    app = add_routes(make_app(CONSTRICTOR_QUERY_STATS=True))
+    client = app.test_client()
+
+    with caplog.at_level(logging.INFO, logger='constrictor.querystats'):
+        response = client.get('/items/2')
+    assert response.headers['X-Query-Count'] == '2'
+    assert response.headers['X-Query-Repeated'] == '0'
+    assert float(response.headers['X-Query-Time']) >= 0
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert [r.levelname for r in caplog.records if r.name == 'constrictor.querystats'] == ['INFO']
+    assert 'GET /items/2 200: 2 queries' in caplog.text
+
+    # Counts start over with each request, and nothing is tracked outside one
+    assert client.get('/items/1').headers['X-Query-Count'] == '1'
+    assert current_stats() is None
+
+
+def test_flags_repeated_statements_and_query_count(make_app, caplog):
+    app = add_routes(make_app(CONSTRICTOR_QUERY_STATS=True, CONSTRICTOR_N_PLUS_ONE_THRESHOLD=3,
+                                   CONSTRICTOR_QUERY_WARN_COUNT=4))
+    with caplog.at_level(logging.INFO, logger='constrictor.querystats'):
+        response = app.test_client().get('/items/5')
+
+    assert response.headers['X-Query-Repeated'] == '1'
+    warnings = [r.getMessage() for r in caplog.records
+                if r.name == 'constrictor.querystats' and r.levelname == 'WARNING']
+    assert warnings[0].startswith('GET /items/5 200: 5 queries in ')
+    assert warnings[0].endswith(' ms (more than 4)')
+    assert 'Possible N+1 in GET /items/5: ran 5 times: SELECT query_stats_item.id FROM query_stats_item' \
+        in warnings[1]
+
+
+@pytest.mark.parametrize('config', [{}, {'CONSTRICTOR_QUERY_STATS': False, 'DEBUG': True}])
+def test_disabled_by_default_outside_debug(make_app, config):
+    response = add_routes(make_app(**config)).test_client().get('/items/1')
+    assert 'X-Query-Count' not in response.headers
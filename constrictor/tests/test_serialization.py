@@ -0,0 +1,112 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from flask import Flask, jsonify
+
+from constrictor import SerializerMixin, db, load
+from constrictor import serialization
+from constrictor.serialization import JSONProvider, dumps, encoder_for
+
+
+class SerializedItem(SerializerMixin, db.Model):
+    __tablename__ = "serialized_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50))
+    price = db.Column(db.Numeric(10, 2))
+    token = db.Column(db.Uuid)
+    created_at = db.Column(db.DateTime)
+    day = db.Column(db.Date)
+
+
+class PlainItem(db.Model):
+    __tablename__ = "serialized_plain_item"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+
+TOKEN = uuid.UUID('12345678-1234-5678-1234-567812345678')
+
+
+def make_item(**values):
+    return SerializedItem(id=1, name='Café', price=decimal.Decimal('9.50'), token=TOKEN,
+                          created_at=datetime.datetime(2024, 1, 2, 3, 4, 5), day=None, **values)
+
+
+def test_encoder_is_built_once_per_model(monkeypatch):
+    expected = {'id': 1, 'name': 'Café', 'price': '9.50', 'token': str(TOKEN),
+                'created_at': '2024-01-02T03:04:05', 'day': None}
+    assert make_item().to_dict() == expected
+
+    # Later rows reuse the cached encoder without inspecting the mapper
+    monkeypatch.setattr(serialization, 'inspect', None)
+    assert encoder_for(SerializedItem) is encoder_for(SerializedItem)
+    assert make_item().to_dict() == expected
+
+
+def test_dumps_handles_models_and_extra_types():
+    payload = {'item': make_item(), 'plain': PlainItem(id=7), 'when': datetime.date(2024, 5, 6), 1: 'x'}
+    assert dumps(payload) == (
+        '{"item":{"id":1,"name":"Café","price":"9.50","token":"12345678-1234-5678-1234-567812345678",'
+        '"created_at":"2024-01-02T03:04:05","day":null},"plain":{"id":7},"when":"2024-05-06","1":"x"}'
+    ).encode()
+    assert dumps({'n': 2 ** 70}) == b'{"n":1180591620717411303424}'
+    with pytest.raises(TypeError):
+        dumps({'x': object()})
+
+
+def test_provider_is_opt_in(tmp_path):
+    app = Flask(__name__, root_path=str(tmp_path))
+    load(app)
+    assert type(app.json) is not JSONProvider
+
+    @app.route('/dates')
+    def dates():
+        return {'b': 1, 'a': datetime.datetime(2024, 1, 2, 3, 4, 5)}
+
+    # Flask's own wire format is untouched
+    assert app.test_client().get('/dates').data == b'{"a":"Tue, 02 Jan 2024 03:04:05 GMT","b":1}\n'
+
+
+def test_load_installs_provider(tmp_path):
+    app = Flask(__name__, root_path=str(tmp_path))
+    app.config['CONSTRICTOR_JSON'] = True
+    load(app)
+    assert isinstance(app.json, JSONProvider)
+
+    @app.route('/item')
+    def item():
+        return jsonify(make_item())
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        from flask import request
+        return {'received': request.get_json(), 'at': datetime.datetime(2024, 1, 1)}
+
+    client = app.test_client()
+    response = client.get('/item')
+    assert response.data.startswith(b'{"id":1,"name":"Caf\xc3\xa9"')
+    assert response.get_json()['created_at'] == '2024-01-02T03:04:05'
+    assert client.post('/echo', json={'a': [1, 2]}).get_json() == {'received': {'a': [1, 2]},
+                                                                   'at': '2024-01-01T00:00:00'}
+
+
+def test_existing_provider_is_kept(tmp_path):
+    class CustomProvider(JSONProvider):
+        pass
+
+    app = Flask(__name__, root_path=str(tmp_path))
+    app.config['CONSTRICTOR_JSON'] = True
+    app.json = CustomProvider(app)
+    load(app)
+    assert type(app.json) is CustomProvider
+
+
+def test_orjson_matches_stdlib(monkeypatch):
+    pytest.importorskip('orjson')
+    payload = {'item': make_item(), 'values': [1.5, None, True], 'when': datetime.datetime(2024, 1, 1, 12)}
+    fast = dumps(payload)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert dumps(payload) == fast
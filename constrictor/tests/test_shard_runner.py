@@ -0,0 +1,65 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from constrictor.cli import main
+from constrictor.shard_runner import combine_exit_codes, order_shards, run_shards
+
+
+def test_order_shards_slowest_first_unknown_first():
+    shards = [('fast', 'f'), ('slow', 's'), ('new', 'n'), ('medium', 'm')]
+    durations = {'fast': 0.5, 'slow': 12.0, 'medium': 3.0}
+    assert [name for name, _ in order_shards(shards, durations)] == ['new', 'slow', 'medium', 'fast']
+
+
+def test_combine_exit_codes():
+    assert combine_exit_codes([0, 0]) == 0
+    assert combine_exit_codes([0, 5]) == 0
+    assert combine_exit_codes([5, 5]) == 5
+    assert combine_exit_codes([0, 2, 1]) == 1
+    assert combine_exit_codes([0, 2]) == 2
+    assert combine_exit_codes([]) == 5
+
+
+def _write_module_tests(name, body):
+    os.makedirs(f'modules/{name}/tests')
+    with open(f'modules/{name}/tests/test_{name}.py', 'w') as f:
+        f.write(body)
+
+
+def test_run_shards_streams_prefixed_output_and_records_durations(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write_module_tests('alpha', "def test_ok():\n    assert True\n")
+    _write_module_tests('beta', "def test_broken():\n    assert False\n")
+
+    lines = []
+    durations_path = tmp_path / 'durations.json'
+    code = run_shards(
+        [('alpha', 'modules/alpha/tests'), ('beta', 'modules/beta/tests')],
+        jobs=2, echo=lines.append, durations_path=durations_path,
+    )
+
+    assert code == 1
+    assert any(line.startswith('[alpha] ') and 'PASSED' in line for line in lines)
+    assert any(line.startswith('[beta] ') and 'FAILED' in line for line in lines)
+    assert set(json.loads(durations_path.read_text())) == {'alpha', 'beta'}
+
+
+def test_cli_test_with_jobs_runs_every_module_shard():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('app.py', 'w') as f:
+            f.write("print('Mock app')")
+        _write_module_tests('module1', "def test_one():\n    pass\n")
+        _write_module_tests('module2', "def test_two():\n    pass\n")
+        os.makedirs('modules/no_tests')
+
+        result = runner.invoke(main, ['test', '--jobs', '2'])
+
+        assert result.exit_code == 0
+        assert "Running tests for 2 module(s) with 2 job(s)" in result.output
+        assert "[module1] finished in" in result.output
+        assert "[module2] finished in" in result.output
+        assert "All tests passed!" in result.output
+        assert os.path.isfile('.constrictor/test_durations.json')
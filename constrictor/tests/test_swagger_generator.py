@@ -415,3 +415,84 @@ def get_users():
         tag_names = [tag["name"] for tag in tags]
         assert "test_module" in tag_names
         assert "another_module" in tag_names
+
+    def test_refresh_modules_only_touches_changed_module(self, temp_project):
+        """Test incremental regeneration replaces one module's paths."""
+        other_dir = temp_project / "modules" / "other_module"
+        other_dir.mkdir()
+        (other_dir / "routes.py").write_text(
+            "from flask import Blueprint\n"
+            "blueprint = Blueprint('other_module', __name__)\n\n"
+            "@blueprint.route('/other/')\n"
+            "def index():\n"
+            "    return 'ok'\n"
+        )
+
+        generator = SwaggerGenerator(temp_project)
+        generator.build()
+        other_operation = generator.swagger_spec["paths"]["/other/"]["get"]
+
+        routes_file = temp_project / "modules" / "test_module" / "routes.py"
+        routes_file.write_text(
+            "from flask import Blueprint\n"
+            "blueprint = Blueprint('test_module', __name__)\n\n"
+            "@blueprint.route('/test_module/renamed/')\n"
+            "def renamed():\n"
+            "    return 'ok'\n"
+        )
+        generator.refresh_modules({"test_module"})
+
+        paths = generator.swagger_spec["paths"]
+        assert "/test_module/renamed/" in paths
+        assert "/test_module/" not in paths
+        assert "/test_module/users/{int:user_id}/" not in paths
+        assert paths["/other/"]["get"] is other_operation
+        assert [tag["name"] for tag in generator.swagger_spec["tags"]] == ["other_module", "test_module"]
+
+    def test_refresh_modules_drops_deleted_module(self, temp_project):
+        """Test incremental regeneration removes a module whose routes.py is gone."""
+        generator = SwaggerGenerator(temp_project)
+        generator.build()
+
+        (temp_project / "modules" / "test_module" / "routes.py").unlink()
+        generator.refresh_modules({"test_module"})
+
+        assert generator.swagger_spec["paths"] == {}
+        assert generator.swagger_spec["tags"] == []
+        assert generator.processed_modules == set()
+
+    def test_refresh_modules_keeps_operation_owned_by_other_module(self, temp_project):
+        """Test dropping a module leaves an operation another module redeclared."""
+        generator = SwaggerGenerator(temp_project)
+        generator.build()
+        (temp_project / "modules" / "zz_module").mkdir()
+        (temp_project / "modules" / "zz_module" / "routes.py").write_text(
+            "from flask import Blueprint\n"
+            "blueprint = Blueprint('zz_module', __name__)\n\n"
+            "@blueprint.route('/test_module/')\n"
+            "def index():\n"
+            "    return 'ok'\n"
+        )
+        generator.refresh_modules({"zz_module"})
+        assert generator.swagger_spec["paths"]["/test_module/"]["get"]["tags"] == ["zz_module"]
+
+        (temp_project / "modules" / "test_module" / "routes.py").unlink()
+        generator.refresh_modules({"test_module"})
+        assert generator.swagger_spec["paths"]["/test_module/"]["get"]["tags"] == ["zz_module"]
+
+        # A full build starts over instead of piling onto earlier records
+        generator.build()
+        assert sum(len(ops) for ops in generator._module_operations.values()) == \
+            sum(len(ops) for ops in generator.swagger_spec["paths"].values())
+
+    def test_save_to_file_replaces_atomically(self, temp_project):
+        """Test saving leaves no temporary files behind and overwrites in place."""
+        generator = SwaggerGenerator(temp_project)
+        generator.build()
+        output_path = temp_project / "swagger.json"
+        output_path.write_text("stale")
+
+        generator.save_to_file(output_path, 'json')
+
+        assert json.loads(output_path.read_text())["openapi"] == "3.0.0"
+        assert [p.name for p in temp_project.iterdir() if p.name.startswith(".swagger.json")] == []
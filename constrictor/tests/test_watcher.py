@@ -0,0 +1,56 @@
+import os
+import threading
+
+from constrictor.watcher import PollingWatcher
+
+
+def _touch(path, content):
+    path.write_text(content)
+    # Bump mtime explicitly so the test doesn't depend on filesystem
+    # timestamp resolution.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_poll_reports_added_modified_and_removed(tmp_path):
+    modules = tmp_path / 'modules'
+    (modules / 'blog').mkdir(parents=True)
+    (modules / 'shop').mkdir()
+    blog_routes = modules / 'blog' / 'routes.py'
+    blog_routes.write_text('# blog')
+    shop_routes = modules / 'shop' / 'routes.py'
+    shop_routes.write_text('# shop')
+
+    watcher = PollingWatcher(tmp_path, ['modules/*/routes.py'])
+    assert watcher.poll() == set()
+
+    _touch(blog_routes, '# blog v2')
+    shop_routes.unlink()
+    (modules / 'news').mkdir()
+    news_routes = modules / 'news' / 'routes.py'
+    news_routes.write_text('# news')
+    (modules / 'blog' / 'models.py').write_text('# not watched')
+
+    assert watcher.poll() == {blog_routes, shop_routes, news_routes}
+    assert watcher.poll() == set()
+
+
+def test_watch_debounces_bursts_into_one_callback(tmp_path):
+    routes = tmp_path / 'routes.py'
+    routes.write_text('v1')
+    watcher = PollingWatcher(tmp_path, ['*.py'], interval=0.01, debounce=0.1)
+
+    batches = []
+    stop = threading.Event()
+
+    def callback(changed):
+        batches.append(changed)
+        stop.set()
+
+    _touch(routes, 'v2')
+    thread = threading.Thread(target=watcher.watch, args=(callback, stop))
+    thread.start()
+    _touch(routes, 'v3')
+    thread.join(timeout=5)
+
+    assert batches == [{routes}]
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from constrictor.yaml_parser import YamlTemplateParser
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / 'custom.yml').write_text("routes:\n  - path: '/{{module_name}}/'\n    function: index\n")
+    return tmp_path
+
+
+def test_render_compiles_each_source_once(template_dir):
+    parser = YamlTemplateParser(str(template_dir))
+
+    assert parser.render_template_content('/{{module_name}}/', {'module_name': 'blog'}) == '/blog/'
+    assert parser.render_template_content('/{{module_name}}/', {'module_name': 'shop'}) == '/shop/'
+
+    info = parser._compile.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+def test_compiled_template_cache_is_bounded(template_dir):
+    parser = YamlTemplateParser(str(template_dir), cache_size=2)
+    for i in range(5):
+        parser.render_template_content(f'{i}-{{{{module_name}}}}', {'module_name': 'x'})
+    assert parser._compile.cache_info().currsize == 2
+
+
+def test_load_template_cached_until_file_changes(template_dir):
+    parser = YamlTemplateParser(str(template_dir))
+    first = parser.load_template('custom.yml')
+    first['routes'].clear()
+
+    # Mutating a returned template must not leak into the cache
+    assert parser.load_template('custom.yml')['routes'][0]['function'] == 'index'
+
+    path = template_dir / 'custom.yml'
+    path.write_text("routes:\n  - path: '/x/'\n    function: changed\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert YamlTemplateParser(str(template_dir)).load_template('custom.yml')['routes'][0]['function'] == 'changed'
+
+
+def test_bytecode_cache_persists_across_parsers(template_dir, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'bytecode'
+    source = 'Hello from {{module_name}}!'
+
+    first = YamlTemplateParser(str(template_dir), bytecode_cache_dir=str(cache_dir))
+    assert first.render_template_content(source, {'module_name': 'blog'}) == 'Hello from blog!'
+    cached_files = os.listdir(cache_dir)
+    assert len(cached_files) == 1
+
+    second = YamlTemplateParser(str(template_dir), bytecode_cache_dir=str(cache_dir))
+
+    def no_compile(*args, **kwargs):
+        raise AssertionError("template should have been loaded from the bytecode cache")
+
+    monkeypatch.setattr(second.jinja_env, 'compile', no_compile)
+    assert second.render_template_content(source, {'module_name': 'shop'}) == 'Hello from shop!'
+    assert os.listdir(cache_dir) == cached_files
+
+
+def _module_template(greeting):
+    return {
+        'structure': {'files': [
+            {'name': 'views.py', 'content': f"# {{{{module_name}}}} views ({greeting})\n"},
+            {'name': 'models.py', 'content': f"# {{{{module_name}}}} models ({greeting})\n"},
+        ]},
+    }
+
+
+def test_update_refreshes_generated_files_and_keeps_edited_ones(template_dir, tmp_path):
+    parser = YamlTemplateParser(str(template_dir))
+    out = tmp_path / 'project'
+    module_dir = out / 'modules' / 'blog'
+
+    parser.generate_module_structure('blog', _module_template('v1'), out)
+    (module_dir / 'models.py').write_text("# hand-written models\n")
+    (module_dir / 'views.py').unlink()
+
+    manifest = parser.generate_module_structure('blog', _module_template('v2'), out, update=True)
+
+    assert manifest.created == [module_dir / 'views.py']
+    assert manifest.skipped == [module_dir / 'models.py']
+    assert (module_dir / 'views.py').read_text() == "# blog views (v2)"
+    assert (module_dir / 'models.py').read_text() == "# hand-written models\n"
+
+    # Reverting the edit makes the file "as generated" (v1) again, so the
+    # next update refreshes it - the record kept v1 as its merge base.
+    (module_dir / 'models.py').write_text("# blog models (v1)")
+    manifest = parser.generate_module_structure('blog', _module_template('v2'), out, update=True)
+    assert manifest.updated == [module_dir / 'models.py']
+    assert manifest.skipped == []
@@ -0,0 +1,100 @@
+"""
+Polling file watcher for Constrictor.
+
+A deliberately small, standard-library-only watcher: it stats every file
+matching a set of glob patterns on an interval and reports what changed.
+Polling is cheap at the scale of a project's modules/ tree (a few hundred
+stat() calls) and behaves the same on every platform and filesystem,
+including network mounts and containers where inotify/FSEvents don't fire.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+
+class PollingWatcher:
+    """Watch files matching glob patterns under a root directory."""
+
+    def __init__(self, root: Path, patterns: Iterable[str],
+                 interval: float = 0.5, debounce: float = 0.3):
+        """
+        Initialize the watcher and take the baseline snapshot.
+
+        Args:
+            root: Directory the patterns are relative to
+            patterns: Glob patterns (e.g. 'modules/*/routes.py')
+            interval: Seconds between polls
+            debounce: Seconds the tree must stay quiet before a batch of
+                changes is reported
+        """
+        self.root = Path(root)
+        self.patterns = list(patterns)
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = self.snapshot()
+
+    def snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """
+        Stat every watched file.
+
+        Returns:
+            Mapping of path to (mtime_ns, size)
+        """
+        state = {}
+        for pattern in self.patterns:
+            for path in self.root.glob(pattern):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    # Deleted between glob() and stat() - the next poll
+                    # reports it as removed.
+                    continue
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def poll(self) -> Set[Path]:
+        """
+        Compare the tree against the previous snapshot.
+
+        Returns:
+            Paths that were added, modified or removed since the last poll
+        """
+        current = self.snapshot()
+        previous = self._snapshot
+        self._snapshot = current
+
+        changed = {path for path, state in current.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in current)
+        return changed
+
+    def watch(self, callback: Callable[[Set[Path]], None],
+              stop_event: Optional[threading.Event] = None) -> None:
+        """
+        Poll until stop_event is set (or forever), calling callback with each
+        debounced batch of changed paths.
+
+        An editor save often touches a file several times in quick succession,
+        and a `git checkout` touches many files at once - changes keep
+        accumulating until nothing new has happened for `debounce` seconds,
+        so each burst produces a single callback.
+
+        Args:
+            callback: Called with the set of changed paths
+            stop_event: Optional event that ends the loop when set
+        """
+        stop_event = stop_event or threading.Event()
+        pending: Set[Path] = set()
+        last_change = 0.0
+
+        while not stop_event.is_set():
+            changed = self.poll()
+            now = time.monotonic()
+            if changed:
+                pending.update(changed)
+                last_change = now
+            elif pending and now - last_change >= self.debounce:
+                batch, pending = pending, set()
+                callback(batch)
+            stop_event.wait(self.interval)
@@ -4,34 +4,81 @@ YAML Template Parser for Constrictor Framework
 This module handles parsing YAML templates and generating module structures.
 """
 
+import copy
+import functools
+import hashlib
+import json
 import os
+import threading
 import yaml
 import jinja2
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from .file_writer import StagedWriter, WriteManifest, content_hash, write_if_changed
+from .model_generator import render_models
+
+
+# Compiled Jinja templates kept per parser. The default module template has
+# a few dozen distinct strings, so this comfortably holds several templates.
+DEFAULT_TEMPLATE_CACHE_SIZE = 512
+
+# Parsed YAML templates keyed by resolved path, with the mtime they were
+# parsed at - shared across parser instances so every `generate` in one
+# process parses a given template file once until it changes on disk.
+_template_data_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+_template_data_lock = threading.Lock()
+
+# Written into every generated module: the content hash of each file as it
+# was generated, which is the common ancestor `generate --update` merges
+# against. Commit it alongside the module.
+GENERATION_RECORD = ".constrictor-generated.json"
 
 
 class YamlTemplateParser:
     """Parser for YAML templates used in module generation."""
     
-    def __init__(self, template_dir: str = None):
+    def __init__(self, template_dir: str = None,
+                 cache_size: int = DEFAULT_TEMPLATE_CACHE_SIZE,
+                 bytecode_cache_dir: str = None):
         """Initialize the YAML template parser.
         
         Args:
             template_dir: Directory containing YAML templates
+            cache_size: Maximum number of compiled templates kept in memory
+            bytecode_cache_dir: Directory for an on-disk Jinja bytecode cache,
+                so compiled templates survive across runs (defaults to
+                $CONSTRICTOR_BYTECODE_CACHE; disabled if neither is set)
         """
         if template_dir is None:
             # Default to the templates directory in the constrictor package
             template_dir = os.path.join(os.path.dirname(__file__), 'templates')
-        
+        if bytecode_cache_dir is None:
+            bytecode_cache_dir = os.environ.get('CONSTRICTOR_BYTECODE_CACHE')
+
         self.template_dir = Path(template_dir)
+        self.bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            self.bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+
         self.jinja_env = jinja2.Environment(
             loader=jinja2.FileSystemLoader(template_dir),
-            autoescape=jinja2.select_autoescape(['html', 'xml'])
+            autoescape=jinja2.select_autoescape(['html', 'xml']),
+            bytecode_cache=self.bytecode_cache,
         )
+        # LRU of compiled templates keyed by source text. The same path/content
+        # strings are rendered for every route and every module, so each is
+        # compiled only once per parser (lru_cache is thread-safe, which
+        # generate_modules_from_yaml's thread pool relies on).
+        self._compile = functools.lru_cache(maxsize=cache_size)(self._compile_template)
     
     def load_template(self, template_name: str = "module_template.yml") -> Dict[str, Any]:
         """Load a YAML template file.
+
+        Parsed results are cached by path and modification time, so loading
+        an unchanged template again skips the YAML parse.
         
         Args:
             template_name: Name of the template file
@@ -43,14 +90,26 @@ class YamlTemplateParser:
         
         if not template_path.exists():
             raise FileNotFoundError(f"Template not found: {template_path}")
+
+        key = template_path.resolve()
+        mtime = template_path.stat().st_mtime_ns
+        with _template_data_lock:
+            cached = _template_data_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            # Callers get their own copy, so mutating it can't poison the cache
+            return copy.deepcopy(cached[1])
         
         with open(template_path, 'r', encoding='utf-8') as f:
             template_content = f.read()
         
         try:
-            return yaml.safe_load(template_content)
+            template_data = yaml.safe_load(template_content)
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML template: {e}")
+
+        with _template_data_lock:
+            _template_data_cache[key] = (mtime, template_data)
+        return copy.deepcopy(template_data)
     
     def render_template_content(self, content: str, context: Dict[str, Any]) -> str:
         """Render template content using Jinja2.
@@ -62,59 +121,106 @@ class YamlTemplateParser:
         Returns:
             Rendered content string
         """
-        template = self.jinja_env.from_string(content)
-        return template.render(**context)
+        return self._compile(content).render(**context)
+
+    def _compile_template(self, content: str) -> jinja2.Template:
+        """Compile template source, going through the bytecode cache if enabled.
+
+        Environment.from_string() never consults the bytecode cache (only
+        loader-based templates do), so this mirrors what jinja2's
+        BaseLoader.load does, keyed by a hash of the source text.
+        """
+        if self.bytecode_cache is None:
+            return self.jinja_env.from_string(content)
+
+        name = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        bucket = self.bytecode_cache.get_bucket(self.jinja_env, name, None, content)
+        code = bucket.code
+        if code is None:
+            code = self.jinja_env.compile(content, name)
+            bucket.code = code
+            self.bytecode_cache.set_bucket(bucket)
+        return self.jinja_env.template_class.from_code(
+            self.jinja_env, code, self.jinja_env.make_globals(None), None
+        )
     
     def generate_module_structure(self, module_name: str, template_data: Dict[str, Any], 
-                                output_dir: Path) -> None:
+                                output_dir: Path, update: bool = False) -> WriteManifest:
         """Generate module structure from YAML template.
+
+        Every file is rendered into memory first and then written through a
+        StagedWriter, so files whose content hasn't changed are left
+        untouched on disk.
+
+        With update=True the module is regenerated in place as a file-level
+        three-way merge against the module's generation record: files still
+        exactly as they were generated are refreshed from the template,
+        files edited by hand since are left alone (reported as skipped), and
+        missing files are created.
         
         Args:
             module_name: Name of the module to generate
             template_data: Parsed YAML template data
             output_dir: Directory where to generate the module
+            update: Merge into an existing module instead of overwriting it
+
+        Returns:
+            Manifest of the files created, updated, left unchanged and skipped
         """
         context = {'module_name': module_name}
+        writer = StagedWriter()
         
         # Create module directory
         module_dir = output_dir / 'modules' / module_name
-        module_dir.mkdir(parents=True, exist_ok=True)
+        writer.stage_dir(module_dir)
         
         # Generate structure
         if 'structure' in template_data:
             self._generate_structure(module_name, template_data['structure'], 
-                                   module_dir, context)
+                                   module_dir, context, writer)
+
+        # Generate models (after structure, so a `models:` section takes
+        # precedence over a hand-written models.py file entry)
+        if 'models' in template_data:
+            self._generate_models(module_name, template_data['models'],
+                                  module_dir, context, writer)
         
         # Generate routes
         if 'routes' in template_data:
             self._generate_routes(module_name, template_data['routes'], 
-                                module_dir, context)
+                                module_dir, context, writer)
         
         # Generate templates
         if 'templates' in template_data:
             self._generate_templates(module_name, template_data['templates'], 
-                                   output_dir, context)
+                                   output_dir, context, writer)
         
         # Generate tests
         if 'tests' in template_data:
             self._generate_tests(module_name, template_data['tests'], 
-                               module_dir, context)
+                               module_dir, context, writer)
+
+        record_path = module_dir / GENERATION_RECORD
+        baseline = _read_generation_record(record_path, output_dir) if update else None
+        manifest = writer.commit(baseline)
+        _write_generation_record(record_path, output_dir, writer, manifest, baseline)
+        return manifest
     
     def _generate_structure(self, module_name: str, structure_data: Dict[str, Any], 
-                          module_dir: Path, context: Dict[str, Any]) -> None:
+                          module_dir: Path, context: Dict[str, Any],
+                          writer: StagedWriter) -> None:
         """Generate directory structure and files."""
         
         # Create directories
         if 'directories' in structure_data:
             for dir_name in structure_data['directories']:
                 dir_path = module_dir / dir_name
-                dir_path.mkdir(exist_ok=True)
+                writer.stage_dir(dir_path)
                 
                 # Create __init__.py for Python directories
                 if dir_name in ['tests', 'views']:
                     init_file = dir_path / '__init__.py'
-                    with open(init_file, 'w') as f:
-                        f.write(f"# {module_name} {dir_name} initialization file\n")
+                    writer.stage(init_file, f"# {module_name} {dir_name} initialization file\n")
         
         # Create files
         if 'files' in structure_data:
@@ -131,22 +237,57 @@ class YamlTemplateParser:
                     # Use direct content
                     rendered_content = self.render_template_content(file_data['content'], context)
                 
-                with open(file_path, 'w') as f:
-                    f.write(rendered_content)
+                writer.stage(file_path, rendered_content)
     
+    def _generate_models(self, module_name: str, models_data: List[Dict[str, Any]],
+                         module_dir: Path, context: Dict[str, Any],
+                         writer: StagedWriter) -> None:
+        """Generate models.py from YAML model declarations."""
+        if not isinstance(models_data, list):
+            raise ValueError("Template 'models' section must be a list of models")
+        models = self._render_values(models_data, context)
+        writer.stage(module_dir / 'models.py', render_models(module_name, models))
+
+    def _render_values(self, value: Any, context: Dict[str, Any]) -> Any:
+        """Render every string inside nested YAML data as a Jinja template."""
+        if isinstance(value, str):
+            return self.render_template_content(value, context)
+        if isinstance(value, list):
+            return [self._render_values(item, context) for item in value]
+        if isinstance(value, dict):
+            return {key: self._render_values(item, context) for key, item in value.items()}
+        return value
+
     def _generate_routes(self, module_name: str, routes_data: List[Dict[str, Any]],
-                        module_dir: Path, context: Dict[str, Any]) -> None:
+                        module_dir: Path, context: Dict[str, Any],
+                        writer: StagedWriter) -> None:
         """Generate routes.py file from YAML routes definition."""
 
-        uses_auth = any('roles' in route or 'model_access' in route for route in routes_data)
+        uses_auth = any('roles' in route or 'model_access' in route or 'crud' in route
+                        for route in routes_data)
+        crud_models = sorted({self.render_template_content(route['crud']['model'], context)
+                              for route in routes_data if 'crud' in route})
 
         routes_content = "from flask import Blueprint, render_template\n"
         if uses_auth:
             routes_content += "from constrictor.auth import roles_required, model_access_required\n"
+        if any('cache' in route for route in routes_data):
+            routes_content += "from constrictor.cache import cached\n"
+        if any(isinstance(route.get('conditional'), dict) for route in routes_data):
+            routes_content += "from constrictor.conditional import conditional, model_validator\n"
+        elif any(route.get('conditional') for route in routes_data):
+            routes_content += "from constrictor.conditional import conditional\n"
+        if crud_models:
+            routes_content += "from constrictor.crud import CrudResource\n"
+            routes_content += f"from .models import {', '.join(crud_models)}\n"
         routes_content += "\n"
         routes_content += f"blueprint = Blueprint('{module_name}', __name__)\n\n"
 
         for route in routes_data:
+            if 'crud' in route:
+                routes_content += self._render_crud_route(module_name, route, context)
+                continue
+
             path = self.render_template_content(route['path'], context)
             function_name = route['function']
             method = route.get('method', 'GET')
@@ -161,6 +302,12 @@ class YamlTemplateParser:
                 routes_content += f"@roles_required({roles})\n"
             if 'model_access' in route:
                 routes_content += f"@model_access_required('{module_name}', '{route['model_access']}')\n"
+            # Below the auth decorators, so access is checked before a
+            # 304 or a cached response is served
+            if isinstance(route.get('conditional'), dict):
+                raise ValueError(f"Route {path!r}: conditional with a timestamp column needs a crud: route")
+            routes_content += self._render_conditional_decorator(route)
+            routes_content += self._render_cache_decorator(route)
 
             routes_content += f"def {function_name}():\n"
 
@@ -174,34 +321,126 @@ class YamlTemplateParser:
 
             routes_content += "\n"
 
-        routes_file = module_dir / 'routes.py'
-        with open(routes_file, 'w') as f:
-            f.write(routes_content)
+        writer.stage(module_dir / 'routes.py', routes_content)
     
+    def _render_crud_route(self, module_name: str, route: Dict[str, Any],
+                           context: Dict[str, Any]) -> str:
+        """Render the list/get/create/update/delete views for a `crud:` route.
+
+        The views are thin wrappers around a constrictor.crud.CrudResource,
+        each gated by model_access_required for its action.
+        """
+        crud = self._render_values(route['crud'], context)
+        if not isinstance(crud, dict) or 'model' not in crud:
+            raise ValueError(f"crud route {route.get('path')!r} needs a 'model'")
+        path = self.render_template_content(route['path'], context)
+        if not path.endswith('/'):
+            path += '/'
+        prefix = route.get('function', 'crud')
+        model = crud['model']
+        access = crud.get('access', module_name)
+        id_type = crud.get('id_type', 'int')
+        if id_type not in ('int', 'string', 'uuid'):
+            raise ValueError(f"crud route {path!r}: id_type must be int, string or uuid")
+
+        options = [model]
+        for key in ('order_by', 'descending', 'fields', 'page_size', 'max_page_size',
+                    'chunk_size', 'max_bulk_items'):
+            if key in crud:
+                options.append(f"{key}={crud[key]!r}")
+        content = f"{prefix}_crud = CrudResource({', '.join(options)})\n\n"
+
+        roles = ''
+        if 'roles' in route:
+            roles = f"@roles_required({', '.join(repr(role) for role in route['roles'])})\n"
+
+        item_path = f"{path}<{id_type}:pk>/"
+        views = [
+            (path, "'GET'", 'read', 'list', '', f"List {model} items, one keyset-paginated page at a time."),
+            (path, "'POST'", 'create', 'create', '', f"Create a {model} item."),
+            (item_path, "'GET'", 'read', 'get', 'pk', f"Get a {model} item by primary key."),
+            (item_path, "'PUT', 'PATCH'", 'update', 'update', 'pk', f"Update fields of a {model} item."),
+            (item_path, "'DELETE'", 'delete', 'delete', 'pk', f"Delete a {model} item."),
+        ]
+        if crud.get('export'):
+            views.append((f"{path}export/", "'GET'", 'read', 'export', '',
+                          f"Stream every {model} item as NDJSON or CSV (?format=csv)."))
+        if crud.get('bulk'):
+            views += [
+                (f"{path}bulk/", "'POST'", 'create', 'bulk_create', '',
+                 f"Create {model} items from a JSON array or NDJSON, in chunked transactions."),
+                (f"{path}bulk/", "'PATCH'", 'update', 'bulk_update', '',
+                 f"Update {model} items from a JSON array or NDJSON, in chunked transactions."),
+            ]
+        for view_path, methods, action, handler, args, doc in views:
+            content += f"@blueprint.route('{view_path}', methods=[{methods}])\n"
+            content += roles
+            content += f"@model_access_required('{access}', '{action}')\n"
+            if handler in ('list', 'get'):
+                content += self._render_conditional_decorator(route, model)
+                content += self._render_cache_decorator(route)
+            content += f"def {prefix}_{handler}({args}):\n"
+            content += f'    """{doc}"""\n'
+            content += f"    return {prefix}_crud.{handler}({args})\n\n"
+        return content
+
+    def _render_conditional_decorator(self, route: Dict[str, Any], model: Optional[str] = None) -> str:
+        """Render @conditional(...) for a route's `conditional:` option: true
+        for a body-hash ETag, or {updated_at: <column>} on a crud: route to
+        check the model's timestamp before running the view."""
+        option = route.get('conditional')
+        if not option:
+            return ''
+        if isinstance(option, dict):
+            column = option.get('updated_at', 'updated_at')
+            return f"@conditional(model_validator({model}, {column!r}))\n"
+        return "@conditional()\n"
+
+    def _render_cache_decorator(self, route: Dict[str, Any]) -> str:
+        """Render @cached(...) for a route's `cache:` option: a TTL in
+        seconds, or a mapping with `ttl` and `vary_on_roles`."""
+        cache = route.get('cache')
+        if cache is None or cache is False:
+            return ''
+        if not isinstance(cache, dict):
+            cache = {'ttl': cache}
+        ttl = cache.get('ttl', 60)
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0:
+            raise ValueError(f"Route {route.get('path')!r}: cache ttl must be a positive number of seconds")
+        args = [f"ttl={ttl!r}"]
+        if 'vary_on_roles' in cache:
+            args.append(f"vary_on_roles={bool(cache['vary_on_roles'])}")
+        return f"@cached({', '.join(args)})\n"
+
     def _generate_templates(self, module_name: str, templates_data: List[Dict[str, Any]], 
-                          output_dir: Path, context: Dict[str, Any]) -> None:
-        """Generate HTML templates from YAML definition."""
+                          output_dir: Path, context: Dict[str, Any],
+                          writer: StagedWriter) -> None:
+        """Generate HTML templates from YAML definition.
+
+        These live in the shared project-root templates/ directory, so
+        skipping unchanged ones matters: rewriting them would invalidate
+        Jinja's template cache for every module, not just this one.
+        """
         
         # Create templates directory in project root
         templates_dir = output_dir / 'templates'
-        templates_dir.mkdir(exist_ok=True)
+        writer.stage_dir(templates_dir)
         
         for template_data in templates_data:
             template_path = self.render_template_content(template_data['path'], context)
             template_file = templates_dir / template_path
-            template_file.parent.mkdir(parents=True, exist_ok=True)
             
             rendered_content = self.render_template_content(template_data['content'], context)
             
-            with open(template_file, 'w') as f:
-                f.write(rendered_content)
+            writer.stage(template_file, rendered_content)
     
     def _generate_tests(self, module_name: str, tests_data: List[Dict[str, Any]], 
-                       module_dir: Path, context: Dict[str, Any]) -> None:
+                       module_dir: Path, context: Dict[str, Any],
+                       writer: StagedWriter) -> None:
         """Generate test files from YAML definition."""
         
         tests_dir = module_dir / 'tests'
-        tests_dir.mkdir(exist_ok=True)
+        writer.stage_dir(tests_dir)
         
         for test_data in tests_data:
             # Render the filename as well
@@ -209,22 +448,109 @@ class YamlTemplateParser:
             test_file = tests_dir / rendered_filename
             rendered_content = self.render_template_content(test_data['content'], context)
             
-            with open(test_file, 'w') as f:
-                f.write(rendered_content)
+            writer.stage(test_file, rendered_content)
+
+
+def _read_generation_record(record_path: Path, output_dir: Path) -> Dict[Path, str]:
+    """Load a module's generation record as {path: content hash}.
+
+    A module generated before records existed has none; every existing file
+    that differs from the template is then treated as hand-edited.
+    """
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            hashes = json.load(f).get('files', {})
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {output_dir / relative: digest for relative, digest in hashes.items()}
+
+
+def _write_generation_record(record_path: Path, output_dir: Path, writer: StagedWriter,
+                             manifest: WriteManifest, baseline: Optional[Dict[Path, str]]) -> None:
+    """Record the hash of every file as generated.
+
+    A skipped (hand-edited) file keeps its previous hash, since the user's
+    version still derives from that generation rather than this one.
+    """
+    skipped = set(manifest.skipped)
+    hashes = {}
+    for path, content in writer.files.items():
+        if path in skipped:
+            previous = (baseline or {}).get(path)
+            if previous is None:
+                continue
+            digest = previous
+        else:
+            digest = content_hash(content)
+        hashes[path.relative_to(output_dir).as_posix()] = digest
+
+    record = json.dumps({'files': dict(sorted(hashes.items()))}, indent=2) + "\n"
+    write_if_changed(record_path, record)
 
 
 def generate_module_from_yaml(module_name: str, output_dir: Path, 
-                            template_name: str = None) -> None:
+                            template_name: str = None, update: bool = False) -> WriteManifest:
     """Generate a module from YAML template.
     
     Args:
         module_name: Name of the module to generate
         output_dir: Directory where to generate the module
         template_name: Name of the YAML template file (defaults to module_template.yml)
+        update: Merge into an existing module instead of overwriting it
+            (see YamlTemplateParser.generate_module_structure)
+
+    Returns:
+        Manifest of the files created, updated, left unchanged and skipped
     """
-    if template_name is None or template_name == 'yaml':
-        template_name = "module_template.yml"
-    
     parser = YamlTemplateParser()
-    template_data = parser.load_template(template_name)
-    parser.generate_module_structure(module_name, template_data, output_dir)
+    template_data = parser.load_template(_resolve_template_name(template_name))
+    return parser.generate_module_structure(module_name, template_data, output_dir, update=update)
+
+
+def generate_modules_from_yaml(module_names: Iterable[str], output_dir: Path,
+                               template_name: str = None,
+                               max_workers: int = None,
+                               update: bool = False
+                               ) -> Tuple[Dict[str, WriteManifest], Dict[str, Exception]]:
+    """Generate many modules from one YAML template.
+
+    A single parser is shared by every module, so the YAML template is read
+    and parsed once and each template string is compiled once; the modules'
+    files are then rendered and written concurrently on a thread pool.
+
+    Args:
+        module_names: Names of the modules to generate
+        output_dir: Directory where to generate the modules
+        template_name: Name of the YAML template file (defaults to module_template.yml)
+        max_workers: Thread pool size (defaults to ThreadPoolExecutor's default)
+        update: Merge into existing modules instead of overwriting them
+
+    Returns:
+        (manifests, failures): the write manifest of every module that was
+        generated, and the exception raised for every module that failed
+    """
+    parser = YamlTemplateParser()
+    template_data = parser.load_template(_resolve_template_name(template_name))
+
+    manifests = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(parser.generate_module_structure, name, template_data,
+                                  output_dir, update)
+            for name in module_names
+        }
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                failures[name] = error
+            else:
+                manifests[name] = future.result()
+    return manifests, failures
+
+
+def _resolve_template_name(template_name: Optional[str]) -> str:
+    """Map the CLI's --template default ('yaml') or None to the bundled template."""
+    if template_name is None or template_name == 'yaml':
+        return "module_template.yml"
+    return template_name
@@ -38,6 +38,9 @@ setup(
             'pytest-flask>=1.3.0',
             'python-dotenv>=1.0.1',
         ],
+        'fast': [
+            'orjson>=3.9',
+        ],
         'docs': [
             'sphinx>=5.0.0',
             'sphinx-rtd-theme>=1.0.0',
@@ -49,6 +52,9 @@ setup(
         'console_scripts': [
             'constrictor=constrictor.cli:main',
         ],
+        'pytest11': [
+            'constrictor=constrictor.pytest_plugin',
+        ],
     },
     classifiers=[
         'Development Status :: 4 - Beta',